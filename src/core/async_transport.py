@@ -0,0 +1,165 @@
+import asyncio
+import atexit
+import logging
+import threading
+
+import aiohttp
+from yarl import URL
+
+from src.core.config import get_download_config
+from src.core.http_session import DEFAULT_HEADERS, get_session
+
+class ProbeFailed(Exception):
+    """有服务器没有明确答复资源不存在（超时、连接错误、429、5xx 等），无法判断资源是否存在"""
+    pass
+
+def _is_valid_head(status, headers):
+    """判断HEAD响应是否表示资源存在"""
+    if status != 200:
+        return False
+    try:
+        return int(headers.get('content-length', '101')) > 100
+    except ValueError:
+        return True
+
+# 能说明资源在该服务器上不存在的状态码
+MISSING_STATUSES = (404, 410)
+
+class AsyncTransport:
+    """基于 aiohttp 的异步请求层
+
+    在后台线程中运行一个事件循环，所有请求共用同一个 TCPConnector。
+    同步代码可以在任意线程中调用 race()/probe_many()，请求会被提交到这个事件循环中执行。
+    probe_many() 一次提交多张卡牌的探测，所有请求同时在途，只受连接数限制。
+    请求头与共享的 requests 会话一致，cookie 在每次探测前从该会话复制。
+    """
+
+    def __init__(self, headers=None, timeout=None, limit=None, limit_per_host=None, cookies=None):
+        config = get_download_config()
+        self.timeout = timeout or config["timeout"]
+        self.limit = limit or config["max_connections"]
+        self.limit_per_host = limit_per_host or config["connections_per_host"]
+        # 连接由 aiohttp 自行复用，不需要 Connection 请求头
+        self.headers = {name: value for name, value in DEFAULT_HEADERS.items() if name != 'Connection'}
+        if headers:
+            self.headers.update(headers)
+        # requests 会话的cookie，包括从 data/cookies.json 读取和预热时获取的
+        self.cookies = cookies
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-transport", daemon=True)
+        self._thread.start()
+        self._session = self.run(self._create_session())
+        self._closed = False
+
+    async def _create_session(self):
+        """在事件循环中创建共享会话"""
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=300
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+
+    def run(self, coro, timeout=None):
+        """在后台事件循环中执行协程并等待结果"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def _client_timeout(self, timeout):
+        """单次请求的超时设置，未指定时沿用会话默认值"""
+        return aiohttp.ClientTimeout(total=timeout) if timeout else None
+
+    async def head_async(self, url, timeout=None):
+        """发送HEAD请求，返回 (状态码, 响应头)，出错时状态码为 None"""
+        try:
+            async with self._session.head(url, timeout=self._client_timeout(timeout)) as response:
+                return response.status, response.headers.copy()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.debug(f"HEAD {url} 出错: {e}")
+            return None, {}
+
+    async def race_async(self, urls, timeout=None):
+        """同时向所有URL发送HEAD请求，返回第一个有效响应的下标
+
+        有效响应指状态码为200且内容长度不为空的响应。一旦得到结果，
+        其余仍在进行的请求会被立即取消。所有服务器都答复404或410时返回 None；
+        有服务器没有给出确定答复时抛出 ProbeFailed，此时不能认定资源不存在。
+        """
+        tasks = {asyncio.ensure_future(self.head_async(url, timeout)): index for index, url in enumerate(urls)}
+        pending = set(tasks)
+        inconclusive = 0
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # 同一轮完成的多个结果中优先选择排在前面的URL
+                winners = [tasks[task] for task in done if _is_valid_head(*task.result())]
+                if winners:
+                    return min(winners)
+                inconclusive += sum(1 for task in done if task.result()[0] not in MISSING_STATUSES)
+            if inconclusive:
+                raise ProbeFailed(f"{inconclusive}/{len(urls)} 个服务器没有确定答复")
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def probe_many_async(self, url_groups, timeout=None):
+        """同时探测多组URL，每组的结果与 race_async 相同，无法确定的组结果为 ProbeFailed 实例"""
+        self._sync_cookies()
+        results = await asyncio.gather(
+            *(self.race_async(urls, timeout) for urls in url_groups),
+            return_exceptions=True
+        )
+        return [
+            ProbeFailed(str(result)) if isinstance(result, Exception) and not isinstance(result, ProbeFailed) else result
+            for result in results
+        ]
+
+    def _sync_cookies(self):
+        """将 requests 会话中的cookie复制到 aiohttp 会话，需在事件循环中调用"""
+        if self.cookies is None:
+            return
+        for cookie in list(self.cookies):
+            domain = cookie.domain.lstrip('.') or 'bestdori.com'
+            self._session.cookie_jar.update_cookies({cookie.name: cookie.value}, URL(f"https://{domain}/"))
+
+    def probe_many(self, url_groups, timeout=None):
+        """同步接口：批量探测，所有组的请求同时在途，按组返回 URL下标、None 或 ProbeFailed 实例"""
+        return self.run(self.probe_many_async(url_groups, timeout))
+
+    def race(self, urls, timeout=None):
+        """同步接口：返回第一个有效响应的URL下标，全部答复不存在时返回 None，无法确定时抛出 ProbeFailed"""
+        result = self.probe_many([urls], timeout)[0]
+        if isinstance(result, ProbeFailed):
+            raise result
+        return result
+
+    def close(self):
+        """关闭会话并停止事件循环"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.run(self._session.close(), timeout=5)
+        except Exception as e:
+            logging.debug(f"关闭异步会话出错: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+_transport = None
+_transport_lock = threading.Lock()
+
+def get_transport():
+    """获取进程内共享的 AsyncTransport 实例"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = AsyncTransport(cookies=get_session().cookies)
+            atexit.register(_transport.close)
+        return _transport
@@ -1,32 +1,43 @@
 # -*- coding: utf-8 -*-
-import requests
 import os
 import logging
 import time
 from datetime import datetime
-import json
 from bs4 import BeautifulSoup
-import random
 import urllib.parse
 import sys
-import io
 from tqdm import tqdm
 import keyboard
 import threading
 import signal
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-try:
-    from PIL import Image
-    print("PIL导入成功")
-except ImportError as e:
-    print(f"导入PIL时出错: {e}")
-    print(f"Python路径: {sys.executable}")
-    print(f"sys.path: {sys.path}")
+# 以脚本方式直接运行时，将项目根目录加入模块搜索路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.core.async_transport import get_transport, ProbeFailed
+from src.core.http_session import get_session, looks_cookie_related, warm_up
+from src.core.rate_limiter import AdaptiveRateLimiter, REQUESTS_PER_SPEED
+from src.core.retry_policy import RetryPolicy
+from src.core.config import get_download_config
+from src.utils.card_index import get_card_index
+from src.utils.card_files import get_card_file_store
+from src.utils.character_registry import get_character_registry
+from src.utils.id_set import IdSet
+from src.core.checkpoint import CheckpointJournal
+from src.core.image_stream import fetch_image
+from src.utils.png_utils import check_card_image
 
 __version__ = "2.1.1"
 __author__ = "Findx"
 __description__ = "Bestdori卡面下载工具"
 
+# 卡面资源所在的服务器，同一轮探测中同时答复时优先排在前面的服务器
+SERVERS = ["jp", "en", "tw", "cn", "kr"]
+
 # 获取日志目录
 logs_dir = os.environ.get('BESTDORI_LOGS_DIR', os.path.dirname(os.path.abspath(__file__)))
 
@@ -51,7 +62,8 @@ def get_application_path():
         return os.path.dirname(os.path.abspath(__file__))
 
 class BestdoriScraper:
-    def __init__(self, save_dir, start_id=1, end_id=41000, selected_members=None):
+    def __init__(self, save_dir, start_id=1, end_id=41000, selected_members=None, concurrency=1, refresh=False,
+                 incremental=False):
         self.save_dir = save_dir
         self.start_id = start_id
         self.end_id = end_id
@@ -60,14 +72,30 @@ class BestdoriScraper:
             "normal_only": 0,  # 仅普通版本
             "trained_only": 0, # 仅特训版本
             "failed": 0,       # 下载失败
-            "nonexistent": []  # 不存在的ID列表
+            "nonexistent": IdSet()  # 不存在的ID集合
         }
         self.control = {"stop": False}
+        # 所有工作线程共用的自适应限速器，download_speed 决定初始速率
+        self.rate_limiter = AdaptiveRateLimiter()
+        self.retry_policy = RetryPolicy()
         self.download_speed = 1.0
-        self.last_state_file = os.path.join(get_application_path(), "last_state.json")
-        self.successful_ids = set()
+        # 下载进度日志，每处理完一个卡牌ID追加一行，旧版的 last_state.json 仍可读取
+        self.journal = CheckpointJournal(
+            os.path.join(get_application_path(), "last_state.jsonl"),
+            compact_every=get_download_config()["checkpoint_interval"],
+            legacy_path=os.path.join(get_application_path(), "last_state.json")
+        )
+        self.successful_ids = IdSet()
+        self.card_servers = {}  # 卡牌ID -> 下载所用的服务器
         self.last_progress_time = time.time()
         self.selected_members = selected_members or []
+        self.concurrency = max(1, int(concurrency))  # 同时处理的卡牌ID数量
+        self.refresh = refresh  # 是否用条件请求检查已下载的卡面是否有更新
+        self.incremental = incremental  # 是否只探测每个成员已知最新卡牌之后的ID
+        # 越过已知最新卡牌后，连续多少个ID不存在即判定该成员扫描完毕
+        self.probe_window = get_download_config()["frontier_window"]
+        # 已知最新卡牌之前每批同时探测的卡牌ID数
+        self.probe_batch = get_download_config()["probe_batch"]
         
         # 确保保存目录存在
         os.makedirs(save_dir, exist_ok=True)
@@ -89,219 +117,46 @@ class BestdoriScraper:
             console_handler.setFormatter(logging.Formatter('%(message)s'))
             self.logger.addHandler(console_handler)
         
-        # 添加乐团和人物的映射信息
-        self.band_info = {
-            "Poppin'Party": {
-                "folder_name": "Poppin'Party",
-                "members": {
-                    (1001, 2000): {"name": "Kasumi", "jp_name": "户山香澄"},
-                    (2001, 3000): {"name": "Tae", "jp_name": "花园多惠"},
-                    (3001, 4000): {"name": "Rimi", "jp_name": "牛込里美"},
-                    (4001, 5000): {"name": "Saya", "jp_name": "山吹沙绫"},
-                    (5001, 5999): {"name": "Arisa", "jp_name": "市谷有咲"}
-                }
-            },
-            "Afterglow": {
-                "folder_name": "Afterglow",
-                "members": {
-                    (6001, 7000): {"name": "Ran", "jp_name": "美竹兰"},
-                    (7001, 8000): {"name": "Moca", "jp_name": "青叶摩卡"},
-                    (8001, 9000): {"name": "Himari", "jp_name": "上原绯玛丽"},
-                    (9001, 10000): {"name": "Tomoe", "jp_name": "宇田川巴"},
-                    (10001, 10999): {"name": "Tsugumi", "jp_name": "羽泽鸫"}
-                }
-            },
-            "Hello Happy World": {
-                "folder_name": "Hello Happy World",
-                "members": {
-                    (11001, 12000): {"name": "Kokoro", "jp_name": "弦卷心"},
-                    (12001, 13000): {"name": "Kaoru", "jp_name": "濑田薰"},
-                    (13001, 14000): {"name": "Hagumi", "jp_name": "北泽育美"},
-                    (14001, 15000): {"name": "Kano", "jp_name": "松原花音"},
-                    (15001, 15999): {"name": "Misaki", "jp_name": "奥泽美咲"}
-                }
-            },
-            "Pastel*Palettes": {
-                "folder_name": "Pastel Palettes",
-                "members": {
-                    (16001, 17000): {"name": "Aya", "jp_name": "丸山彩"},
-                    (17001, 18000): {"name": "Hina", "jp_name": "冰川日菜"},
-                    (18001, 19000): {"name": "Chisato", "jp_name": "白鹭千圣"},
-                    (19001, 20000): {"name": "Maya", "jp_name": "大和麻弥"},
-                    (20001, 20999): {"name": "Eve", "jp_name": "若宫伊芙"}
-                }
-            },
-            "Roselia": {
-                "folder_name": "Roselia",
-                "members": {
-                    (21001, 22000): {"name": "Yukina", "jp_name": "湊友希那"},
-                    (22001, 23000): {"name": "Sayo", "jp_name": "氷川纱夜"},
-                    (23001, 24000): {"name": "Lisa", "jp_name": "今井莉莎"},
-                    (24001, 25000): {"name": "Ako", "jp_name": "宇田川亚子"},
-                    (25001, 25999): {"name": "Rinko", "jp_name": "白金燐子"}
-                }
-            },
-            "Morfonica": {
-                "folder_name": "Morfonica",
-                "members": {
-                    (26001, 27000): {"name": "Mashiro", "jp_name": "仓田真白"},
-                    (27001, 28000): {"name": "Toko", "jp_name": "桐谷透子"},
-                    (28001, 29000): {"name": "Nanami", "jp_name": "广町七深"},
-                    (29001, 30000): {"name": "Tsukushi", "jp_name": "二叶筑紫"},
-                    (30001, 30999): {"name": "Rui", "jp_name": "八潮瑠唯"}
-                }
-            },
-            "RAISE A SUILEN": {
-                "folder_name": "RAISE_A_SUILEN",
-                "members": {
-                    (31001, 32000): {"name": "Layer", "jp_name": "LAYER"},
-                    (32001, 33000): {"name": "Lock", "jp_name": "LOCK"},
-                    (33001, 34000): {"name": "Masking", "jp_name": "MASKING"},
-                    (34001, 35000): {"name": "Pareo", "jp_name": "PAREO"},
-                    (35001, 35999): {"name": "Chu2", "jp_name": "Chu²"}
-                }
-            },
-            "MyGO!!!!!": {
-                "folder_name": "MyGO!!!!!",
-                "members": {
-                    (36001, 37000): {"name": "Tomorin", "jp_name": "高松灯"},
-                    (37001, 38000): {"name": "Ano", "jp_name": "千早爱音"},
-                    (38001, 39000): {"name": "Rana", "jp_name": "要乐奈"},
-                    (39001, 40000): {"name": "Soyo", "jp_name": "长崎素世"},
-                    (40001, 40999): {"name": "Riki", "jp_name": "椎名立希"}
-                }
-            }
-        }
+        # 乐队和角色数据来自共享的角色表，按卡牌ID查找成员时二分
+        self.registry = get_character_registry()
         
         # 构建组合范围映射
-        self.group_ranges = {}
-        for band_name, band_data in self.band_info.items():
-            min_start = float('inf')
-            max_end = 0
-            for (start, end), _ in band_data["members"].items():
-                min_start = min(min_start, start)
-                max_end = max(max_end, end)
-            self.group_ranges[band_name] = (min_start, max_end)
+        self.group_ranges = {
+            band['short_name']: self.registry.band_range(band['id'])
+            for band in self.registry.bands
+            if self.registry.band_range(band['id'])
+        }
+        
+        # 角色编号 -> 日志和保存目录使用的成员信息
+        self.member_info = {
+            char['id']: {
+                "band_name": self.registry.band(char['band_id'])['short_name'],
+                "band_folder": self.registry.band(char['band_id'])['folder'],
+                "member_name": char['en_name'],
+                "member_jp_name": char['cn_name']
+            }
+            for char in self.registry.characters
+        }
         
         # 信号处理
         signal.signal(signal.SIGINT, self._handle_signal)
         signal.signal(signal.SIGTERM, self._handle_signal)
         
-        # 最后创建会话
+        # 最后创建会话，存在性探测走共享的异步请求层
+        self.transport = get_transport()
+        self.card_index = get_card_index()
+        self.file_store = get_card_file_store()
         self.session = self._create_session()
     
     def get_group_name(self, card_id):
         """根据卡牌ID获取所属组合名称"""
-        for band_name, band_data in self.band_info.items():
-            for id_range, _ in band_data["members"].items():
-                start, end = id_range
-                if start <= card_id <= end:
-                    return band_name
-        return None
+        char = self.registry.character_of_card(card_id)
+        return self.member_info[char['id']]["band_name"] if char else None
     
-    def get_next_valid_id(self, current_id):
-        """获取下一个可能的有效ID"""
-        # 如果当前ID已经超过结束ID，直接返回结束ID+1
-        if current_id >= self.end_id:
-            return self.end_id + 1
-            
-        # 如果有选定的成员列表，使用它来确定下一个ID
-        if self.selected_members:
-            current_member = None
-            next_member = None
-            
-            # 找到当前ID对应的成员编号
-            for i in range(1, 41):
-                start = (i - 1) * 1000 + 1001
-                end = start + 999
-                if start <= current_id <= end:
-                    current_member = i
-                    break
-            
-            if current_member is not None:
-                # 在选定的成员列表中找到下一个成员
-                for member_id in sorted(self.selected_members):
-                    if member_id > current_member:
-                        next_member = member_id
-                        break
-                
-                if next_member:
-                    # 返回下一个选定成员的起始ID
-                    next_start = (next_member - 1) * 1000 + 1001
-                    # 确保不会超过结束ID
-                    if next_start > self.end_id:
-                        return self.end_id + 1
-                    return next_start
-            
-            # 如果没有找到下一个成员，返回结束ID+1
-            return self.end_id + 1
-        
-        # 如果没有选定的成员列表，使用原有的逻辑
-        member_info = self.get_member_info(current_id)
-        if not member_info:
-            # 如果找不到成员信息，直接返回当前ID+1，但不超过结束ID
-            return min(current_id + 1, self.end_id + 1)
-        
-        # 获取当前成员所在乐团的所有ID范围
-        current_band = member_info["band_name"]
-        band_data = self.band_info[current_band]
-        
-        # 获取当前成员的ID范围
-        current_range = None
-        for id_range, _ in band_data["members"].items():
-            start, end = id_range
-            if start <= current_id <= end:
-                current_range = (start, end)
-                break
-        
-        if not current_range:
-            # 如果找不到范围，直接返回当前ID+1，但不超过结束ID
-            return min(current_id + 1, self.end_id + 1)
-        
-        # 计算当前成员的基础ID
-        current_member_base = ((current_id - current_range[0]) // 1000) * 1000 + current_range[0]
-        
-        # 计算下一个成员的基础ID
-        next_member_base = current_member_base + 1000
-        
-        # 检查是否在当前乐团范围内
-        for id_range, _ in band_data["members"].items():
-            start, end = id_range
-            if start == next_member_base:
-                # 确保不会超过结束ID
-                if next_member_base > self.end_id:
-                    return self.end_id + 1
-                return next_member_base
-        
-        # 如果超出当前乐团范围，查找下一个乐团的起始ID
-        found_current = False
-        for band_name, band_data in self.band_info.items():
-            for id_range, _ in band_data["members"].items():
-                start, end = id_range
-                if found_current and start > current_id:
-                    # 确保不会超过结束ID
-                    if start > self.end_id:
-                        return self.end_id + 1
-                    return start
-                if start <= current_id <= end:
-                    found_current = True
-                
-        # 如果没有找到下一个有效的ID，返回结束ID+1
-        return self.end_id + 1
-
     def get_member_info(self, card_id):
-        """获取卡牌对应的乐团和成员信息"""
-        for band_name, band_data in self.band_info.items():
-            for id_range, member_data in band_data["members"].items():
-                start, end = id_range
-                if start <= card_id <= end:
-                    return {
-                        "band_name": band_name,
-                        "band_folder": band_data["folder_name"],
-                        "member_name": member_data["name"],
-                        "member_jp_name": member_data["jp_name"]
-                    }
-        return None
+        """获取卡牌对应的乐团和成员信息，返回共享的只读字典"""
+        char = self.registry.character_of_card(card_id)
+        return self.member_info[char['id']] if char else None
 
     def ensure_directories(self, card_id):
         """确保所需的目录结构存在"""
@@ -326,99 +181,260 @@ class BestdoriScraper:
 
         return member_path
 
-    def process_card(self, card_id):
-        """处理单张卡牌"""
-        servers = ["jp", "en", "tw", "cn", "kr"]
+    def _card_urls(self, card_id, filename):
+        """卡牌资源在各个服务器上的URL，与 SERVERS 的顺序一致"""
+        return [
+            f"https://bestdori.com/assets/{server}/characters/resourceset/res{str(card_id).zfill(6)}_rip/{filename}"
+            for server in SERVERS
+        ]
+
+    def _probe_cards(self, card_ids, timeout=3):
+        """批量探测卡牌是否存在，所有ID的请求在事件循环中同时发出
+
+        先同时探测所有服务器的normal版本，normal都不存在的ID再探测trained版本，
+        与图形界面一致，两者都不存在才算不存在。返回 {卡牌ID: (服务器, 是否只有trained版本)}，
+        不存在时服务器为 None，没有服务器给出确定答复时值为 ProbeFailed 实例。
+        """
+        results = {}
+        remaining = list(card_ids)
+        for filename in ("card_normal.png", "card_after_training.png"):
+            if not remaining:
+                break
+            url_groups = [self._card_urls(card_id, filename) for card_id in remaining]
+            # 每个服务器各发一个探测请求，按请求数取得令牌
+            self.rate_limiter.acquire(cost=len(url_groups) * len(SERVERS))
+            missing = []
+            for card_id, outcome in zip(remaining, self.transport.probe_many(url_groups, timeout=timeout)):
+                if isinstance(outcome, ProbeFailed):
+                    results[card_id] = outcome
+                elif outcome is None:
+                    missing.append(card_id)
+                else:
+                    results[card_id] = (SERVERS[outcome], filename != "card_normal.png")
+            remaining = missing
+        for card_id in remaining:
+            results[card_id] = (None, False)
+        return results
+
+    def _fetch_card(self, card_id, probe=None):
+        """探测并下载单张卡牌，只返回结果，不修改统计信息
+
+        可在工作线程中并发调用。probe 为 _probe_cards 中该ID的探测结果，
+        未提供时单独探测。返回 (结果, 服务器)，结果为 "complete"、"normal_only"、
+        "trained_only"、"failed" 或 "nonexistent"，无法识别所属成员时结果为 None
+        """
         
         # 获取保存路径
         save_path_base = self.ensure_directories(card_id)
         if not save_path_base:
-            return False
-            
-        member_info = self.get_member_info(card_id)
+            return None, None
         
-        # 快速检查卡牌是否存在
-        card_exists = False
-        for server in servers:
-            # 首先只检查normal版本，因为每张卡至少会有normal版本
-            check_url = f"https://bestdori.com/assets/{server}/characters/resourceset/res{str(card_id).zfill(6)}_rip/card_normal.png"
-            try:
-                response = self.session.head(check_url, timeout=3)
-                if response.status_code == 200:
-                    card_exists = True
-                    break
-            except:
-                continue
-        
-        if not card_exists:
-            self.stats["nonexistent"].append(card_id)
-            self.logger.debug(f"ID {card_id} ({member_info['band_name']} - {member_info['member_jp_name']}) 不存在对应的卡牌")
-            return False
-            
-        normal_success = False
-        trained_success = False
+        # 先查询本地索引，已知不存在的ID不再发起网络请求
+        entry = self.card_index.lookup(card_id)
+        if entry and not entry["exists"]:
+            return "nonexistent", None
         
-        # 已确认卡牌存在，尝试下载
-        for server in servers:
-            if normal_success:
-                break
+        trained_only = False
+        if entry and entry["server"]:
+            winner = entry["server"]
+        else:
+            # 快速检查卡牌是否存在：normal和trained版本都不存在才记为不存在
+            if probe is None:
+                probe = self._probe_cards([card_id])[card_id]
+            if isinstance(probe, ProbeFailed):
+                # 网络问题不能说明卡牌不存在，不写入索引，记为下载失败
+                self.logger.debug(f"ID {card_id} 存在性探测失败: {probe}")
+                return "failed", None
+            winner, trained_only = probe
+            if not winner:
+                self.card_index.mark_absent(card_id)
+                return "nonexistent", None
+        
+        # 优先从探测胜出的服务器下载，其余服务器作为后备
+        servers = [winner] + [server for server in SERVERS if server != winner]
             
+        # 已确认卡牌存在，尝试下载；只有trained版本时跳过normal版本
+        for server in ([] if trained_only else servers):
             url = f"https://bestdori.com/assets/{server}/characters/resourceset/res{str(card_id).zfill(6)}_rip/card_normal.png"
             save_path = os.path.join(save_path_base, f"{card_id}_normal.png")
             
             if self.download_image(url, save_path):
-                normal_success = True
                 # 立即尝试下载trained状态
                 trained_url = f"https://bestdori.com/assets/{server}/characters/resourceset/res{str(card_id).zfill(6)}_rip/card_after_training.png"
                 trained_save_path = os.path.join(save_path_base, f"{card_id}_trained.png")
                 
                 if self.download_image(trained_url, trained_save_path):
-                    trained_success = True
-                else:
-                    # 快速检查其他服务器
-                    for other_server in servers:
-                        if other_server != server:
-                            trained_url = f"https://bestdori.com/assets/{other_server}/characters/resourceset/res{str(card_id).zfill(6)}_rip/card_after_training.png"
-                            if self.download_image(trained_url, trained_save_path, quick_check=True):
-                                trained_success = True
-                                break
-                
-                # 更新统计信息
-                if normal_success and trained_success:
-                    self.stats["complete"] += 1
-                    status = "普通和特训后版本"
-                elif normal_success:
-                    self.stats["normal_only"] += 1
-                    status = "仅普通版本"
-                
-                self.logger.info(f"卡牌 {card_id} ({member_info['band_name']} - {member_info['member_jp_name']}) - {status}已下载")
-                self.successful_ids.add(card_id)
-                return True
+                    self.card_index.mark_present(card_id, server, True, True)
+                    return "complete", server
+                
+                # 快速检查其他服务器
+                for other_server in servers:
+                    if other_server != server:
+                        trained_url = f"https://bestdori.com/assets/{other_server}/characters/resourceset/res{str(card_id).zfill(6)}_rip/card_after_training.png"
+                        if self.download_image(trained_url, trained_save_path, quick_check=True):
+                            self.card_index.mark_present(card_id, server, True, True)
+                            return "complete", server
+                self.card_index.mark_present(card_id, server, True, False)
+                return "normal_only", server
         
         # 如果normal下载失败，尝试只下载trained版本
-        if not normal_success:
-            for server in servers:
-                trained_url = f"https://bestdori.com/assets/{server}/characters/resourceset/res{str(card_id).zfill(6)}_rip/card_after_training.png"
-                trained_save_path = os.path.join(save_path_base, f"{card_id}_trained.png")
-                
-                if self.download_image(trained_url, trained_save_path):
-                    trained_success = True
-                    self.stats["trained_only"] += 1
-                    status = "仅特训版本"
-                    self.logger.info(f"卡牌 {card_id} ({member_info['band_name']} - {member_info['member_jp_name']}) - {status}已下载")
-                    self.successful_ids.add(card_id)
-                    return True
+        for server in servers:
+            trained_url = f"https://bestdori.com/assets/{server}/characters/resourceset/res{str(card_id).zfill(6)}_rip/card_after_training.png"
+            trained_save_path = os.path.join(save_path_base, f"{card_id}_trained.png")
+            
+            if self.download_image(trained_url, trained_save_path):
+                self.card_index.mark_present(card_id, server, False, True)
+                return "trained_only", server
         
         # 如果都失败了，记录为下载失败
-        if not (normal_success or trained_success):
+        return "failed", winner
+
+    def _record_outcome(self, card_id, outcome, server=None):
+        """根据 _fetch_card 的结果更新统计信息，只在扫描线程中调用"""
+        if outcome is None:
+            return False
+        
+        member_info = self.get_member_info(card_id)
+        card_label = f"{card_id} ({member_info['band_name']} - {member_info['member_jp_name']})"
+        
+        if outcome == "nonexistent":
+            self.stats["nonexistent"].add(card_id)
+            self.logger.debug(f"ID {card_label} 不存在对应的卡牌")
+            return False
+        
+        if outcome == "failed":
             self.stats["failed"] += 1
-            self.logger.info(f"卡牌 {card_id} ({member_info['band_name']} - {member_info['member_jp_name']}) - 下载失败")
+            self.logger.info(f"卡牌 {card_label} - 下载失败")
+            return False
+        
+        status = {
+            "complete": "普通和特训后版本",
+            "normal_only": "仅普通版本",
+            "trained_only": "仅特训版本"
+        }[outcome]
+        self.stats[outcome] += 1
+        self.logger.info(f"卡牌 {card_label} - {status}已下载 (服务器: {server})")
+        self.successful_ids.add(card_id)
+        self.card_servers[card_id] = server
+        return True
+
+    def _scan_plan(self):
+        """生成本次扫描的成员ID段，每段为 (起始ID, 结束ID, 已知最新卡牌ID)
+
+        已知最新卡牌ID（前沿）来自卡牌索引，每次运行下载到的卡牌都会写入索引，
+        因此前沿会随运行自动更新。增量模式下每段直接从前沿之后开始。
+        """
+        for char in self.registry.characters:
+            if self.selected_members and char['id'] not in self.selected_members:
+                continue
+            member_start, member_end = char['card_range']
+            
+            start = max(member_start, self.current_id)
+            end = min(member_end, self.end_id)
+            if start > end:
+                continue
+            
+            frontier = self.card_index.frontier(member_start, member_end)
+            if self.incremental and frontier is not None:
+                start = max(start, frontier + 1)
+                if start > end:
+                    continue
+            yield start, end, frontier
+
+    def _scan(self):
+        """从 current_id 开始按成员逐段扫描
+
+        每个成员只在越过已知最新卡牌之后，连续 probe_window 个ID不存在时才判定扫描完毕，
+        没有已知卡牌的成员按同样的规则从段首开始判断。
+        """
+        for start, end, frontier in list(self._scan_plan()):
+            if self.control["stop"]:
+                return
+            if frontier is not None:
+                self.logger.info(f"成员ID段 {start}-{end}，已知最新卡牌: {frontier}")
+            self._scan_segment(start, end, frontier)
+            if self.control["stop"]:
+                return
+            self.current_id = end + 1
+            self.journal.record_position(self.current_id)
         
-        return False
+        self.current_id = max(self.current_id, self.end_id + 1)
+
+    def _scan_segment(self, start, end, frontier=None):
+        """扫描一个成员的ID段，最多同时处理 concurrency 个卡牌ID
+
+        补充窗口前先用 _probe_cards 批量探测接下来一段ID的存在性，工作线程只负责下载和写文件。
+        结果按ID顺序逐个结算，因此统计信息和"连续失败即结束"的判断与单线程扫描完全一致。
+        提前结束时窗口中预取的ID会被取消，已完成的结果直接丢弃。
+        """
+        consecutive_fails = 0
+        next_submit_id = start
+        window = deque()  # (card_id, future)，按ID递增排列
+        probes = {}  # 卡牌ID -> 批量探测结果
+        probed_until = start - 1
+        
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="card")
+        try:
+            while not self.control["stop"]:
+                # 补满预取窗口
+                while len(window) < self.concurrency and next_submit_id <= end:
+                    if next_submit_id > probed_until:
+                        probed_until = self._probe_ahead(next_submit_id, end, frontier, probes)
+                    probe = probes.pop(next_submit_id, None)
+                    window.append((next_submit_id, executor.submit(self._fetch_card, next_submit_id, probe)))
+                    next_submit_id += 1
+                
+                if not window:
+                    break
+                
+                card_id, future = window.popleft()
+                self.current_id = card_id
+                group_name = self.get_group_name(card_id) or "未知组合"
+                self._update_progress(card_id, group_name)
+                
+                try:
+                    outcome, server = future.result()
+                except Exception as e:
+                    self.logger.error(f"处理卡牌 {card_id} 时出错: {e}")
+                    outcome, server = "failed", None
+                
+                self.current_id = card_id + 1
+                recorded = self._record_outcome(card_id, outcome, server)
+                self._checkpoint(card_id, outcome, server)
+                if recorded:
+                    consecutive_fails = 0
+                elif frontier is None or card_id > frontier:
+                    # 已知最新卡牌之前的空缺不计入连续失败
+                    consecutive_fails += 1
+                    if consecutive_fails >= self.probe_window:
+                        self.logger.info(f"\n检测到连续{consecutive_fails}次失败，判定当前角色卡牌已扫描完毕")
+                        self.logger.info(f"从 {card_id} 跳转至下一个角色")
+                        break
+        finally:
+            for _, pending in window:
+                pending.cancel()
+            executor.shutdown(wait=True)
+
+    def _probe_ahead(self, start, end, frontier, probes):
+        """批量探测从 start 开始的一段ID，结果写入 probes，返回这一段的最后一个ID
+
+        已知最新卡牌之前每批 probe_batch 个ID；越过之后很快就会连续不存在，
+        每批只探测一个预取窗口的ID，避免成员扫描结束后多发请求。
+        本地索引中已有记录的ID不探测，由 _fetch_card 直接使用索引。
+        """
+        if frontier is not None and start <= frontier:
+            last = min(end, frontier, start + self.probe_batch - 1)
+        else:
+            last = min(end, start + max(self.concurrency, self.probe_window) - 1)
+        card_ids = [card_id for card_id in range(start, last + 1) if self.card_index.lookup(card_id) is None]
+        if card_ids:
+            probes.update(self._probe_cards(card_ids))
+        return last
 
     def run(self):
         """运行下载器，增加智能跳转和用户交互"""
         os.makedirs(self.save_dir, exist_ok=True)
+        self.retry_policy.reset()
         
         # 加载状态
         state = self.load_state()
@@ -427,23 +443,19 @@ class BestdoriScraper:
             if input("发现上次的下载记录，是否继续？(y/n): ").lower().strip() == 'y':
                 self.current_id = state["last_id"]
                 self.stats = state["stats"]
-                self.successful_ids = set(state["successful_ids"])
+                self.successful_ids = state["successful_ids"]
+                self.card_servers = state["card_servers"]
             else:
                 self.current_id = self.start_id
                 # 如果选择不继续，删除状态文件
-                if os.path.exists(self.last_state_file):
-                    try:
-                        os.remove(self.last_state_file)
-                    except:
-                        pass
+                self._clear_state()
         else:
             self.current_id = self.start_id
             # 如果状态文件存在但范围不同，删除它
-            if os.path.exists(self.last_state_file):
-                try:
-                    os.remove(self.last_state_file)
-                except:
-                    pass
+            self._clear_state()
+        
+        # 以当前状态作为日志的第一行快照，之后只追加
+        self.save_state()
         
         self.logger.info("\n=== 控制说明 ===")
         self.logger.info("1. 使用 Ctrl+C 保存并退出")
@@ -452,42 +464,7 @@ class BestdoriScraper:
         self.logger.info("============\n")
         
         try:
-            consecutive_fails = 0
-            last_success_id = self.current_id
-            current_character_base = ((self.current_id - 1) // 1000) * 1000 + 1
-            empty_id_streak = 0  # 连续空ID计数
-            
-            while self.current_id <= self.end_id and not self.control["stop"]:
-                group_name = self.get_group_name(self.current_id) or "未知组合"
-                self._update_progress(self.current_id, group_name)
-                
-                if self.process_card(self.current_id):
-                    consecutive_fails = 0
-                    empty_id_streak = 0
-                    last_success_id = self.current_id
-                else:
-                    consecutive_fails += 1
-                    
-                    # 如果是不存在的卡牌ID
-                    if self.current_id in self.stats["nonexistent"]:
-                        empty_id_streak += 1
-                    
-                    # 连续5次失败，直接跳转到下一个角色
-                    if consecutive_fails >= 5:
-                        next_id = self.get_next_valid_id(last_success_id)
-                        current_character_end = current_character_base + 999
-                        
-                        self.logger.info(f"\n检测到连续{consecutive_fails}次失败，判定当前角色卡牌已扫描完毕")
-                        self.logger.info(f"从 {self.current_id} 跳转至下一个角色ID: {next_id}")
-                        
-                        self.current_id = next_id
-                        consecutive_fails = 0
-                        empty_id_streak = 0
-                        current_character_base = ((self.current_id - 1) // 1000) * 1000 + 1
-                        continue
-                
-                self.current_id += 1
-                
+            self._scan()
         except KeyboardInterrupt:
             self.logger.info("\n正在保存进度...")
             self.save_state()
@@ -497,53 +474,20 @@ class BestdoriScraper:
         finally:
             # 只有在正常完成下载时才删除状态文件
             if not self.control["stop"] and self.current_id > self.end_id:
-                if os.path.exists(self.last_state_file):
-                    try:
-                        os.remove(self.last_state_file)
-                        self.logger.info("已清理下载记录")
-                    except Exception as e:
-                        self.logger.error(f"清理下载记录失败: {e}")
+                if self._clear_state():
+                    self.logger.info("已清理下载记录")
             else:
                 self.save_state()
+            self.journal.close()
             self._show_statistics()
 
-    def quick_check_card_exists(self, card_id):
-        """快速检查卡牌是否存在"""
-        servers = ["jp", "en", "tw", "cn", "kr"]
-        for server in servers:
-            check_url = f"https://bestdori.com/assets/{server}/characters/resourceset/res{str(card_id).zfill(6)}_rip/card_normal.png"
-            try:
-                response = self.session.head(check_url, timeout=2)
-                if response.status_code == 200:
-                    return True
-            except:
-                continue
-        return False
-        
     def _create_session(self):
-        """创建请求会话"""
-        session = requests.Session()
-        
-        # 通用请求头
-        common_headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36 Edg/133.0.0.0',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6,zh-TW;q=0.5',
-            'Connection': 'keep-alive',
-            'Referer': 'https://bestdori.com/info/cards',
-            'Cache-Control': 'no-cache'
-        }
-        session.headers.update(common_headers)
-        
-        # 初始化会话，获取必要的cookie
-        try:
-            self.logger.info("初始化会话...")
-            session.get('https://bestdori.com', timeout=10)
-            session.get('https://bestdori.com/info/cards', timeout=10)
-            self.logger.info("会话初始化成功")
-        except Exception as e:
-            self.logger.error(f"会话初始化失败: {str(e)}")
-        
-        return session
+        """获取请求会话，使用进程内共享的连接池
+
+        上次保存的cookie会被直接复用，启动时不再访问网站页面；
+        只有下载请求的失败看起来与cookie有关时才重新获取cookie。
+        """
+        return get_session()
 
     def clean_filename(self, filename):
         """清理文件名中的非法字符"""
@@ -555,134 +499,116 @@ class BestdoriScraper:
             filename = filename[:100]
         return filename.strip()
 
-    def try_direct_image_download(self, card_id):
-        """直接尝试下载图片，跳过页面解析"""
-        # 直接构建可能的图片URL
-        image_urls = []
-        
-        # 尝试不同的资源ID格式
-        resource_ids = [
-            f"res{str(card_id).zfill(6)}",  # 例如: res000123
-            f"res0{str(card_id).zfill(5)}"   # 例如: res001234
-        ]
-        
-        # 尝试不同的服务器
-        servers = ["jp", "en", "tw", "cn", "kr"]
-        
-        # 构建所有可能的URL组合
-        for resource_id in resource_ids:
-            for server in servers:
-                base_url = f"https://bestdori.com/assets/{server}/characters/resourceset/"
-                image_urls.append(f"{base_url}{resource_id}_rip/card_normal.png")
-                image_urls.append(f"{base_url}{resource_id}_rip/card_after_training.png")
-        
-        # 尝试下载图片
-        card_name = f"card_{card_id}"
-        success = False
-        
-        # 修改：尝试下载所有可能的图片，不在第一次成功后就停止
-        download_count = 0
-        for idx, url in enumerate(image_urls, 1):
-            # 为不同类型的图片使用不同的文件名
-            if "card_normal.png" in url:
-                save_path = os.path.join(self.save_dir, f"{card_name}_normal.png")
-            elif "card_after_training.png" in url:
-                save_path = os.path.join(self.save_dir, f"{card_name}_trained.png")
-            else:
-                save_path = os.path.join(self.save_dir, f"{card_name}_{idx}.png")
-                
-            if self.download_image(url, save_path):
-                success = True
-                download_count += 1
-                # 如果已经找到了两张图片（普通和特训后），可以提前结束
-                if download_count >= 2:
-                    break
-        
-        return success
+    @property
+    def download_speed(self):
+        """下载速度倍率"""
+        return self._download_speed
+    
+    @download_speed.setter
+    def download_speed(self, speed):
+        """设置下载速度倍率，同时重设限速器的当前速率"""
+        self._download_speed = speed
+        self.rate_limiter.set_rate(speed * REQUESTS_PER_SPEED)
+    
+    def download_image(self, url, save_path, quick_check=False):
+        """下载图片，增加快速检查模式
 
-    def download_image(self, url, save_path, quick_check=False, retries=2):
-        """下载图片，增加快速检查模式"""
+        检查更新模式下，已有的文件会带着记录的 ETag/Last-Modified 发送条件请求，
+        服务器返回304时保留本地文件。超时、连接错误、5xx 和 429 按重试策略退避后重试，
+        快速检查模式只请求一次。
+        """
+        validators = None
         if os.path.exists(save_path):
-            file_size = os.path.getsize(save_path)
-            if file_size > 100000:
-                return True
-            os.remove(save_path)
+            # 只读取文件头和末尾检查已有文件，不解码图片
+            if check_card_image(save_path, min_bytes=100001):
+                if not self.refresh:
+                    return True
+                validators = self.file_store.validators_for(save_path)
+            else:
+                os.remove(save_path)
         
-        attempts = 1 if quick_check else retries
+        headers = {
+            'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
+            'Referer': 'https://bestdori.com/info/cards'
+        }
         
-        for attempt in range(attempts):
+        def request():
+            # 由共享的限速器控制请求速率，代替固定的随机等待
+            self.rate_limiter.acquire()
             try:
-                if not quick_check:
-                    time.sleep(random.uniform(0.2, 0.5) / self.download_speed)
-                
-                headers = {
-                    'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
-                    'Referer': 'https://bestdori.com/info/cards'
-                }
-                
-                response = self.session.get(url, headers=headers, timeout=5 if quick_check else 10, stream=True)
-                
-                if response.status_code == 404:
-                    return False
-                
-                if not response.headers.get('content-type', '').startswith('image/'):
-                    return False
-                
-                img_data = response.content
-                img_size = len(img_data)
-                
-                if img_size < 100000:
-                    return False
-                
-                img = Image.open(io.BytesIO(img_data))
-                width, height = img.size
-                
-                if width != 1334 or height != 1002:
-                    return False
-                
-                with open(save_path, 'wb') as f:
-                    f.write(img_data)
-                
-                return True
-                
+                # 存在上次中断留下的部分文件时只请求剩余部分，校验通过后原子替换
+                result = fetch_image(self.session, url, save_path, headers=headers,
+                                     timeout=5 if quick_check else 10, validators=validators, min_bytes=100000)
             except Exception as e:
-                if not quick_check:
-                    self.logger.debug(f"下载图片时出错: {e}")
-                continue
+                self.rate_limiter.on_error(e)
+                raise
+            self.rate_limiter.on_response(result.status)
+            return result
+        
+        try:
+            result = self.retry_policy.execute(request, max_attempts=1 if quick_check else None)
+            # 请求失败可能是cookie缺失或过期，重新获取cookie后再试一次
+            if looks_cookie_related(result.status) and warm_up(self.session):
+                self.logger.info("请求被拒绝，已重新获取cookie")
+                result = self.retry_policy.execute(request, max_attempts=1 if quick_check else None)
+        except Exception as e:
+            if not quick_check:
+                self.logger.debug(f"下载图片时出错: {e}")
+            return False
         
-        return False
+        if result.status == 304:
+            self.logger.debug(f"卡面未更新: {save_path}")
+        elif result.success:
+            self.file_store.record(save_path, url, result.headers)
+        elif not quick_check and self.retry_policy.classify_status(result.status):
+            self.logger.debug(f"下载图片失败，重试次数已用完: 状态码 {result.status}")
+        return result.success
         
     def save_state(self):
-        """保存当前状态"""
+        """将当前状态写成进度日志的快照"""
         state = {
             "last_id": self.current_id,
             "stats": self.stats,
-            "successful_ids": list(self.successful_ids),
+            "successful_ids": self.successful_ids,
+            "card_servers": self.card_servers,
             "start_id": self.start_id,  # 添加起始ID
             "end_id": self.end_id       # 添加结束ID
         }
-        with open(self.last_state_file, 'w') as f:
-            json.dump(state, f)
+        try:
+            self.journal.compact(state)
+        except OSError as e:
+            self.logger.error(f"保存下载进度失败: {e}")
             
     def load_state(self):
-        """加载上次的状态"""
-        if os.path.exists(self.last_state_file):
-            try:
-                with open(self.last_state_file, 'r') as f:
-                    state = json.load(f)
-                return state
-            except:
-                return None
-        return None
+        """重放进度日志得到上次的状态"""
+        return self.journal.load()
+
+    def _checkpoint(self, card_id, outcome, server):
+        """记录一个卡牌ID的结果，追加的记录足够多时压缩日志"""
+        try:
+            self.journal.record_card(card_id, outcome, server)
+        except OSError as e:
+            self.logger.error(f"写入下载进度失败: {e}")
+            return
+        if self.journal.should_compact():
+            self.save_state()
+
+    def _clear_state(self):
+        """删除进度日志，返回是否成功"""
+        try:
+            self.journal.clear()
+            return True
+        except OSError as e:
+            self.logger.error(f"清理下载记录失败: {e}")
+            return False
 
     def _handle_signal(self, signum, frame):
         """处理信号"""
         if signum in (signal.SIGINT, signal.SIGTERM):
             if not self.control["stop"]:
+                # 进度日志已逐条写入，这里只通知扫描停止，退出前 run() 会再写一次快照
                 self.logger.info("\n正在保存进度并退出...")
                 self.control["stop"] = True
-                self.save_state()
-                self.logger.info("进度已保存")
 
     def _update_progress(self, current_id, group_name):
         """更新进度信息"""
@@ -714,20 +640,8 @@ class BestdoriScraper:
         self.logger.info(f"└─ 下载失败: {self.stats['failed']} 张")
         
         if self.stats["nonexistent"]:
-            # 对不存在的ID进行区间合并
-            ranges = []
-            current_range = [self.stats["nonexistent"][0], self.stats["nonexistent"][0]]
-            
-            for id in sorted(self.stats["nonexistent"][1:]):
-                if id == current_range[1] + 1:
-                    current_range[1] = id
-                else:
-                    ranges.append(current_range)
-                    current_range = [id, id]
-            ranges.append(current_range)
-            
             self.logger.info("\n不存在卡牌的ID区间:")
-            for range_start, range_end in ranges:
+            for range_start, range_end in self.stats["nonexistent"].ranges():
                 if range_start == range_end:
                     self.logger.info(f"  - {range_start}")
                 else:
@@ -737,7 +651,7 @@ class BestdoriScraper:
         success_file = os.path.join(self.save_dir, "successful_ids.txt")
         with open(success_file, 'w', encoding='utf-8') as f:
             current_group = None
-            for card_id in sorted(self.successful_ids):
+            for card_id in self.successful_ids:
                 group_name = self.get_group_name(card_id)
                 if group_name != current_group:
                     current_group = group_name
@@ -745,51 +659,6 @@ class BestdoriScraper:
                 f.write(f"{card_id}\n")
         self.logger.info(f"\n成功下载的ID列表已保存到: {success_file}")
 
-def load_character_list():
-    """加载人物列表"""
-    try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        character_list_file = os.path.join(script_dir, "character_list.json")
-        
-        if not os.path.exists(character_list_file):
-            print("错误：找不到人物列表文件 character_list.json")
-            return None
-            
-        with open(character_list_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"加载人物列表时出错: {e}")
-        return None
-
-def display_character_list(character_data):
-    """显示人物列表"""
-    print("\n┌─────────────────────────┐")
-    print("│     选择下载范围        │")
-    print("├─────────────────────────┤")
-    print("│ 1. 按组合选择          │")
-    print("│ 2. 按人物选择          │")
-    print("│ 0. 自定义ID范围        │")
-    print("└─────────────────────────┘\n")
-    
-    choice = input("请选择查找方式 [0/1/2]: ").strip()
-    
-    if choice == "1":
-        print("\n┌─────────── 组合列表 ───────────┐")
-        for group in character_data["groups"]:
-            print(f"│ {group['id']:2d}. {group['name']:<20} │")
-            print(f"│    ID范围: {group['id_range']['start']}-{group['id_range']['end']} │")
-        print("└──────────────────────────────┘\n")
-        
-    elif choice == "2":
-        for group in character_data["groups"]:
-            print(f"\n┌─────────── {group['name']} ───────────┐")
-            for member in group["members"]:
-                print(f"│ {member['id']:2d}. {member['name']:<8} ({member['nickname']:<8}) │")
-                print(f"│    ID范围: {member['id_range']['start']}-{member['id_range']['end']} │")
-            print("└──────────────────────────────┘")
-        
-    return choice
-
 def parse_selection(input_str):
     """解析用户输入的选择"""
     # 首先替换所有分隔符为逗号
@@ -818,33 +687,6 @@ def parse_selection(input_str):
                     
     return sorted(list(selected_ids))
 
-def get_id_ranges(character_data, selection_type, selected_ids):
-    """获取选定ID的范围"""
-    id_ranges = []
-    
-    if selection_type == "1":  # 按组合选择
-        for group in character_data["groups"]:
-            if group["id"] in selected_ids:
-                id_ranges.append(group["id_range"])
-    elif selection_type == "2":  # 按人物选择
-        for group in character_data["groups"]:
-            for member in group["members"]:
-                if member["id"] in selected_ids:
-                    id_ranges.append(member["id_range"])
-    
-    # 合并重叠的范围
-    if id_ranges:
-        id_ranges.sort(key=lambda x: x["start"])
-        merged = [id_ranges[0]]
-        for current in id_ranges[1:]:
-            if current["start"] <= merged[-1]["end"]:
-                merged[-1]["end"] = max(merged[-1]["end"], current["end"])
-            else:
-                merged.append(current)
-        return merged
-    
-    return []
-
 def show_about():
     """显示关于信息"""
     print(f"\n{__description__}")
@@ -852,61 +694,16 @@ def show_about():
     print(f"作者: {__author__}")
     
     print("\n=== 组合与人物列表 ===")
-    print("1. Poppin'Party (ID: 1001-5999)")
-    print("   ├─ 户山香澄 (1001-2000)")
-    print("   ├─ 花园多惠 (2001-3000)")
-    print("   ├─ 牛込里美 (3001-4000)")
-    print("   ├─ 山吹沙绫 (4001-5000)")
-    print("   └─ 市谷有咲 (5001-5999)")
-    
-    print("\n2. Afterglow (ID: 6001-10999)")
-    print("   ├─ 美竹兰 (6001-7000)")
-    print("   ├─ 青叶摩卡 (7001-8000)")
-    print("   ├─ 上原绯玛丽 (8001-9000)")
-    print("   ├─ 宇田川巴 (9001-10000)")
-    print("   └─ 羽泽鸫 (10001-10999)")
-    
-    print("\n3. Hello Happy World (ID: 11001-15999)")
-    print("   ├─ 弦卷心 (11001-12000)")
-    print("   ├─ 濑田薰 (12001-13000)")
-    print("   ├─ 北泽育美 (13001-14000)")
-    print("   ├─ 松原花音 (14001-15000)")
-    print("   └─ 奥泽美咲 (15001-15999)")
-    
-    print("\n4. Pastel*Palettes (ID: 16001-20999)")
-    print("   ├─ 丸山彩 (16001-17000)")
-    print("   ├─ 冰川日菜 (17001-18000)")
-    print("   ├─ 白鹭千圣 (18001-19000)")
-    print("   ├─ 大和麻弥 (19001-20000)")
-    print("   └─ 若宫伊芙 (20001-20999)")
-    
-    print("\n5. Roselia (ID: 21001-25999)")
-    print("   ├─ 湊友希那 (21001-22000)")
-    print("   ├─ 氷川纱夜 (22001-23000)")
-    print("   ├─ 今井莉莎 (23001-24000)")
-    print("   ├─ 宇田川亚子 (24001-25000)")
-    print("   └─ 白金燐子 (25001-25999)")
-    
-    print("\n6. Morfonica (ID: 26001-30999)")
-    print("   ├─ 仓田真白(26001-27000)")
-    print("   ├─ 桐谷透子(27001-28000)")
-    print("   ├─ 广町七深 (28001-29000)")
-    print("   ├─ 二叶筑紫 (29001-30000)")
-    print("   └─ 八潮瑠唯 (30001-30999)")
-    
-    print("\n7. RAISE A SUILEN (ID: 31001-35999)")
-    print("   ├─ Chu2 (31001-32000)")
-    print("   ├─ LOCK (32001-33000)")
-    print("   ├─ LAYER (33001-34000)")
-    print("   ├─ PAREO (34001-35000)")
-    print("   └─ MASKING (35001-35999)")
-    
-    print("\n8. MyGO!!!!! (ID: 36001-40999)")
-    print("   ├─ 高松灯 (36001-37000)")
-    print("   ├─ 千早爱音(37001-38000)")
-    print("   ├─ 要乐奈 (38001-39000)")
-    print("   ├─ 长崎素世 (39001-40000)")
-    print("   └─ 椎名立希 (40001-40999)")
+    registry = get_character_registry()
+    for band in registry.bands:
+        members = registry.characters_of_band(band['id'])
+        if not members:
+            continue
+        start, end = registry.band_range(band['id'])
+        print(f"\n{band['id']}. {band['short_name']} (ID: {start}-{end})")
+        for char in members:
+            prefix = "└─" if char is members[-1] else "├─"
+            print(f"   {prefix} {char['display_name']} ({char['card_range'][0]}-{char['card_range'][1]})")
     
     print("\n=== 使用说明 ===")
     print("1. 选择下载方式：")
@@ -925,57 +722,11 @@ def show_about():
 
 def get_character_info(member_id):
     """获取角色详细信息"""
-    character_info = {
-        # Poppin'Party
-        1: {"name": "户山香澄", "band": "Poppin'Party", "range": (1001, 2000)},
-        2: {"name": "花园多惠", "band": "Poppin'Party", "range": (2001, 3000)},
-        3: {"name": "牛込里美", "band": "Poppin'Party", "range": (3001, 4000)},
-        4: {"name": "山吹沙绫", "band": "Poppin'Party", "range": (4001, 5000)},
-        5: {"name": "市谷有咲", "band": "Poppin'Party", "range": (5001, 5999)},
-        # Afterglow
-        6: {"name": "美竹兰", "band": "Afterglow", "range": (6001, 7000)},
-        7: {"name": "青叶摩卡", "band": "Afterglow", "range": (7001, 8000)},
-        8: {"name": "上原绯玛丽", "band": "Afterglow", "range": (8001, 9000)},
-        9: {"name": "宇田川巴", "band": "Afterglow", "range": (9001, 10000)},
-        10: {"name": "羽泽鸫", "band": "Afterglow", "range": (10001, 10999)},
-        # Hello Happy World
-        11: {"name": "弦卷心", "band": "Hello Happy World", "range": (11001, 12000)},
-        12: {"name": "濑田薰", "band": "Hello Happy World", "range": (12001, 13000)},
-        13: {"name": "北泽育美", "band": "Hello Happy World", "range": (13001, 14000)},
-        14: {"name": "松原花音", "band": "Hello Happy World", "range": (14001, 15000)},
-        15: {"name": "奥泽美咲", "band": "Hello Happy World", "range": (15001, 15999)},
-        # Pastel*Palettes
-        16: {"name": "丸山彩", "band": "Pastel*Palettes", "range": (16001, 17000)},
-        17: {"name": "冰川日菜", "band": "Pastel*Palettes", "range": (17001, 18000)},
-        18: {"name": "白鹭千圣", "band": "Pastel*Palettes", "range": (18001, 19000)},
-        19: {"name": "大和麻弥", "band": "Pastel*Palettes", "range": (19001, 20000)},
-        20: {"name": "若宫伊芙", "band": "Pastel*Palettes", "range": (20001, 20999)},
-        # Roselia
-        21: {"name": "湊友希那", "band": "Roselia", "range": (21001, 22000)},
-        22: {"name": "氷川纱夜", "band": "Roselia", "range": (22001, 23000)},
-        23: {"name": "今井莉莎", "band": "Roselia", "range": (23001, 24000)},
-        24: {"name": "宇田川亚子", "band": "Roselia", "range": (24001, 25000)},
-        25: {"name": "白金燐子", "band": "Roselia", "range": (25001, 25999)},
-        # Morfonica
-        26: {"name": "仓田真白", "band": "Morfonica", "range": (26001, 27000)},
-        27: {"name": "桐谷透子", "band": "Morfonica", "range": (27001, 28000)},
-        28: {"name": "广町七深", "band": "Morfonica", "range": (28001, 29000)},
-        29: {"name": "二叶筑紫", "band": "Morfonica", "range": (29001, 30000)},
-        30: {"name": "八潮瑠唯", "band": "Morfonica", "range": (30001, 30999)},
-        # RAISE A SUILEN
-        31: {"name": "Layer", "band": "RAISE A SUILEN", "range": (31001, 32000)},
-        32: {"name": "Lock", "band": "RAISE A SUILEN", "range": (32001, 33000)},
-        33: {"name": "Masking", "band": "RAISE A SUILEN", "range": (33001, 34000)},
-        34: {"name": "Pareo", "band": "RAISE A SUILEN", "range": (34001, 35000)},
-        35: {"name": "Chu2", "band": "RAISE A SUILEN", "range": (35001, 35999)},
-        # MyGO!!!!!
-        36: {"name": "高松灯", "band": "MyGO!!!!!", "range": (36001, 37000)},
-        37: {"name": "千早爱音", "band": "MyGO!!!!!", "range": (37001, 38000)},
-        38: {"name": "要乐奈", "band": "MyGO!!!!!", "range": (38001, 39000)},
-        39: {"name": "长崎素世", "band": "MyGO!!!!!", "range": (39001, 40000)},
-        40: {"name": "椎名立希", "band": "MyGO!!!!!", "range": (40001, 40999)}
-    }
-    return character_info.get(member_id)
+    registry = get_character_registry()
+    char = registry.character(member_id)
+    if char is None:
+        return None
+    return {"name": char['display_name'], "band": registry.band(char['band_id'])['short_name'], "range": char['card_range']}
 
 def show_selected_characters(member_ids):
     """显示选中的角色信息"""
@@ -1023,6 +774,7 @@ def show_startup_info():
     print("2. 支持断点续传功能")
     print("3. 可自定义下载速度")
     print("4. 支持多种下载方式选择")
+    print("5. 支持并发扫描，可自定义并发数")
     print("\n【操作说明】")
     print("- Ctrl+C: 保存进度并退出")
     print("- 回车键: 手动跳转到下一个角色")
@@ -1056,14 +808,14 @@ def main():
             
             if choice == "1":
                 print("\n=== 组合列表 ===")
-                print("1. Poppin'Party (ID: 1001-5999)")
-                print("2. Afterglow (ID: 6001-10999)")
-                print("3. Hello Happy World (ID: 11001-15999)")
-                print("4. Pastel*Palettes (ID: 16001-20999)")
-                print("5. Roselia (ID: 21001-25999)")
-                print("6. Morfonica (ID: 26001-30999)")
-                print("7. RAISE A SUILEN (ID: 31001-35999)")
-                print("8. MyGO!!!!! (ID: 36001-40999)")
+                registry = get_character_registry()
+                group_ranges = {
+                    band['id']: registry.band_range(band['id'])
+                    for band in registry.bands
+                    if registry.band_range(band['id'])
+                }
+                for group_id, (start, end) in group_ranges.items():
+                    print(f"{group_id}. {registry.band(group_id)['short_name']} (ID: {start}-{end})")
                 
                 print("\n请输入组合编号，支持以下格式：")
                 print("- 单个编号：1")
@@ -1073,18 +825,6 @@ def main():
                 group_choice = input("\n请选择要下载的组合: ").strip()
                 group_ids = parse_selection(group_choice)
                 
-                # 根据组合编号设置ID范围
-                group_ranges = {
-                    1: (1001, 5999),    # Poppin'Party
-                    2: (6001, 10999),   # Afterglow
-                    3: (11001, 15999),  # Hello Happy World
-                    4: (16001, 20999),  # Pastel*Palettes
-                    5: (21001, 25999),  # Roselia
-                    6: (26001, 30999),  # Morfonica
-                    7: (31001, 35999),  # RAISE A SUILEN
-                    8: (36001, 40999)   # MyGO!!!!!
-                }
-                
                 if not group_ids:
                     print("未选择有效的组合，程序退出")
                     return
@@ -1105,69 +845,15 @@ def main():
                 
             elif choice == "2":
                 print("\n=== 人物列表 ===")
-                # Poppin'Party
-                print("\n--- Poppin'Party ---")
-                print("1.  户山香澄 (1001-2000)")
-                print("2.  花园多惠 (2001-3000)")
-                print("3.  牛込里美 (3001-4000)")
-                print("4.  山吹沙绫 (4001-5000)")
-                print("5.  市谷有咲 (5001-5999)")
-                
-                # Afterglow
-                print("\n--- Afterglow ---")
-                print("6.  美竹兰   (6001-7000)")
-                print("7.  青叶摩卡 (7001-8000)")
-                print("8.  上原绯玛丽 (8001-9000)")
-                print("9.  宇田川巴 (9001-10000)")
-                print("10. 羽泽鸫   (10001-10999)")
-                
-                # Hello Happy World
-                print("\n--- Hello Happy World ---")
-                print("11. 弦卷心   (11001-12000)")
-                print("12. 濑田薰   (12001-13000)")
-                print("13. 北泽育美 (13001-14000)")
-                print("14. 松原花音 (14001-15000)")
-                print("15. 奥泽美咲 (15001-15999)")
-                
-                # Pastel*Palettes
-                print("\n--- Pastel*Palettes ---")
-                print("16. 丸山彩   (16001-17000)")
-                print("17. 冰川日菜 (17001-18000)")
-                print("18. 白鹭千圣 (18001-19000)")
-                print("19. 大和麻弥 (19001-20000)")
-                print("20. 若宫伊芙 (20001-20999)")
-                
-                # Roselia
-                print("\n--- Roselia ---")
-                print("21. 湊友希那 (21001-22000)")
-                print("22. 氷川纱夜 (22001-23000)")
-                print("23. 今井莉莎 (23001-24000)")
-                print("24. 宇田川亚子 (24001-25000)")
-                print("25. 白金燐子 (25001-25999)")
-                
-                # Morfonica
-                print("\n--- Morfonica ---")
-                print("26. 仓田真白 (26001-27000)")
-                print("27. 桐谷透子 (27001-28000)")
-                print("28. 广町七深 (28001-29000)")
-                print("29. 二叶筑紫 (29001-30000)")
-                print("30. 八潮瑠唯 (30001-30999)")
-                
-                # RAISE A SUILEN
-                print("\n--- RAISE A SUILEN ---")
-                print("31. Layer   (31001-32000)")
-                print("32. Lock    (32001-33000)")
-                print("33. Masking (33001-34000)")
-                print("34. Pareo   (34001-35000)")
-                print("35. Chu2    (35001-35999)")
-                
-                # MyGO!!!!!
-                print("\n--- MyGO!!!!! ---")
-                print("36. 高松灯   (36001-37000)")
-                print("37. 千早爱音 (37001-38000)")
-                print("38. 要乐奈   (38001-39000)")
-                print("39. 长崎素世 (39001-40000)")
-                print("40. 椎名立希 (40001-40999)")
+                registry = get_character_registry()
+                for band in registry.bands:
+                    members = registry.characters_of_band(band['id'])
+                    if not members:
+                        continue
+                    print(f"\n--- {band['short_name']} ---")
+                    for char in members:
+                        start, end = char['card_range']
+                        print(f"{str(char['id']) + '.':<3} {char['display_name']} ({start}-{end})")
                 
                 print("\n请输入人物编号，支持以下格式：")
                 print("- 单个编号：1")
@@ -1178,7 +864,7 @@ def main():
                 member_ids = parse_selection(member_choice)
                 
                 # 验证选择的ID是否有效
-                valid_member_ids = [id for id in member_ids if get_character_info(id)]
+                valid_member_ids = [id for id in member_ids if registry.character(id)]
                 
                 if not valid_member_ids:
                     print("\n⚠️ 错误：未选择有效的人物，程序退出")
@@ -1188,10 +874,8 @@ def main():
                 show_selected_characters(valid_member_ids)
                 
                 # 计算总卡片数量
-                total_cards = sum(
-                    get_character_info(id)["range"][1] - get_character_info(id)["range"][0] + 1
-                    for id in valid_member_ids
-                )
+                ranges = [registry.character(id)['card_range'] for id in valid_member_ids]
+                total_cards = sum(end - start + 1 for start, end in ranges)
                 
                 print(f"\n总计选择了 {len(valid_member_ids)} 名角色，预计包含 {total_cards} 张卡面")
                 confirm = input("\n确认下载这些角色的卡面吗？(y/n): ").lower().strip()
@@ -1200,8 +884,8 @@ def main():
                     return
                 
                 # 获取下载范围
-                start_id = min(get_character_info(id)["range"][0] for id in valid_member_ids)
-                end_id = max(get_character_info(id)["range"][1] for id in valid_member_ids)
+                start_id = min(start for start, _ in ranges)
+                end_id = max(end for _, end in ranges)
                 
                 # 更新member_ids为有效的ID列表
                 member_ids = valid_member_ids
@@ -1250,11 +934,25 @@ def main():
             except ValueError:
                 print("速度设置无效，使用默认值1.0")
             
+            # 增量模式
+            incremental = input("仅下载新卡（只探测每个角色已知最新卡牌之后的ID）？(y/n，默认n): ").lower().strip()
+            scraper.incremental = incremental == 'y'
+            
+            # 设置并发数
+            try:
+                concurrency = int(input("并发数 (1-16，默认4): ").strip() or "4")
+                scraper.concurrency = max(1, min(16, concurrency))
+            except ValueError:
+                print("并发数设置无效，使用默认值4")
+                scraper.concurrency = 4
+            
             print(f"\n=== 配置信息 ===")
             print(f"起始ID: {start_id}")
             print(f"结束ID: {end_id}")
             print(f"保存目录: {save_dir}")
             print(f"下载速度: {scraper.download_speed}x")
+            print(f"并发数: {scraper.concurrency}")
+            print(f"增量模式: {'是' if scraper.incremental else '否'}")
             
             try:
                 scraper.run()
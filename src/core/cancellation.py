@@ -0,0 +1,60 @@
+import threading
+from contextlib import contextmanager
+
+class DownloadCancelled(Exception):
+    """下载任务被取消"""
+    pass
+
+class CancellationToken:
+    """协作式取消标记
+
+    下载循环在每个卡片、每个数据块之间检查标记；正在进行中的响应可以通过
+    track() 登记，取消时会被立即关闭，使阻塞中的读取尽快返回。
+    可在多个线程间共享。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._resources = set()
+
+    def cancel(self):
+        """请求取消，并关闭所有登记中的响应"""
+        self._event.set()
+        with self._lock:
+            resources = list(self._resources)
+            self._resources.clear()
+        for resource in resources:
+            try:
+                resource.close()
+            except Exception:
+                pass
+
+    def is_cancelled(self):
+        """是否已请求取消"""
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """已请求取消时抛出 DownloadCancelled"""
+        if self._event.is_set():
+            raise DownloadCancelled()
+
+    def wait(self, timeout=None):
+        """等待取消请求，在超时前被取消时返回 True"""
+        return self._event.wait(timeout)
+
+    @contextmanager
+    def track(self, resource):
+        """在 with 块内登记一个可关闭的资源，取消时会被关闭"""
+        with self._lock:
+            cancelled = self._event.is_set()
+            if not cancelled:
+                self._resources.add(resource)
+        if cancelled:
+            resource.close()
+            raise DownloadCancelled()
+        try:
+            yield resource
+        finally:
+            with self._lock:
+                self._resources.discard(resource)
@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+
+from src.utils.id_set import IdSet
+
+# 计入下载成功的结果
+SUCCESS_OUTCOMES = ("complete", "normal_only", "trained_only")
+
+class CheckpointJournal:
+    """只追加写入的下载进度日志（JSON Lines）
+
+    第一行是某一时刻的完整快照，之后每处理完一个卡牌ID追加一行结果，
+    每行写入后立即 flush，因此进程崩溃或被信号中断时最多丢失正在写的那一行，
+    读取时忽略不完整的末行。追加的行数达到 compact_every 后，
+    将当前状态写成新的快照，写入临时文件后用 os.replace 原子替换。
+    只应在一个线程中写入。
+    """
+
+    def __init__(self, path, compact_every=None, legacy_path=None):
+        self.path = path
+        self.compact_every = compact_every or 1000
+        self.legacy_path = legacy_path  # 旧版一次性写入的 last_state.json
+        self.file = None
+        self.pending = 0  # 上次快照之后追加的行数
+
+    def load(self):
+        """重放日志得到上次的状态，没有记录或无法读取时返回 None"""
+        state = None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 中断时未写完的末行
+                        break
+                    if entry.get("type") == "snapshot":
+                        state = self._state_from_snapshot(entry)
+                    elif state is not None:
+                        self._apply(state, entry)
+        except OSError:
+            return self._load_legacy()
+        except (KeyError, TypeError, ValueError) as e:
+            logging.warning(f"读取下载进度失败: {e}")
+            return None
+        return state
+
+    def _load_legacy(self):
+        """读取旧版的 last_state.json"""
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return None
+        try:
+            with open(self.legacy_path, 'r') as f:
+                return self._state_from_snapshot(json.load(f))
+        except (OSError, KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _state_from_snapshot(snapshot):
+        """将快照转换为内存中的状态"""
+        stats = dict(snapshot["stats"])
+        stats["nonexistent"] = IdSet.from_json(stats.get("nonexistent"))
+        return {
+            "start_id": snapshot.get("start_id"),
+            "end_id": snapshot.get("end_id"),
+            "last_id": snapshot["last_id"],
+            "stats": stats,
+            "successful_ids": IdSet.from_json(snapshot["successful_ids"]),
+            "card_servers": {int(card_id): server for card_id, server in snapshot.get("card_servers", {}).items()}
+        }
+
+    @staticmethod
+    def _apply(state, entry):
+        """将一行记录应用到状态上"""
+        if entry["type"] == "card":
+            card_id, outcome = entry["id"], entry.get("outcome")
+            if outcome == "nonexistent":
+                state["stats"]["nonexistent"].add(card_id)
+            elif outcome is not None:
+                state["stats"][outcome] += 1
+                if outcome in SUCCESS_OUTCOMES:
+                    state["successful_ids"].add(card_id)
+                    state["card_servers"][card_id] = entry.get("server")
+            state["last_id"] = max(state["last_id"], card_id + 1)
+        elif entry["type"] == "position":
+            state["last_id"] = entry["last_id"]
+
+    def record_card(self, card_id, outcome, server=None):
+        """追加一个卡牌ID的处理结果"""
+        entry = {"type": "card", "id": card_id, "outcome": outcome}
+        if server is not None:
+            entry["server"] = server
+        self._append(entry)
+
+    def record_position(self, last_id):
+        """追加下一次应从哪个ID继续，用于跳过整段ID时"""
+        self._append({"type": "position", "last_id": last_id})
+
+    def should_compact(self):
+        """追加的行数是否已达到压缩阈值"""
+        return self.pending >= self.compact_every
+
+    def _append(self, entry):
+        """追加一行并 flush"""
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.pending += 1
+
+    def compact(self, state):
+        """将完整状态原子地写成只有一行快照的新日志"""
+        snapshot = {
+            "type": "snapshot",
+            "start_id": state["start_id"],
+            "end_id": state["end_id"],
+            "last_id": state["last_id"],
+            "stats": dict(state["stats"], nonexistent=state["stats"]["nonexistent"].to_json()),
+            "successful_ids": state["successful_ids"].to_json(),
+            "card_servers": state.get("card_servers", {})
+        }
+        self.close()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.pending = 0
+        self._remove_legacy()
+
+    def clear(self):
+        """删除日志，下载全部完成或放弃上次进度时调用"""
+        self.close()
+        self.pending = 0
+        for path in (self.path, self.path + '.tmp'):
+            if os.path.exists(path):
+                os.remove(path)
+        self._remove_legacy()
+
+    def _remove_legacy(self):
+        """删除旧版的状态文件"""
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            try:
+                os.remove(self.legacy_path)
+            except OSError:
+                pass
+
+    def close(self):
+        """关闭日志文件"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,52 @@
+import json
+import os
+import threading
+
+# 项目根目录下的配置文件
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'config', 'config.json')
+
+# 下载相关配置的默认值
+DEFAULT_DOWNLOAD_CONFIG = {
+    "default_speed": 1.0,
+    "max_speed": 5.0,
+    "min_speed": 0.1,
+    "timeout": 10,
+    "max_connections": 100,       # 全局最大连接数
+    "connections_per_host": 32,   # 单个主机的最大连接数
+    "absent_ttl_days": 7,         # 不存在的卡牌ID在索引中的有效天数
+    "character_workers": 4,       # 图形界面中同时下载的角色数
+    "max_request_rate": 30,       # 自适应限速的最高请求速率（次/秒）
+    "retry_max_attempts": 5,      # 单个请求的最大尝试次数
+    "retry_attempts_by_kind": {}, # 按错误类型覆盖最大尝试次数，如 {"throttled": 8}
+    "retry_base_delay": 0.5,      # 重试退避的基础等待时间（秒）
+    "retry_max_delay": 30,        # 重试退避的最长等待时间（秒）
+    "retry_budget": 500,          # 每次运行最多允许的重试次数
+    "pool_connections": 10,       # 会话缓存连接池的主机数
+    "pool_maxsize": 32,           # 每个主机可复用的连接数，应不小于并发线程数
+    "connect_retries": 2,         # 建立连接失败时由urllib3直接重试的次数
+    "frontier_window": 5,         # 越过成员已知最新卡牌后连续多少个ID不存在即停止探测
+    "probe_batch": 50,            # 已知最新卡牌之前每批同时探测存在性的卡牌ID数
+    "checkpoint_interval": 1000   # 下载进度日志每追加多少条记录压缩一次
+}
+
+_config = None
+_config_lock = threading.Lock()
+
+def load_config():
+    """加载配置文件，只读取一次，读取失败时返回空配置"""
+    global _config
+    with _config_lock:
+        if _config is None:
+            try:
+                with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+                    _config = json.load(f)
+            except Exception as e:
+                print(f"加载配置文件失败: {e}")
+                _config = {}
+        return _config
+
+def get_download_config():
+    """获取下载配置，缺失的项使用默认值"""
+    download_config = dict(DEFAULT_DOWNLOAD_CONFIG)
+    download_config.update(load_config().get("download", {}))
+    return download_config
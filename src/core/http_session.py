@@ -0,0 +1,159 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.core.config import get_download_config
+
+# 会话cookie保存在项目根目录的 data/cookies.json 中，下次启动时直接复用
+COOKIE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'cookies.json')
+
+# 获取cookie时访问的页面
+WARMUP_URLS = ['https://bestdori.com', 'https://bestdori.com/info/cards']
+
+# 两次预热之间的最短间隔（秒），避免多个线程同时失败时重复预热
+WARMUP_COOLDOWN = 60
+
+# 通用请求头，AsyncTransport 也使用这组请求头
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36 Edg/133.0.0.0',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6,zh-TW;q=0.5',
+    'Connection': 'keep-alive',
+    'Referer': 'https://bestdori.com/info/cards',
+    'Cache-Control': 'no-cache'
+}
+
+def create_session(headers=None, pool_connections=None, pool_maxsize=None, connect_retries=None):
+    """创建带连接池的会话
+
+    pool_connections 为缓存连接池的主机数，pool_maxsize 为每个主机可复用的连接数，
+    应不小于同时发请求的线程数。urllib3 只负责重试建立连接失败的请求，
+    状态码和读取错误的重试由 RetryPolicy 统一处理，避免两层重试叠加。
+    """
+    config = get_download_config()
+    retry = Retry(
+        total=None,
+        connect=config["connect_retries"] if connect_retries is None else connect_retries,
+        read=0,
+        status=0,
+        redirect=5,
+        backoff_factor=0.3,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections or config["pool_connections"],
+        pool_maxsize=pool_maxsize or config["pool_maxsize"],
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    if headers:
+        session.headers.update(headers)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def load_cookies(session, path=COOKIE_PATH):
+    """从文件中读取未过期的cookie，返回读取到的数量"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cookies = json.load(f)
+    except (OSError, ValueError):
+        return 0
+
+    now = time.time()
+    count = 0
+    for cookie in cookies:
+        if cookie.get('expires') is not None and cookie['expires'] <= now:
+            continue
+        session.cookies.set(
+            cookie['name'], cookie['value'],
+            domain=cookie.get('domain', ''), path=cookie.get('path', '/'),
+            expires=cookie.get('expires'), secure=cookie.get('secure', False)
+        )
+        count += 1
+    return count
+
+def save_cookies(session, path=COOKIE_PATH):
+    """将未过期的cookie写入文件"""
+    now = time.time()
+    cookies = [
+        {
+            'name': cookie.name,
+            'value': cookie.value,
+            'domain': cookie.domain,
+            'path': cookie.path,
+            'expires': cookie.expires,
+            'secure': cookie.secure
+        }
+        for cookie in session.cookies
+        if cookie.expires is None or cookie.expires > now
+    ]
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cookies, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logging.debug(f"保存cookie失败: {e}")
+
+def looks_cookie_related(status):
+    """判断失败的响应是否可能由缺少cookie引起
+
+    只有401/403才重新获取cookie；普通的错误页面或CDN页面即使返回了网页也不视为cookie问题
+    """
+    return status in (401, 403)
+
+_warmup_lock = threading.Lock()
+_last_warmup = None
+
+def warm_up(session, force=False):
+    """访问网站页面以获取cookie，并保存到文件
+
+    多个线程同时调用时只预热一次，WARMUP_COOLDOWN 秒内不会重复预热。
+    返回是否进行了预热。
+    """
+    global _last_warmup
+    with _warmup_lock:
+        if not force and _last_warmup is not None and time.monotonic() - _last_warmup < WARMUP_COOLDOWN:
+            return False
+        _last_warmup = time.monotonic()
+        try:
+            for url in WARMUP_URLS:
+                session.get(url, timeout=10)
+            save_cookies(session)
+            logging.info("会话初始化成功")
+        except Exception as e:
+            logging.error(f"会话初始化失败: {str(e)}")
+        return True
+
+def _close_session(session):
+    """退出时保存cookie并关闭会话"""
+    save_cookies(session)
+    session.close()
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """获取进程内共享的会话，爬虫、图形界面和图标下载共用同一个连接池
+
+    创建时读取上次保存的cookie，进程退出时再写回文件。
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+            count = load_cookies(_session)
+            if count:
+                logging.debug(f"已读取 {count} 个cookie")
+            atexit.register(_close_session, _session)
+        return _session
@@ -0,0 +1,193 @@
+import json
+import os
+import re
+from collections import namedtuple
+
+from src.utils.png_utils import CARD_SIZE, PNG_HEADER_SIZE, PNG_TRAILER, read_png_size, is_png_complete
+
+CHUNK_SIZE = 64 * 1024
+
+# 未下载完成的数据保存在 <文件名>.part 中，对应的 ETag/Last-Modified 保存在 <文件名>.part.json 中
+PART_SUFFIX = '.part'
+META_SUFFIX = '.part.json'
+
+_CONTENT_RANGE_START = re.compile(r'bytes\s+(\d+)-')
+
+# fetch_image 的结果：状态码、是否得到有效文件、响应头
+FetchResult = namedtuple('FetchResult', ['status', 'success', 'headers'])
+
+def load_partial(save_path, url):
+    """读取可续传的部分文件，返回 (已下载字节数, 元数据)
+
+    只有记录了 ETag 或 Last-Modified 且来自同一URL的部分文件才能续传，
+    其余情况会清理掉残留文件并返回 (0, None)。
+    """
+    part_path = save_path + PART_SUFFIX
+    meta_path = save_path + META_SUFFIX
+    if not os.path.exists(part_path):
+        if os.path.exists(meta_path):
+            discard_partial(save_path)
+        return 0, None
+
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        offset = os.path.getsize(part_path)
+    except (OSError, ValueError):
+        discard_partial(save_path)
+        return 0, None
+
+    if meta.get('url') != url or not (meta.get('etag') or meta.get('last_modified')) or offset == 0:
+        discard_partial(save_path)
+        return 0, None
+    return offset, meta
+
+def resume_headers(save_path, url):
+    """根据已有的部分文件生成续传请求头，返回 (起始偏移, 请求头)"""
+    offset, meta = load_partial(save_path, url)
+    if not offset:
+        return 0, {}
+    # If-Range 保证资源发生变化时服务器返回完整内容而不是错位的片段
+    return offset, {
+        'Range': f'bytes={offset}-',
+        'If-Range': meta.get('etag') or meta['last_modified']
+    }
+
+def discard_partial(save_path):
+    """删除部分文件及其元数据"""
+    for path in (save_path + PART_SUFFIX, save_path + META_SUFFIX):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _save_partial_meta(save_path, url, headers):
+    """记录部分文件对应的资源版本，没有可用的校验值时返回 False"""
+    meta = {
+        'url': url,
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified')
+    }
+    if not (meta['etag'] or meta['last_modified']):
+        return False
+    with open(save_path + META_SUFFIX, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return True
+
+def _range_start(response):
+    """解析206响应的 Content-Range 起始位置"""
+    match = _CONTENT_RANGE_START.match(response.headers.get('Content-Range', ''))
+    return int(match.group(1)) if match else None
+
+def stream_image_to_file(response, save_path, expected_size=CARD_SIZE, min_bytes=100000, chunk_size=CHUNK_SIZE,
+                         cancel_token=None, offset=0, url=None):
+    """将响应内容分块写入部分文件，校验通过后原子替换到目标路径
+
+    读取到前24字节时即根据PNG的IHDR头检查分辨率，不符合时立即中止；
+    结束时检查末尾的IEND块以排除截断的文件。整个过程内存中最多只保留一个数据块。
+    offset 大于0且响应为206时，内容追加到已有的部分文件之后；服务器忽略Range返回200时从头写入。
+    校验失败返回 False 并删除部分文件；网络异常或取消时保留部分文件及其
+    ETag/Last-Modified 以便下次续传，异常继续向上抛出。响应总会被关闭。
+    传入 cancel_token 时每个数据块之间都会检查取消请求，被取消时抛出 DownloadCancelled。
+    url 为请求时的URL，记录在续传信息中（重定向后 response.url 会不同），未指定时使用 response.url。
+    """
+    part_path = save_path + PART_SUFFIX
+    header = b''
+    tail = b''
+    written = 0
+    keep_partial = False
+    try:
+        if response.status_code == 206:
+            # 只接受从部分文件末尾开始的片段
+            if not offset or _range_start(response) != offset:
+                return False
+            # 续传：文件头和末尾从已有的部分文件中读取
+            mode = 'ab'
+            with open(part_path, 'rb') as f:
+                header = f.read(PNG_HEADER_SIZE)
+                f.seek(max(offset - len(PNG_TRAILER), 0))
+                tail = f.read()
+            written = offset
+            keep_partial = True
+        else:
+            mode = 'wb'
+            keep_partial = _save_partial_meta(save_path, url or response.url, response.headers)
+
+        if len(header) == PNG_HEADER_SIZE and read_png_size(header) != tuple(expected_size):
+            keep_partial = False
+            return False
+
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                if not chunk:
+                    continue
+
+                if len(header) < PNG_HEADER_SIZE:
+                    header += chunk[:PNG_HEADER_SIZE - len(header)]
+                    if len(header) == PNG_HEADER_SIZE and read_png_size(header) != tuple(expected_size):
+                        keep_partial = False
+                        return False
+
+                f.write(chunk)
+                written += len(chunk)
+                tail = (tail + chunk)[-len(PNG_TRAILER):]
+
+        # 响应可能因取消被关闭而提前结束
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+
+        # 数据已完整接收，无论校验结果如何都不再续传
+        keep_partial = False
+        if len(header) < PNG_HEADER_SIZE or written < min_bytes or not is_png_complete(tail):
+            return False
+
+        os.replace(part_path, save_path)
+        return True
+    finally:
+        response.close()
+        if not keep_partial:
+            discard_partial(save_path)
+
+def fetch_image(session, url, save_path, headers=None, timeout=10, cancel_token=None, validators=None, **kwargs):
+    """下载一张图片，存在可续传的部分文件时发送Range请求
+
+    返回 FetchResult。服务器忽略Range返回200时自动改为完整下载，
+    返回416时丢弃部分文件后重新请求。传入 validators（本地文件的 etag/last_modified）时
+    发送条件请求，服务器返回304表示本地文件仍是最新的，结果视为成功且不修改文件。
+    传入 cancel_token 时响应会登记到取消标记上。其余参数传给 stream_image_to_file。
+    """
+    request_headers = dict(headers or {})
+    if validators:
+        offset = 0
+        if validators.get('etag'):
+            request_headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            request_headers['If-Modified-Since'] = validators['last_modified']
+    else:
+        offset, range_headers = resume_headers(save_path, url)
+        request_headers.update(range_headers)
+
+    response = session.get(url, headers=request_headers, timeout=timeout, stream=True)
+    if response.status_code == 416 and offset:
+        response.close()
+        discard_partial(save_path)
+        offset = 0
+        response = session.get(url, headers=headers, timeout=timeout, stream=True)
+
+    if response.status_code == 304 and validators:
+        response.close()
+        return FetchResult(304, True, response.headers)
+
+    if response.status_code not in (200, 206) or not response.headers.get('content-type', 'image/').startswith('image/'):
+        response.close()
+        return FetchResult(response.status_code, False, response.headers)
+
+    if cancel_token is None:
+        success = stream_image_to_file(response, save_path, offset=offset, url=url, **kwargs)
+    else:
+        with cancel_token.track(response):
+            success = stream_image_to_file(response, save_path, offset=offset, cancel_token=cancel_token,
+                                           url=url, **kwargs)
+    return FetchResult(response.status_code, success, response.headers)
@@ -0,0 +1,39 @@
+import threading
+from collections import deque
+
+class ProgressChannel:
+    """工作线程到界面线程的进度通道
+
+    工作线程调用 post() 放入结构化事件、调用 set_progress() 更新整体进度，
+    不直接触发界面更新；界面线程用定时器周期性调用 drain() 一次取走全部事件批量处理。
+    整体进度只保留最新值，两次取走之间的多次更新合并为一次。
+    可在多个线程间共享。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = deque()
+        self.progress = None
+
+    def post(self, kind, **data):
+        """放入一个事件，kind 为事件类型，其余参数作为事件内容"""
+        data['kind'] = kind
+        with self.lock:
+            self.events.append(data)
+
+    def message(self, text, success=None):
+        """放入一条日志消息，success 为 True/False 时分别以成功/失败颜色显示"""
+        self.post('message', text=text, success=success)
+
+    def set_progress(self, value):
+        """更新整体进度（0-100），只保留最新值"""
+        with self.lock:
+            self.progress = value
+
+    def drain(self):
+        """取走上次调用之后的全部事件，返回 (整体进度, 事件列表)，进度没有更新时为 None"""
+        with self.lock:
+            events = list(self.events)
+            self.events.clear()
+            progress, self.progress = self.progress, None
+        return progress, events
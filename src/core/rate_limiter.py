@@ -0,0 +1,98 @@
+import threading
+import time
+
+import requests
+
+from src.core.config import get_download_config
+
+# 下载速度倍率为1.0时对应的请求速率（次/秒），与原先每次请求前平均等待约0.35秒相当
+REQUESTS_PER_SPEED = 3.0
+
+# 表示服务器过载或限流的状态码
+THROTTLE_STATUS = {429, 500, 502, 503, 504}
+
+class AdaptiveRateLimiter:
+    """令牌桶限速器，速率按AIMD（加性增、乘性减）自动调整
+
+    所有工作线程共用一个实例，每次请求前调用 acquire() 取得令牌，
+    同时发出多个请求（如向所有服务器探测）时按请求数取得令牌。
+    响应正常时速率缓慢增加，遇到429/5xx、超时或连接被重置时速率减半，
+    因此吞吐量会稳定在服务器能承受的最高速率附近。可在多个线程间共享。
+    """
+
+    def __init__(self, initial_rate=None, min_rate=None, max_rate=None, increase=0.05, decrease=0.5, cooldown=1.0):
+        config = get_download_config()
+        self.min_rate = min_rate or config["min_speed"] * REQUESTS_PER_SPEED
+        self.max_rate = max_rate or config["max_request_rate"]
+        self.increase = increase    # 每次正常响应增加的速率
+        self.decrease = decrease    # 限流时速率乘以的系数
+        self.cooldown = cooldown    # 两次降速之间的最短间隔（秒），避免并发失败把速率一次降到底
+
+        self.lock = threading.Lock()
+        self.rate = self._clamp(initial_rate or config["default_speed"] * REQUESTS_PER_SPEED)
+        self.tokens = 1.0
+        self.updated_at = time.monotonic()
+        self.last_decrease = 0.0
+
+    def _clamp(self, rate):
+        """将速率限制在允许范围内"""
+        return max(self.min_rate, min(self.max_rate, rate))
+
+    def _refill(self, now):
+        """按经过的时间补充令牌，桶容量为一秒的请求量"""
+        capacity = max(1.0, self.rate)
+        self.tokens = min(capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def set_rate(self, rate):
+        """手动设置当前速率"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = self._clamp(rate)
+
+    def acquire(self, cancel_token=None, cost=1):
+        """取得 cost 个令牌，令牌不足时阻塞等待
+
+        cost 超过桶容量时，等到桶满即可取得，不足的部分记为欠额，由之后的请求等待补足。
+        传入 cancel_token 时等待可以被取消，取消时抛出 DownloadCancelled
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                need = min(float(cost), max(1.0, self.rate))
+                if self.tokens >= need:
+                    self.tokens -= cost
+                    return
+                wait = (need - self.tokens) / self.rate
+            if cancel_token is not None:
+                if cancel_token.wait(wait):
+                    cancel_token.raise_if_cancelled()
+            else:
+                time.sleep(wait)
+
+    def on_response(self, status):
+        """根据响应状态码调整速率，状态码为 None 时不调整"""
+        if status is None:
+            return
+        if status in THROTTLE_STATUS:
+            self._back_off()
+        else:
+            with self.lock:
+                self.rate = self._clamp(self.rate + self.increase)
+
+    def on_error(self, error):
+        """请求出错时调整速率，只有超时和连接错误视为服务器过载"""
+        if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+            self._back_off()
+
+    def _back_off(self):
+        """乘性降速并清空令牌"""
+        with self.lock:
+            now = time.monotonic()
+            if now - self.last_decrease < self.cooldown:
+                return
+            self.last_decrease = now
+            self._refill(now)
+            self.rate = self._clamp(self.rate * self.decrease)
+            self.tokens = 0.0
@@ -0,0 +1,141 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from src.core.config import get_download_config
+
+# 读取超时和连接错误的退避基数较小，服务器端错误和限流的退避基数较大
+DELAY_FACTOR = {
+    "connect_timeout": 1.0,
+    "read_timeout": 0.5,
+    "connection": 0.5,
+    "server_error": 2.0,
+    "throttled": 2.0
+}
+
+SERVER_ERROR_STATUS = {500, 502, 503, 504}
+
+class RetryPolicy:
+    """下载请求的重试策略
+
+    按错误类型区分连接超时、读取超时、连接错误、5xx 和 429，
+    使用带随机抖动的指数退避，429 优先按 Retry-After 等待。
+    最大尝试次数（含第一次请求）由 retry_max_attempts 配置，
+    retry_attempts_by_kind 可以为单个错误类型单独指定。
+    每次运行有一个重试预算，耗尽后不再重试，避免服务器故障时产生大量重试请求。
+    可在多个线程间共享。
+    """
+
+    def __init__(self, max_attempts=None, base_delay=None, max_delay=None, budget=None, attempts_by_kind=None):
+        config = get_download_config()
+        self.max_attempts = max_attempts or config["retry_max_attempts"]
+        self.attempts_by_kind = dict(config["retry_attempts_by_kind"] if attempts_by_kind is None else attempts_by_kind)
+        self.base_delay = base_delay or config["retry_base_delay"]
+        self.max_delay = max_delay or config["retry_max_delay"]
+        self.initial_budget = budget or config["retry_budget"]
+
+        self.lock = threading.Lock()
+        self.budget = self.initial_budget
+
+    def reset(self):
+        """开始新的一次运行时恢复重试预算"""
+        with self.lock:
+            self.budget = self.initial_budget
+
+    @staticmethod
+    def classify_status(status):
+        """根据状态码判断错误类型，不需要重试时返回 None"""
+        if status == 429:
+            return "throttled"
+        if status in SERVER_ERROR_STATUS:
+            return "server_error"
+        return None
+
+    @staticmethod
+    def classify_error(error):
+        """根据异常判断错误类型，不需要重试时返回 None"""
+        # ConnectTimeout 同时是 ConnectionError 的子类，需要先判断
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return "connect_timeout"
+        if isinstance(error, requests.exceptions.ReadTimeout):
+            return "read_timeout"
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+            return "connection"
+        return None
+
+    @staticmethod
+    def parse_retry_after(value):
+        """解析 Retry-After 头，支持秒数和HTTP日期两种格式，无法解析时返回 None"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    def backoff(self, kind, attempt, retry_after=None):
+        """计算第 attempt 次失败后的等待时间（full jitter）"""
+        delay = min(self.max_delay, self.base_delay * DELAY_FACTOR[kind] * (2 ** attempt))
+        delay = random.uniform(0, delay)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def allow_retry(self, kind, attempt, max_attempts=None):
+        """判断第 attempt 次失败后是否还能重试，允许时消耗一次重试预算
+
+        max_attempts 为本次调用指定的尝试次数，优先于配置
+        """
+        limit = max_attempts or self.attempts_by_kind.get(kind, self.max_attempts)
+        if attempt + 1 >= limit:
+            return False
+        with self.lock:
+            if self.budget <= 0:
+                return False
+            self.budget -= 1
+            return True
+
+    def execute(self, request, max_attempts=None, cancel_token=None):
+        """按重试策略执行 request()
+
+        request 返回带有 status 和 headers 的结果（如 FetchResult），或抛出异常。
+        可重试的状态码会在退避后重试，重试次数用完时返回最后一次的结果；
+        可重试的异常在重试次数用完时继续抛出，其余异常立即抛出。
+        传入 cancel_token 时退避等待可以被取消。
+        """
+        attempt = 0
+        while True:
+            try:
+                result = request()
+            except Exception as e:
+                kind = self.classify_error(e)
+                if kind is None or not self.allow_retry(kind, attempt, max_attempts):
+                    raise
+                delay = self.backoff(kind, attempt)
+            else:
+                kind = self.classify_status(result.status)
+                if kind is None:
+                    return result
+                retry_after = self.parse_retry_after(result.headers.get('Retry-After')) if kind == "throttled" else None
+                # 服务器要求等待的时间超过上限时直接放弃
+                if (retry_after is not None and retry_after > self.max_delay) or not self.allow_retry(kind, attempt, max_attempts):
+                    return result
+                delay = self.backoff(kind, attempt, retry_after)
+
+            if cancel_token is not None:
+                if cancel_token.wait(delay):
+                    cancel_token.raise_if_cancelled()
+            else:
+                time.sleep(delay)
+            attempt += 1
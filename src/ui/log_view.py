@@ -0,0 +1,160 @@
+import logging
+import os
+import shutil
+from collections import deque
+from datetime import datetime
+
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QListView, QPushButton, QFileDialog, QMessageBox
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import QColor
+
+# 完整日志保存在项目根目录的 logs 目录中
+LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'logs')
+
+# 界面中最多保留的日志行数
+DEFAULT_CAPACITY = 2000
+
+SUCCESS_COLOR = QColor('green')
+FAILURE_COLOR = QColor('red')
+
+class LogModel(QAbstractListModel):
+    """固定容量的日志模型
+
+    最新的日志在第0行，超过容量时丢弃最旧的行，因此内存和视图开销不随日志数量增长。
+    每行为 (文本, success)，success 为 True/False 时分别以绿色/红色显示。
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self.entries = deque(maxlen=capacity)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.entries):
+            return None
+        text, success = self.entries[index.row()]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return text
+        if role == Qt.ItemDataRole.ForegroundRole and success is not None:
+            return SUCCESS_COLOR if success else FAILURE_COLOR
+        return None
+
+    def add_entries(self, entries):
+        """批量添加日志，按顺序插入到顶部"""
+        entries = list(entries)[-self.capacity:]
+        if not entries:
+            return
+
+        # 先移除超出容量的最旧行
+        overflow = len(self.entries) + len(entries) - self.capacity
+        if overflow > 0:
+            first = len(self.entries) - overflow
+            self.beginRemoveRows(QModelIndex(), first, len(self.entries) - 1)
+            for _ in range(overflow):
+                self.entries.pop()
+            self.endRemoveRows()
+
+        self.beginInsertRows(QModelIndex(), 0, len(entries) - 1)
+        self.entries.extendleft(entries)
+        self.endInsertRows()
+
+    def clear(self):
+        """清空日志"""
+        self.beginResetModel()
+        self.entries.clear()
+        self.endResetModel()
+
+class LogView(QWidget):
+    """下载日志面板
+
+    界面中只保留最近 capacity 行，所有日志同时追加写入 logs 目录下的文件，
+    可通过"保存完整日志"导出。
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, parent=None):
+        super().__init__(parent)
+        self.model = LogModel(capacity, self)
+        self.spill_path = os.path.join(LOGS_DIR, f'download_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
+        self.spill_file = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        # 每行高度相同，视图只需布局可见的行
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.list_view.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
+        layout.addWidget(self.list_view)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        self.save_button = QPushButton("保存完整日志")
+        self.save_button.clicked.connect(self.save_full_log)
+        button_layout.addWidget(self.save_button)
+        layout.addLayout(button_layout)
+
+    def add_entry(self, text, success=None):
+        """添加一条日志"""
+        self.add_entries([(text, success)])
+
+    def add_entries(self, entries):
+        """批量添加日志，多行文本拆成多行显示"""
+        lines = [(line, success) for text, success in entries for line in str(text).splitlines() or ['']]
+        if not lines:
+            return
+        self.write_spill(lines)
+        self.model.add_entries(lines)
+        # 自动滚动到顶部
+        self.list_view.scrollToTop()
+
+    def write_spill(self, lines):
+        """将日志追加写入完整日志文件"""
+        try:
+            if self.spill_file is None:
+                os.makedirs(LOGS_DIR, exist_ok=True)
+                self.spill_file = open(self.spill_path, 'a', encoding='utf-8')
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            for text, success in lines:
+                level = 'INFO' if success is None else ('SUCCESS' if success else 'ERROR')
+                self.spill_file.write(f"{timestamp} - {level} - {text}\n")
+            self.spill_file.flush()
+        except OSError as e:
+            logging.error(f"写入完整日志失败: {e}")
+
+    def close_spill(self):
+        """关闭完整日志文件，不影响界面中的日志，之后再添加日志时会重新打开并继续追加"""
+        if self.spill_file is not None:
+            try:
+                self.spill_file.close()
+            except OSError as e:
+                logging.error(f"关闭完整日志失败: {e}")
+            self.spill_file = None
+
+    def clear(self):
+        """清空界面中的日志，完整日志文件保留"""
+        self.model.clear()
+
+    def save_full_log(self):
+        """将完整日志另存为用户选择的文件"""
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            "保存完整日志",
+            os.path.join(os.path.expanduser("~"), os.path.basename(self.spill_path)),
+            "日志文件 (*.log *.txt)"
+        )
+        if not path:
+            return
+        try:
+            if self.spill_file is not None:
+                self.spill_file.flush()
+            if os.path.exists(self.spill_path):
+                shutil.copyfile(self.spill_path, path)
+            else:
+                open(path, 'w', encoding='utf-8').close()
+        except OSError as e:
+            QMessageBox.warning(self, "保存失败", f"保存完整日志失败: {e}")
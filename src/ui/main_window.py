@@ -13,6 +13,9 @@ from .pages.card_download_page import CardDownloadPage
 from .pages.card_search_page import CardSearchPage
 from .background_manager import BackgroundManager
 
+# 关闭窗口时等待每个后台线程结束的最长时间（毫秒）
+THREAD_WAIT_MS = 3000
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -29,6 +32,9 @@ class MainWindow(QMainWindow):
         # 初始化背景管理器
         self.background_manager = BackgroundManager()
         
+        # 刷新界面时被替换、但后台线程还没有结束的旧页面
+        self.retired_pages = []
+        
         # 创建菜单栏
         self.create_menu_bar()
         
@@ -425,11 +431,9 @@ class MainWindow(QMainWindow):
         self.update()
         
         # 重置所有页面状态
-        # 先移除所有页面
-        self.content_area.removeWidget(self.card_page)
-        self.content_area.removeWidget(self.card_preview_page)
-        self.content_area.removeWidget(self.card_download_page)
-        self.content_area.removeWidget(self.card_search_page)
+        # 先移除所有页面，旧页面在其后台线程结束后才释放
+        for page in (self.card_page, self.card_preview_page, self.card_download_page, self.card_search_page):
+            self.retire_page(page)
         
         # 重新创建页面
         self.card_page = CardPage()
@@ -443,6 +447,40 @@ class MainWindow(QMainWindow):
         self.content_area.addWidget(self.card_download_page)
         self.content_area.addWidget(self.card_search_page)
 
+    def retire_page(self, page):
+        """移除页面并停止其中的后台任务
+
+        QThread 在运行中被销毁会使程序异常退出，因此还有线程在运行的页面先保留引用，
+        所有线程的 finished 信号到达后再释放。
+        """
+        self.content_area.removeWidget(page)
+        if hasattr(page, 'cleanup'):
+            page.cleanup()
+        threads = page.active_threads() if hasattr(page, 'active_threads') else []
+        if not threads:
+            page.deleteLater()
+            return
+        self.retired_pages.append(page)
+        for thread in threads:
+            thread.finished.connect(lambda page=page: self.release_page(page))
+
+    def release_page(self, page):
+        """旧页面的线程全部结束后释放页面"""
+        if page in self.retired_pages and not page.active_threads():
+            self.retired_pages.remove(page)
+            page.deleteLater()
+
+    def closeEvent(self, event):
+        """关闭窗口前停止所有页面的后台任务，并等待线程结束"""
+        pages = [self.card_page, self.card_preview_page, self.card_download_page, self.card_search_page]
+        for page in pages + self.retired_pages:
+            if hasattr(page, 'cleanup'):
+                page.cleanup()
+        for page in pages + self.retired_pages:
+            for thread in page.active_threads() if hasattr(page, 'active_threads') else []:
+                thread.wait(THREAD_WAIT_MS)
+        super().closeEvent(event)
+
     def show_usage_guide(self):
         """显示使用说明"""
         # 获取当前显示的页面
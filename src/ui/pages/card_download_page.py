@@ -1,15 +1,28 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
-                            QLabel, QComboBox, QPushButton, QScrollArea, QFrame,
+                            QLabel, QComboBox, QPushButton, QFrame,
                             QGridLayout, QSpinBox, QFileDialog, QMessageBox, QListWidget,
                             QListWidgetItem, QProgressBar, QMenu, QCheckBox, QToolButton,
                             QWidgetAction, QDialog)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QPoint
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal, QPoint
 from PyQt6.QtGui import QAction, QPixmap
 from src.utils.database import DatabaseManager
+from src.utils.init_database import populate_database
+from src.core.async_transport import get_transport, ProbeFailed
+from src.core.http_session import get_session
+from src.utils.card_index import get_card_index
+from src.utils.card_files import get_card_file_store
+from src.utils.character_registry import get_character_registry
+from src.core.image_stream import fetch_image
+from src.core.cancellation import CancellationToken, DownloadCancelled
+from src.core.progress_channel import ProgressChannel
+from src.ui.log_view import LogView
+from src.core.rate_limiter import AdaptiveRateLimiter, REQUESTS_PER_SPEED
+from src.core.retry_policy import RetryPolicy
+from src.utils.png_utils import check_card_image
+from src.core.config import get_download_config
 import os
-import requests
-from PIL import Image
-from io import BytesIO
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 import logging
 import json
@@ -102,15 +115,36 @@ ABOUT_TEXT = """
 <p>© dx闹着玩的</p>
 """
 
+# 界面从进度通道取走事件的间隔（毫秒）
+PROGRESS_INTERVAL = 100
+
+# 卡片下载结果在日志中的描述
+CARD_OUTCOME_TEXT = {
+    "complete": "完整下载成功 (normal + trained形态)",
+    "normal_only": "仅normal形态下载成功",
+    "trained_only": "仅trained形态下载成功",
+    "failed": "下载失败"
+}
+
 class BestdoriDownloader:
     """Bestdori卡面下载器"""
     
-    def __init__(self, save_dir=None):
+    def __init__(self, save_dir=None, session=None, cancel_token=None, refresh=False, rate_limiter=None, retry_policy=None):
         self.save_dir = save_dir or os.getcwd()
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # 多个下载器可以共用同一个限速器，按服务器的响应情况自动调整请求速率
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        # 多个下载器共用同一个重试策略时共享一次运行的重试预算
+        self.retry_policy = retry_policy or RetryPolicy()
+        # 检查更新模式：已下载的卡面通过条件请求确认是否有新版本
+        self.refresh = refresh
+        # 默认使用进程内共享的会话，复用与服务器之间已建立的连接
+        self.session = session or get_session()
+        # 多个下载器可以共用同一个取消标记，由下载线程统一取消
+        self.cancel_token = cancel_token or CancellationToken()
+        # 存在性检查使用进程内共享的异步请求层
+        self.transport = get_transport()
+        self.card_index = get_card_index()
+        self.file_store = get_card_file_store()
         self.servers = ['jp', 'en', 'tw', 'cn', 'kr']
         self.stats = {
             "complete": 0,     # 完整下载（普通+特训）
@@ -128,97 +162,112 @@ class BestdoriDownloader:
         )
         
     def check_card_exists(self, card_id):
-        """检查卡片是否存在，并验证图片分辨率"""
-        exists = {'normal': False, 'trained': False}
-        server_used = None
-        
-        # 首先尝试检查normal形态（只检查一次）
-        normal_url = f"https://bestdori.com/assets/jp/characters/resourceset/res{str(card_id).zfill(6)}_rip/card_normal.png"
-        try:
-            response = self.session.head(normal_url, timeout=3)
-            if response.status_code == 200 and ('content-length' not in response.headers or int(response.headers.get('content-length', '0')) > 100):
-                # 获取完整图片内容并检查分辨率
-                response = self.session.get(normal_url, timeout=5)
-                if response.status_code == 200 and len(response.content) > 1024:
-                    try:
-                        img = Image.open(BytesIO(response.content))
-                        width, height = img.size
-                        if width == 1334 and height == 1002:
-                            exists['normal'] = True
-                            server_used = 'jp'
-                            logging.info(f"卡片 {card_id} normal形态卡面验证成功 (分辨率: {width}x{height})")
-                        else:
-                            logging.warning(f"卡片 {card_id} normal形态卡面验证失败 (分辨率: {width}x{height})")
-                    except Exception as e:
-                        logging.warning(f"卡片 {card_id} normal形态卡面验证失败: {str(e)}")
-                else:
-                    logging.debug(f"卡片 {card_id} normal形态卡面验证失败: 状态码 {response.status_code} 或内容长度不足")
+        """检查卡片是否存在
+
+        只发送HEAD请求，图片内容的校验在 download_card 下载时一并完成，
+        避免同一张图片被完整传输两次。
+        没有服务器给出确定答复时抛出 ProbeFailed，此时不写入本地索引。
+        """
+        result = self.probe_cards([card_id])[card_id]
+        if isinstance(result, ProbeFailed):
+            raise result
+        return result
+    
+    def probe_cards(self, card_ids):
+        """批量检查多张卡片是否存在，所有ID的探测请求在事件循环中同时发出
+
+        先同时向所有服务器探测normal形态；normal形态存在时trained形态只在同一服务器上检查，
+        不存在时再向所有服务器探测trained形态。
+        返回 {卡片ID: (exists, 服务器)}，无法确定的ID值为 ProbeFailed 实例，不写入本地索引。
+        """
+        results = {}
+        pending = []
+        
+        # 先查询本地索引，命中时不发起任何网络请求
+        for card_id in card_ids:
+            entry = self.card_index.lookup(card_id)
+            if not entry:
+                pending.append(card_id)
+            elif entry['exists']:
+                logging.debug(f"卡片 {card_id} 命中本地索引 (服务器: {entry['server']})")
+                results[card_id] = ({'normal': entry['normal'], 'trained': entry['trained']}, entry['server'])
             else:
-                logging.debug(f"卡片 {card_id} normal形态卡面不存在")
-        except Exception as e:
-            logging.debug(f"检查卡片 {card_id} normal形态出错: {str(e)}")
-        
-        # 如果normal形态不存在，检查trained形态（只检查一次）
-        if not exists['normal']:
-            logging.info(f"卡片 {card_id} normal形态不存在，检查trained形态")
+                logging.debug(f"卡片 {card_id} 在本地索引中记录为不存在")
+                results[card_id] = ({'normal': False, 'trained': False}, None)
+        if not pending:
+            return results
+        
+        normal = dict(zip(pending, self.probe_urls([self.server_urls(card_id, 'normal') for card_id in pending])))
+        trained_ids = [card_id for card_id in pending if not isinstance(normal[card_id], ProbeFailed)]
+        trained = dict(zip(trained_ids, self.probe_urls([
+            [self.card_url(card_id, self.servers[normal[card_id]], 'trained')]
+            if normal[card_id] is not None else self.server_urls(card_id, 'trained')
+            for card_id in trained_ids
+        ])))
+        
+        for card_id in pending:
+            if card_id not in trained:
+                results[card_id] = normal[card_id]
+                continue
+            exists = {'normal': normal[card_id] is not None, 'trained': False}
+            outcome = trained[card_id]
+            if exists['normal']:
+                server_used = self.servers[normal[card_id]]
+                if isinstance(outcome, ProbeFailed):
+                    # 无法确定时照常尝试下载trained形态，但不把猜测写入索引
+                    exists['trained'] = True
+                    results[card_id] = (exists, server_used)
+                    continue
+                exists['trained'] = outcome is not None
+            elif isinstance(outcome, ProbeFailed):
+                results[card_id] = outcome
+                continue
+            else:
+                logging.info(f"卡片 {card_id} normal形态不存在，已检查trained形态")
+                server_used = self.servers[outcome] if outcome is not None else None
+                exists['trained'] = server_used is not None
             
-            trained_url = f"https://bestdori.com/assets/jp/characters/resourceset/res{str(card_id).zfill(6)}_rip/card_after_training.png"
-            try:
-                response = self.session.head(trained_url, timeout=3)
-                if response.status_code == 200 and ('content-length' not in response.headers or int(response.headers.get('content-length', '0')) > 100):
-                    response = self.session.get(trained_url, timeout=5)
-                    if response.status_code == 200 and len(response.content) > 1024:
-                        try:
-                            img = Image.open(BytesIO(response.content))
-                            width, height = img.size
-                            if width == 1334 and height == 1002:
-                                exists['trained'] = True
-                                server_used = 'jp'
-                                logging.info(f"卡片 {card_id} trained形态卡面验证成功 (分辨率: {width}x{height})")
-                            else:
-                                logging.warning(f"卡片 {card_id} trained形态卡面验证失败 (分辨率: {width}x{height})")
-                        except Exception as e:
-                            logging.warning(f"卡片 {card_id} trained形态卡面验证失败: {str(e)}")
-                    else:
-                        logging.warning(f"卡片 {card_id} trained形态卡面验证失败: 状态码 {response.status_code} 或内容长度不足")
-                else:
-                    logging.debug(f"卡片 {card_id} trained形态卡面不存在")
-            except Exception as e:
-                logging.debug(f"检查卡片 {card_id} trained形态出错: {str(e)}")
-        else:
-            # 如果normal形态存在，检查trained形态（只检查一次）
-            trained_url = f"https://bestdori.com/assets/jp/characters/resourceset/res{str(card_id).zfill(6)}_rip/card_after_training.png"
-            try:
-                response = self.session.head(trained_url, timeout=3)
-                if response.status_code == 200 and ('content-length' not in response.headers or int(response.headers.get('content-length', '0')) > 100):
-                    response = self.session.get(trained_url, timeout=5)
-                    if response.status_code == 200 and len(response.content) > 1024:
-                        try:
-                            img = Image.open(BytesIO(response.content))
-                            width, height = img.size
-                            if width == 1334 and height == 1002:
-                                exists['trained'] = True
-                                logging.info(f"卡片 {card_id} trained形态卡面验证成功 (分辨率: {width}x{height})")
-                            else:
-                                logging.warning(f"卡片 {card_id} trained形态卡面验证失败 (分辨率: {width}x{height})")
-                        except Exception as e:
-                            logging.warning(f"卡片 {card_id} trained形态卡面验证失败: {str(e)}")
-                    else:
-                        logging.debug(f"卡片 {card_id} trained形态卡面不存在")
-                else:
-                    logging.debug(f"卡片 {card_id} trained形态卡面不存在")
-            except Exception as e:
-                logging.debug(f"检查卡片 {card_id} trained形态出错: {str(e)}")
+            if not exists['normal'] and not exists['trained']:
+                logging.debug(f"卡片 {card_id} 在所有服务器上都不存在")
+                self.card_index.mark_absent(card_id)
+            else:
+                self.card_index.mark_present(card_id, server_used, exists['normal'], exists['trained'])
+            results[card_id] = (exists, server_used)
         
-        return exists, server_used
+        return results
+    
+    def card_url(self, card_id, server, variant):
+        """获取卡面图片的URL"""
+        filename = 'card_normal.png' if variant == 'normal' else 'card_after_training.png'
+        return f"https://bestdori.com/assets/{server}/characters/resourceset/res{str(card_id).zfill(6)}_rip/{filename}"
+    
+    def server_urls(self, card_id, variant):
+        """获取卡面图片在各个服务器上的URL，与 self.servers 的顺序一致"""
+        return [self.card_url(card_id, server, variant) for server in self.servers]
+    
+    def probe_urls(self, url_groups):
+        """同时探测多组URL，按组返回第一个确认存在的URL下标、None 或 ProbeFailed 实例"""
+        if not url_groups:
+            return []
+        # 每个URL各发一个探测请求，按请求数取得令牌
+        self.rate_limiter.acquire(self.cancel_token, cost=sum(len(urls) for urls in url_groups))
+        return self.transport.probe_many(url_groups, timeout=3)
     
-    def download_card(self, card_id, server=None):
-        """下载卡片图片"""
+    def download_card(self, card_id, server=None, exists=None):
+        """下载卡片图片
+
+        每个形态只发送一次GET请求，边下载边校验分辨率和完整性，校验通过后才保存。
+        本地已有有效文件的形态不再下载。
+        """
         result = {'normal': False, 'trained': False}
         
         # 如果没有指定服务器，先检查卡片是否存在
         if not server:
-            exists, server = self.check_card_exists(card_id)
+            try:
+                exists, server = self.check_card_exists(card_id)
+            except ProbeFailed as e:
+                logging.warning(f"卡片 {card_id} 存在性检查失败: {e}")
+                return result
             if not exists['normal'] and not exists['trained']:
                 logging.info(f"卡片 {card_id} 在所有服务器上都不存在")
                 return result
@@ -227,57 +276,72 @@ class BestdoriDownloader:
             logging.info(f"卡片 {card_id} 没有找到可用的服务器")
             return result
         
-        # 下载普通版本
-        normal_url = f"https://bestdori.com/assets/{server}/characters/resourceset/res{str(card_id).zfill(6)}_rip/card_normal.png"
-        normal_path = os.path.join(self.save_dir, f"{card_id}_normal.png")
+        if exists is None:
+            exists = {'normal': True, 'trained': True}
         
-        try:
-            response = self.session.get(normal_url, timeout=10)
-            if response.status_code == 200 and len(response.content) > 1024:
+        # 记录内容校验失败的形态，下载成功后据此修正索引
+        invalid = []
+        for variant in ('normal', 'trained'):
+            self.cancel_token.raise_if_cancelled()
+            if not exists[variant]:
+                continue
+            
+            save_path = os.path.join(self.save_dir, f"{card_id}_{variant}.png")
+            local_valid = check_card_image(save_path, min_bytes=1025)
+            validators = None
+            if local_valid:
+                if not self.refresh:
+                    result[variant] = True
+                    logging.info(f"卡片 {card_id} {variant}形态已存在，跳过下载: {save_path}")
+                    continue
+                # 检查更新时带上记录的 ETag/Last-Modified，没有记录时重新完整下载
+                validators = self.file_store.validators_for(save_path)
+            
+            # 检查更新失败时本地的有效文件仍然保留
+            result[variant] = local_valid
+            url = self.card_url(card_id, server, variant)
+            
+            def request():
+                self.rate_limiter.acquire(self.cancel_token)
                 try:
-                    # 验证图片分辨率
-                    img = Image.open(BytesIO(response.content))
-                    width, height = img.size
-                    if width == 1334 and height == 1002:
-                        # 分辨率正确，保存图片
-                        with open(normal_path, 'wb') as f:
-                            f.write(response.content)
-                        result['normal'] = True
-                        logging.info(f"卡片 {card_id} normal形态下载成功: {normal_path} (分辨率: {width}x{height})")
-                    else:
-                        logging.warning(f"卡片 {card_id} normal形态分辨率不符 (分辨率: {width}x{height})，跳过下载")
+                    # 存在上次中断留下的部分文件时只请求剩余部分，取消时部分文件会保留以便续传
+                    fetched = fetch_image(self.session, url, save_path, timeout=10, validators=validators,
+                                          min_bytes=1025, cancel_token=self.cancel_token)
                 except Exception as e:
-                    logging.warning(f"卡片 {card_id} normal形态验证失败: {str(e)}")
-            else:
-                logging.warning(f"卡片 {card_id} normal形态下载失败: 状态码 {response.status_code} 或内容长度不足")
-        except Exception as e:
-            logging.error(f"下载卡片 {card_id} normal形态失败: {str(e)}")
-        
-        # 下载特训版本
-        trained_url = f"https://bestdori.com/assets/{server}/characters/resourceset/res{str(card_id).zfill(6)}_rip/card_after_training.png"
-        trained_path = os.path.join(self.save_dir, f"{card_id}_trained.png")
+                    # 响应被取消关闭时读取会出错，此时按取消处理，不再重试
+                    self.cancel_token.raise_if_cancelled()
+                    self.rate_limiter.on_error(e)
+                    raise
+                self.rate_limiter.on_response(fetched.status)
+                return fetched
+            
+            try:
+                # 超时、连接错误、5xx 和 429 按重试策略退避后重试
+                fetched = self.retry_policy.execute(request, cancel_token=self.cancel_token)
+                if fetched.status == 304:
+                    logging.info(f"卡片 {card_id} {variant}形态未更新: {save_path}")
+                elif fetched.success:
+                    result[variant] = True
+                    self.file_store.record(save_path, url, fetched.headers)
+                    action = "已更新" if local_valid else "下载成功"
+                    logging.info(f"卡片 {card_id} {variant}形态{action} (服务器: {server}): {save_path}")
+                elif local_valid:
+                    logging.warning(f"卡片 {card_id} {variant}形态检查更新失败，保留本地文件: 状态码 {fetched.status}")
+                elif fetched.status == 200:
+                    invalid.append(variant)
+                    logging.warning(f"卡片 {card_id} {variant}形态分辨率不符或内容不完整，跳过下载")
+                else:
+                    logging.warning(f"卡片 {card_id} {variant}形态下载失败: 状态码 {fetched.status}")
+            except DownloadCancelled:
+                raise
+            except Exception as e:
+                logging.error(f"下载卡片 {card_id} {variant}形态失败: {str(e)}")
         
-        try:
-            response = self.session.get(trained_url, timeout=10)
-            if response.status_code == 200 and len(response.content) > 1024:
-                try:
-                    # 验证图片分辨率
-                    img = Image.open(BytesIO(response.content))
-                    width, height = img.size
-                    if width == 1334 and height == 1002:
-                        # 分辨率正确，保存图片
-                        with open(trained_path, 'wb') as f:
-                            f.write(response.content)
-                        result['trained'] = True
-                        logging.info(f"卡片 {card_id} trained形态下载成功: {trained_path} (分辨率: {width}x{height})")
-                    else:
-                        logging.warning(f"卡片 {card_id} trained形态分辨率不符 (分辨率: {width}x{height})，跳过下载")
-                except Exception as e:
-                    logging.warning(f"卡片 {card_id} trained形态验证失败: {str(e)}")
-            else:
-                logging.warning(f"卡片 {card_id} trained形态下载失败: 状态码 {response.status_code} 或内容长度不足")
-        except Exception as e:
-            logging.error(f"下载卡片 {card_id} trained形态失败: {str(e)}")
+        if invalid:
+            # 内容不完整只说明这次下载出错，不能说明卡牌不存在；两个形态都无效时保留原有记录
+            flags = {variant: exists[variant] and variant not in invalid for variant in ('normal', 'trained')}
+            if flags['normal'] or flags['trained']:
+                self.card_index.mark_present(card_id, server, flags['normal'], flags['trained'])
         
         return result
         
@@ -290,17 +354,47 @@ class BestdoriDownloader:
         consecutive_nonexistent = 0  # 连续不存在的卡片计数
         max_consecutive_nonexistent = 8  # 连续8次无新卡片则视为下载完成
         found_any_card = False  # 是否找到过任何卡片
+        # 该角色已知的最新卡牌ID，之前的空缺不计入连续不存在计数
+        frontier = self.card_index.frontier(character_id_start, character_id_end)
+        
+        # 已知最新卡牌之前每批同时探测的卡片数，之后每批只探测连续不存在的判定数量
+        probe_batch = get_download_config()["probe_batch"]
+        probes = {}  # 卡片ID -> 批量探测结果
         
-        logging.info(f"开始下载角色卡片，ID范围: {character_id_start} - {character_id_end}")
+        logging.info(f"开始下载角色卡片，ID范围: {character_id_start} - {character_id_end}，已知最新卡牌: {frontier}")
         
         for card_id in range(character_id_start, character_id_end + 1):
-            # 检查卡片是否存在
-            exists, server = self.check_card_exists(card_id)
+            if self.cancel_token.is_cancelled():
+                logging.info(f"下载已取消，停止于卡片 {card_id}")
+                break
+            
+            # 接下来一段卡片的存在性一次批量探测
+            if card_id not in probes:
+                if frontier is not None and card_id <= frontier:
+                    batch_end = min(character_id_end, frontier, card_id + probe_batch - 1)
+                else:
+                    batch_end = min(character_id_end, card_id + max_consecutive_nonexistent - 1)
+                probes = self.probe_cards(range(card_id, batch_end + 1))
+            
+            # 检查卡片是否存在，无法确定时记为下载失败，不计入连续不存在计数
+            result = probes.pop(card_id)
+            if isinstance(result, ProbeFailed):
+                logging.warning(f"卡片 {card_id} 存在性检查失败: {result}")
+                self.stats["failed"] += 1
+                total_checked += 1
+                if callback:
+                    callback(card_id, "failed", total_checked, character_id_end - character_id_start + 1, self.stats)
+                continue
+            exists, server = result
             
             if not exists['normal'] and not exists['trained']:
+                self.stats["nonexistent"].append(card_id)
+                if frontier is not None and card_id <= frontier:
+                    logging.debug(f"卡片 {card_id} 不存在，位于已知最新卡牌之前，继续扫描")
+                    continue
+                
                 # 卡片不存在，增加连续计数
                 consecutive_nonexistent += 1
-                self.stats["nonexistent"].append(card_id)
                 logging.info(f"卡片 {card_id} 不存在，连续计数: {consecutive_nonexistent}")
                 
                 # 如果找到过卡片，并且连续8次没有找到卡片，判定为已下载完成
@@ -316,27 +410,32 @@ class BestdoriDownloader:
             logging.info(f"找到卡片 {card_id}，重置连续不存在计数")
             
             # 下载找到的卡片
-            result = self.download_card(card_id, server)
+            try:
+                result = self.download_card(card_id, server, exists)
+            except DownloadCancelled:
+                logging.info(f"下载已取消，卡片 {card_id} 未完成的文件已清理")
+                break
             
             # 更新统计信息
             if result['normal'] and result['trained']:
-                self.stats["complete"] += 1
+                outcome = "complete"
                 logging.info(f"卡片 {card_id} 完整下载成功")
             elif result['normal']:
-                self.stats["normal_only"] += 1
+                outcome = "normal_only"
                 logging.info(f"卡片 {card_id} 仅normal形态下载成功")
             elif result['trained']:
-                self.stats["trained_only"] += 1
+                outcome = "trained_only"
                 logging.info(f"卡片 {card_id} 仅trained形态下载成功")
             else:
-                self.stats["failed"] += 1
+                outcome = "failed"
                 logging.info(f"卡片 {card_id} 下载失败")
+            self.stats[outcome] += 1
             
             total_checked += 1
             
             # 回调通知进度
             if callback:
-                callback(card_id, total_checked, character_id_end - character_id_start + 1, self.stats)
+                callback(card_id, outcome, total_checked, character_id_end - character_id_start + 1, self.stats)
         
         # 如果完全没有找到卡片
         if not found_any_card:
@@ -345,124 +444,165 @@ class BestdoriDownloader:
         return self.stats
 
 class DownloadThread(QThread):
-    """下载线程"""
-    progress_updated = pyqtSignal(int)
-    status_updated = pyqtSignal(str)
+    """下载线程
+
+    选中的多个角色通过有界线程池同时扫描，所有角色共用一个带连接池的会话。
+    统计信息和进度在锁内合并，进度和日志放入 channel，由界面线程定时取走，
+    只有下载结束时通过信号通知界面。
+    """
     download_completed = pyqtSignal(dict)
     
-    def __init__(self, characters, star=None, save_dir=None, character_id_mapping=None):
+    def __init__(self, characters, star=None, save_dir=None, character_id_mapping=None, max_workers=None, refresh=False):
         super().__init__()
         self.characters = characters
+        self.refresh = refresh
         self.star = star
         self.save_dir = save_dir
         self.character_id_mapping = character_id_mapping
-        self.downloader = BestdoriDownloader(save_dir)
-        
-    def update_progress_callback(self, card_id, current, total, stats):
-        """更新进度回调"""
-        progress = int((current / max(total, 1)) * 100)
-        self.progress_updated.emit(progress)
-        
-        # 创建当前卡片的状态信息
-        last_card_info = ""
-        nonexistent_count = len(stats["nonexistent"])
-        
-        # 判断最后一次下载的卡片结果
-        if current > 0:
-            if stats["complete"] > 0:
-                # 完整下载（两种形态都成功）
-                last_card_info = f"卡片 {card_id} 完整下载成功 (normal + trained形态)"
-            elif stats["normal_only"] > 0:
-                # 只有普通版本
-                last_card_info = f"卡片 {card_id} 仅normal形态下载成功"
-            elif stats["trained_only"] > 0:
-                # 只有特训版本
-                last_card_info = f"卡片 {card_id} 仅trained形态下载成功"
-            elif stats["failed"] > 0:
-                # 下载失败
-                last_card_info = f"卡片 {card_id} 下载失败"
-        
-        # 如果没有任何卡片下载信息，显示不存在的卡片信息
-        if not last_card_info and nonexistent_count > 0:
-            # 找到最后一个不存在的卡片ID
-            if stats["nonexistent"]:
-                last_nonexistent_id = stats["nonexistent"][-1]
-                last_card_info = f"卡片 {last_nonexistent_id} 不存在（未找到匹配1334x1002分辨率的图片），已跳过"
-        
-        # 构建状态文本
-        status_text = f"当前检查: 卡片ID {card_id} | 已下载: {current}张 | 已跳过: {nonexistent_count}张 | 进度: {progress}%"
-        if last_card_info:
-            status_text += f" | {last_card_info}"
-            
-        self.status_updated.emit(status_text)
+        
+        # 同时扫描的角色数，不超过所选角色数
+        if max_workers is None:
+            max_workers = get_download_config()["character_workers"]
+        self.max_workers = max(1, min(max_workers, len(characters)))
+        
+        # 所有角色共用进程内共享的会话，连接池大小由配置中的 pool_maxsize 决定
+        self.session = get_session()
+        # 所有角色共用的取消标记，停止下载时由界面线程设置
+        self.cancel_token = CancellationToken()
+        # 所有角色共用的限速器，初始速率按并发角色数放大
+        self.rate_limiter = AdaptiveRateLimiter(
+            initial_rate=get_download_config()["default_speed"] * REQUESTS_PER_SPEED * self.max_workers
+        )
+        # 每次下载创建新的重试策略，重试预算在所有角色之间共享
+        self.retry_policy = RetryPolicy()
+        self.downloader = BestdoriDownloader(save_dir, session=self.session, cancel_token=self.cancel_token,
+                                             rate_limiter=self.rate_limiter, retry_policy=self.retry_policy)
+        
+        # 发往界面的进度和日志
+        self.channel = ProgressChannel()
+        
+        # 合并统计信息和计算进度时使用的锁
+        self.lock = threading.Lock()
+        self.character_progress = {}
+        self.checked_count = 0
+        
+    def update_progress_callback(self, char, card_id, outcome, current, total, stats):
+        """记录一张卡片的结果，可能被多个工作线程同时调用
+
+        只把结构化事件放入进度通道，由界面线程定时批量取走，不逐张卡片触发界面更新。
+        """
+        with self.lock:
+            # 整体进度为各角色进度的平均值
+            self.character_progress[char['id']] = current / max(total, 1)
+            progress = int(sum(self.character_progress.values()) / max(len(self.characters), 1) * 100)
+            self.checked_count += 1
+            
+            # 在锁内更新，保证界面取到的进度不会倒退
+            self.channel.set_progress(progress)
+            self.channel.post(
+                'card',
+                character=char['name'],
+                card_id=card_id,
+                outcome=outcome,
+                checked=self.checked_count,
+                skipped=len(stats["nonexistent"]),
+                progress=progress
+            )
+    
+    def cancel(self):
+        """请求停止下载，正在进行的请求会被中止，线程随后自行退出"""
+        self.cancel_token.cancel()
+    
+    def get_character_save_dir(self, char):
+        """获取并创建角色专属下载目录"""
+        # 获取角色所属乐队信息
+        band = get_character_registry().band(char['band_id'])
+        band_name = band['name'] if band else None
+        
+        character_save_dir = self.save_dir
+        if band_name:
+            # 创建乐队文件夹
+            band_dir = os.path.join(self.save_dir, band_name)
+            os.makedirs(band_dir, exist_ok=True)
+            
+            # 创建角色文件夹
+            if 'nickname' in char and char['nickname']:
+                character_save_dir = os.path.join(band_dir, char['nickname'])
+            else:
+                character_save_dir = os.path.join(band_dir, str(char['id']))
+            
+            os.makedirs(character_save_dir, exist_ok=True)
+            self.channel.message(f"创建目录: {character_save_dir}")
+        
+        return character_save_dir
+    
+    def download_character(self, char, bestdori_id, character_save_dir):
+        """在工作线程中下载单个角色的所有卡片"""
+        self.channel.message(f"下载角色 {char['name']} 的卡片...")
+        
+        # 每个角色使用独立的下载器以区分保存目录和统计信息，但共用同一个会话和取消标记
+        char_downloader = BestdoriDownloader(character_save_dir, session=self.session, cancel_token=self.cancel_token,
+                                             refresh=self.refresh, rate_limiter=self.rate_limiter,
+                                             retry_policy=self.retry_policy)
+        stats = char_downloader.download_character_cards(
+            bestdori_id,
+            bestdori_id + 999,
+            lambda card_id, outcome, current, total, stats: self.update_progress_callback(char, card_id, outcome, current, total, stats)
+        )
+        
+        # 该角色扫描结束，进度计为完成
+        with self.lock:
+            self.character_progress[char['id']] = 1.0
+        return stats
         
     def run(self):
         """执行下载"""
         try:
             total_cards_found = 0
             
-            self.status_updated.emit("开始下载流程...")
+            self.channel.message("开始下载流程...")
             
+            # 先在当前线程中准备好所有角色的目录，再统一提交到线程池
+            tasks = []
             for char in self.characters:
                 bestdori_id = self.character_id_mapping.get(char['id'])
                 if not bestdori_id:
-                    self.status_updated.emit(f"未找到角色 {char['id']} 的映射ID")
+                    self.channel.message(f"未找到角色 {char['id']} 的映射ID")
                     continue
+                tasks.append((char, bestdori_id, self.get_character_save_dir(char)))
+            
+            self.channel.message(f"同时下载 {min(self.max_workers, max(len(tasks), 1))} 个角色的卡片")
+            
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self.download_character, *task): task[0] for task in tasks}
                 
-                self.status_updated.emit(f"下载角色 {char['name']} 的卡片...")
-                
-                # 获取角色所属乐队信息
-                band_name = None
-                for band in [
-                    {'id': 1, 'name': 'Poppin\'Party'},
-                    {'id': 2, 'name': 'Afterglow'},
-                    {'id': 3, 'name': 'Hello, Happy World!'},
-                    {'id': 4, 'name': 'Pastel*Palettes'},
-                    {'id': 5, 'name': 'Roselia'},
-                    {'id': 6, 'name': 'Morfonica'},
-                    {'id': 7, 'name': 'RAISE A SUILEN'},
-                    {'id': 8, 'name': 'MyGO!!!!!'},
-                    {'id': 9, 'name': 'その他'}
-                ]:
-                    if band['id'] == char['band_id']:
-                        band_name = band['name']
-                        break
-                
-                # 创建角色专属下载目录
-                character_save_dir = self.save_dir
-                if band_name:
-                    # 创建乐队文件夹
-                    band_dir = os.path.join(self.save_dir, band_name)
-                    os.makedirs(band_dir, exist_ok=True)
+                for future in as_completed(futures):
+                    char = futures[future]
+                    try:
+                        stats = future.result()
+                    except Exception as e:
+                        self.channel.message(f"下载角色 {char['name']} 出错: {str(e)}", False)
+                        continue
                     
-                    # 创建角色文件夹
-                    if 'nickname' in char and char['nickname']:
-                        character_save_dir = os.path.join(band_dir, char['nickname'])
-                    else:
-                        character_save_dir = os.path.join(band_dir, str(char['id']))
+                    with self.lock:
+                        # 统计找到的卡片数量
+                        total_cards_found += stats["complete"] + stats["normal_only"] + stats["trained_only"] + stats["failed"]
+                        
+                        # 合并统计信息
+                        self.downloader.stats["complete"] += stats["complete"]
+                        self.downloader.stats["normal_only"] += stats["normal_only"]
+                        self.downloader.stats["trained_only"] += stats["trained_only"]
+                        self.downloader.stats["failed"] += stats["failed"]
+                        self.downloader.stats["nonexistent"].extend(stats["nonexistent"])
                     
-                    os.makedirs(character_save_dir, exist_ok=True)
-                    self.status_updated.emit(f"创建目录: {character_save_dir}")
-                
-                # 为当前角色创建专用的下载器实例，使用角色专属目录
-                char_downloader = BestdoriDownloader(character_save_dir)
-                
-                # 下载该角色的所有卡片
-                stats = char_downloader.download_character_cards(
-                    bestdori_id,
-                    bestdori_id + 999,
-                    self.update_progress_callback
-                )
-                
-                # 统计找到的卡片数量
-                total_cards_found += stats["complete"] + stats["normal_only"] + stats["trained_only"] + stats["failed"]
-                
-                # 合并统计信息
-                self.downloader.stats["complete"] += stats["complete"]
-                self.downloader.stats["normal_only"] += stats["normal_only"]
-                self.downloader.stats["trained_only"] += stats["trained_only"]
-                self.downloader.stats["failed"] += stats["failed"]
-                self.downloader.stats["nonexistent"].extend(stats["nonexistent"])
+                    self.channel.message(f"角色 {char['name']} 的卡片下载完成")
+            
+            self.downloader.stats["nonexistent"].sort()
+            
+            # 被取消时由界面负责提示，不再发送完成信号
+            if self.cancel_token.is_cancelled():
+                self.channel.message("下载已取消")
+                return
             
             if total_cards_found == 0:
                 self.download_completed.emit({
@@ -473,6 +613,7 @@ class DownloadThread(QThread):
                 return
             
             # 发送完成信号
+            self.channel.set_progress(100)
             self.download_completed.emit({
                 'success': True,
                 'total': total_cards_found,
@@ -484,7 +625,7 @@ class DownloadThread(QThread):
             })
             
         except Exception as e:
-            self.status_updated.emit(f"下载过程出错: {str(e)}")
+            self.channel.message(f"下载过程出错: {str(e)}", False)
             self.download_completed.emit({
                 'success': False,
                 'message': f'下载失败: {str(e)}'
@@ -583,121 +724,26 @@ class CardDownloadPage(QWidget):
         self.init_character_mapping()
         self.init_ui()
         
+        # 定时从下载线程的进度通道批量取走事件
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(PROGRESS_INTERVAL)
+        self.progress_timer.timeout.connect(self.drain_progress)
+        
     def init_data(self):
         """初始化数据"""
-        # 预设乐队数据
-        self.bands = [
-            {'id': 1, 'name': 'Poppin\'Party'},
-            {'id': 2, 'name': 'Afterglow'},
-            {'id': 3, 'name': 'Hello, Happy World!'},
-            {'id': 4, 'name': 'Pastel*Palettes'},
-            {'id': 5, 'name': 'Roselia'},
-            {'id': 6, 'name': 'Morfonica'},
-            {'id': 7, 'name': 'RAISE A SUILEN'},
-            {'id': 8, 'name': 'MyGO!!!!!'},
-            {'id': 9, 'name': 'その他'}
-        ]
-        
-        # 预设乐器数据
-        self.instruments = [
-            {'id': 1, 'name': '吉他'},
-            {'id': 2, 'name': '贝斯'},
-            {'id': 3, 'name': '鼓'},
-            {'id': 4, 'name': '键盘'},
-            {'id': 5, 'name': '主唱'},
-            {'id': 6, 'name': 'DJ'},
-            {'id': 7, 'name': '小提琴'}
-        ]
-        
-        # 预设角色数据
-        self.characters = [
-            {'id': 1, 'name': '戸山香澄', 'band_id': 1, 'instrument_id': 1, 'nickname': 'ksm'},
-            {'id': 2, 'name': '花園たえ', 'band_id': 1, 'instrument_id': 1, 'nickname': 'tae'},
-            {'id': 3, 'name': '牛込りみ', 'band_id': 1, 'instrument_id': 2, 'nickname': 'rimi'},
-            {'id': 4, 'name': '山吹沙綾', 'band_id': 1, 'instrument_id': 3, 'nickname': 'saya'},
-            {'id': 5, 'name': '市ヶ谷有咲', 'band_id': 1, 'instrument_id': 4, 'nickname': 'arisa'},
-            {'id': 6, 'name': '美竹蘭', 'band_id': 2, 'instrument_id': 1, 'nickname': 'ran'},
-            {'id': 7, 'name': '青葉モカ', 'band_id': 2, 'instrument_id': 1, 'nickname': 'moca'},
-            {'id': 8, 'name': '上原ひまり', 'band_id': 2, 'instrument_id': 4, 'nickname': 'himari'},
-            {'id': 9, 'name': '宇田川巴', 'band_id': 2, 'instrument_id': 3, 'nickname': 'tomoe'},
-            {'id': 10, 'name': '羽沢つぐみ', 'band_id': 2, 'instrument_id': 2, 'nickname': 'tsugu'},
-            {'id': 11, 'name': '弦巻こころ', 'band_id': 3, 'instrument_id': 5, 'nickname': 'kokoro'},
-            {'id': 12, 'name': '瀬田薫', 'band_id': 3, 'instrument_id': 3, 'nickname': 'kaoru'},
-            {'id': 13, 'name': '北沢はぐみ', 'band_id': 3, 'instrument_id': 2, 'nickname': 'hagumi'},
-            {'id': 14, 'name': '松原花音', 'band_id': 3, 'instrument_id': 4, 'nickname': 'kanon'},
-            {'id': 15, 'name': '奥沢美咲', 'band_id': 3, 'instrument_id': 6, 'nickname': 'misaki'},
-            {'id': 16, 'name': '丸山彩', 'band_id': 4, 'instrument_id': 5, 'nickname': 'aya'},
-            {'id': 17, 'name': '氷川日菜', 'band_id': 4, 'instrument_id': 1, 'nickname': 'hina'},
-            {'id': 18, 'name': '白鷺千聖', 'band_id': 4, 'instrument_id': 2, 'nickname': 'chisato'},
-            {'id': 19, 'name': '大和麻弥', 'band_id': 4, 'instrument_id': 3, 'nickname': 'maya'},
-            {'id': 20, 'name': '若宮イヴ', 'band_id': 4, 'instrument_id': 4, 'nickname': 'eve'},
-            {'id': 21, 'name': '湊友希那', 'band_id': 5, 'instrument_id': 5, 'nickname': 'yukina'},
-            {'id': 22, 'name': '氷川紗夜', 'band_id': 5, 'instrument_id': 1, 'nickname': 'sayo'},
-            {'id': 23, 'name': '今井リサ', 'band_id': 5, 'instrument_id': 2, 'nickname': 'lisa'},
-            {'id': 24, 'name': '宇田川あこ', 'band_id': 5, 'instrument_id': 3, 'nickname': 'ako'},
-            {'id': 25, 'name': '白金燐子', 'band_id': 5, 'instrument_id': 4, 'nickname': 'rinko'},
-            {'id': 26, 'name': '倉田ましろ', 'band_id': 6, 'instrument_id': 1, 'nickname': 'mashiro'},
-            {'id': 27, 'name': '桐ケ谷透子', 'band_id': 6, 'instrument_id': 7, 'nickname': 'touko'},
-            {'id': 28, 'name': '広町七深', 'band_id': 6, 'instrument_id': 2, 'nickname': 'nanami'},
-            {'id': 29, 'name': '二葉つくし', 'band_id': 6, 'instrument_id': 3, 'nickname': 'tsukushi'},
-            {'id': 30, 'name': '八潮瑠唯', 'band_id': 6, 'instrument_id': 5, 'nickname': 'rui'},
-            {'id': 31, 'name': '和奏レイ', 'band_id': 7, 'instrument_id': 6, 'nickname': 'layer'},
-            {'id': 32, 'name': '朝日六花', 'band_id': 7, 'instrument_id': 1, 'nickname': 'lock'},
-            {'id': 33, 'name': '佐藤ますき', 'band_id': 7, 'instrument_id': 3, 'nickname': 'masking'},
-            {'id': 34, 'name': '鳰原令王那', 'band_id': 7, 'instrument_id': 4, 'nickname': 'pareo'},
-            {'id': 35, 'name': 'チュチュ', 'band_id': 7, 'instrument_id': 2, 'nickname': 'chu2'},
-            {'id': 36, 'name': '高松燈', 'band_id': 8, 'instrument_id': 5, 'nickname': 'tomorin'},
-            {'id': 37, 'name': '千早愛音', 'band_id': 8, 'instrument_id': 1, 'nickname': 'ano'},
-            {'id': 38, 'name': '要楽奈', 'band_id': 8, 'instrument_id': 1, 'nickname': 'rana'},
-            {'id': 39, 'name': '長崎そよ', 'band_id': 8, 'instrument_id': 2, 'nickname': 'soyo'},
-            {'id': 40, 'name': '椎名立希', 'band_id': 8, 'instrument_id': 3, 'nickname': 'taki'}
-        ]
+        # 乐队、乐器和角色数据来自共享的角色表
+        self.registry = get_character_registry()
+        # 角色筛选由数据库查询完成，数据库为空时从角色表写入
+        if not self.db.get_all_bands():
+            populate_database(self.db)
+        self.bands = self.registry.bands
+        self.instruments = self.registry.instruments
+        self.characters = self.registry.characters
         
     def init_character_mapping(self):
         """初始化角色ID映射"""
-        # 根据卡面ID规律，前三位是角色ID，这里映射数据库角色ID到Bestdori角色ID
-        self.character_id_mapping = {
-            1: 1000,    # 戸山香澄
-            2: 2000,    # 花園たえ
-            3: 3000,    # 牛込りみ
-            4: 4000,    # 山吹沙綾
-            5: 5000,    # 市ヶ谷有咲
-            6: 6000,    # 美竹蘭
-            7: 7000,    # 青葉モカ
-            8: 8000,    # 上原ひまり
-            9: 9000,    # 宇田川巴
-            10: 10000,  # 羽沢つぐみ
-            11: 11000,  # 弦巻こころ
-            12: 12000,  # 瀬田薫
-            13: 13000,  # 北沢はぐみ
-            14: 14000,  # 松原花音
-            15: 15000,  # 奥沢美咲
-            16: 16000,  # 丸山彩
-            17: 17000,  # 氷川日菜
-            18: 18000,  # 白鷺千聖
-            19: 19000,  # 大和麻弥
-            20: 20000,  # 若宮イヴ
-            21: 21000,  # 湊友希那
-            22: 22000,  # 氷川紗夜
-            23: 23000,  # 今井リサ
-            24: 24000,  # 宇田川あこ
-            25: 25000,  # 白金燐子
-            26: 26000,  # 倉田ましろ
-            27: 27000,  # 桐ケ谷透子
-            28: 28000,  # 広町七深
-            29: 29000,  # 二葉つくし
-            30: 30000,  # 八潮瑠唯
-            31: 31000,  # 和奏レイ
-            32: 32000,  # 朝日六花
-            33: 33000,  # 佐藤ますき
-            34: 34000,  # 鳰原令王那
-            35: 35000,  # チュチュ
-            36: 36001,  # 高松燈
-            37: 37001,  # 千早愛音
-            38: 38001,  # 要楽奈
-            39: 39001,  # 長崎そよ
-            40: 40001   # 椎名立希
-        }
+        # 映射数据库角色ID到Bestdori中开始扫描的卡面ID
+        self.character_id_mapping = self.registry.bestdori_mapping()
         
     def init_ui(self):
         """初始化UI"""
@@ -769,6 +815,11 @@ class CardDownloadPage(QWidget):
         self.stop_button.setVisible(False)
         button_container.addWidget(self.stop_button)
         
+        # 检查更新选项：已下载的卡面发送条件请求，未变化的不会重新下载
+        self.refresh_checkbox = QCheckBox("检查已下载卡面的更新")
+        self.refresh_checkbox.setToolTip("勾选后会向服务器确认已下载的卡面是否有新版本，未变化的卡面不会重新下载")
+        button_layout.addWidget(self.refresh_checkbox)
+        
         # 添加一个分隔器
         line = QFrame()
         line.setFrameShape(QFrame.Shape.HLine)
@@ -817,14 +868,9 @@ class CardDownloadPage(QWidget):
         self.status_label = QLabel("")
         download_info_layout.addWidget(self.status_label)
         
-        # 下载日志区域
-        self.log_area = QScrollArea()
-        self.log_area.setWidgetResizable(True)
-        download_info_layout.addWidget(self.log_area)
-        
-        self.log_container = QWidget()
-        self.log_layout = QVBoxLayout(self.log_container)
-        self.log_area.setWidget(self.log_container)
+        # 下载日志区域，只保留最近的日志，完整日志可另存为文件
+        self.log_view = LogView()
+        download_info_layout.addWidget(self.log_view)
     
     def setup_band_menu(self):
         """设置乐队下拉菜单"""
@@ -1415,7 +1461,8 @@ class CardDownloadPage(QWidget):
         selected_bands = []
         for id, checkbox in self.band_checkboxes.items():
             if id != -1 and checkbox.isChecked():
-                band_name = next((band['name'] for band in self.bands if band['id'] == id), None)
+                band = self.registry.band(id)
+                band_name = band['name'] if band else None
                 if band_name:
                     selected_bands.append(band_name)
         
@@ -1431,7 +1478,8 @@ class CardDownloadPage(QWidget):
         selected_instruments = []
         for id, checkbox in self.instrument_checkboxes.items():
             if id != -1 and checkbox.isChecked():
-                instrument_name = next((instrument['name'] for instrument in self.instruments if instrument['id'] == id), None)
+                instrument = self.registry.instrument(id)
+                instrument_name = instrument['name'] if instrument else None
                 if instrument_name:
                     selected_instruments.append(instrument_name)
         
@@ -1447,7 +1495,8 @@ class CardDownloadPage(QWidget):
         selected_characters = []
         for id, checkbox in self.character_checkboxes.items():
             if id != -1 and checkbox.isChecked():
-                character_name = next((character['name'] for character in self.characters if character['id'] == id), None)
+                character = self.registry.character(id)
+                character_name = character['name'] if character else None
                 if character_name:
                     selected_characters.append(character_name)
         
@@ -1479,18 +1528,16 @@ class CardDownloadPage(QWidget):
         self.update_character_combo_text()
         
         # 清空日志
-        while self.log_layout.count():
-            item = self.log_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+        self.log_view.clear()
         
         # 重置进度条和状态
         self.progress_bar.setVisible(False)
         self.status_label.setText("")
         
-        # 重新启用下载按钮
-        self.download_button.setEnabled(True)
-        self.stop_button.setVisible(False)
+        # 重新启用下载按钮，正在停止的线程结束后再启用
+        if not (hasattr(self, 'download_thread') and self.download_thread.isRunning()):
+            self.download_button.setEnabled(True)
+            self.stop_button.setVisible(False)
         
         # 添加刷新日志
         self.add_log_entry("界面已重置", True)
@@ -1499,27 +1546,40 @@ class CardDownloadPage(QWidget):
         """处理停止按钮点击事件"""
         # 如果有活动的下载线程
         if hasattr(self, 'download_thread') and self.download_thread.isRunning():
-            # 终止线程
-            self.download_thread.terminate()
-            self.download_thread.wait()
-            
-            # 更新UI状态
-            self.download_button.setEnabled(True)
-            self.stop_button.setVisible(False)
-            self.progress_bar.setVisible(False)
-            
-            # 添加停止日志
-            self.add_log_entry("下载已停止", False)
-            QMessageBox.information(self, "下载停止", "下载任务已终止")
+            # 请求线程停止，进行中的请求和等待都会被中止，未完成的文件会被清理
+            # 不在界面线程中等待，线程结束后由 finished 信号完成收尾
+            self.add_log_entry("正在停止下载...", False)
+            self.stop_button.setEnabled(False)
+            self.download_thread.finished.connect(self.on_download_stopped)
+            self.download_thread.cancel()
+            # 连接信号前线程已经结束时直接收尾
+            if self.download_thread.isFinished():
+                self.on_download_stopped()
+    
+    def on_download_stopped(self):
+        """下载线程响应停止请求并结束后更新界面"""
+        try:
+            self.download_thread.finished.disconnect(self.on_download_stopped)
+        except TypeError:
+            # 已经收尾过
+            return
+        self.stop_progress_updates()
+        
+        # 更新UI状态
+        self.download_button.setEnabled(True)
+        self.stop_button.setEnabled(True)
+        self.stop_button.setVisible(False)
+        self.progress_bar.setVisible(False)
+        
+        # 添加停止日志
+        self.add_log_entry("下载已停止", False)
+        QMessageBox.information(self, "下载停止", "下载任务已终止")
             
     def on_filter_clicked(self):
         """处理筛选按钮点击事件"""
         try:
             # 清空日志
-            while self.log_layout.count():
-                item = self.log_layout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
+            self.log_view.clear()
             
             # 获取选中的角色列表
             characters = self.get_selected_characters()
@@ -1551,12 +1611,11 @@ class CardDownloadPage(QWidget):
                 characters=characters,
                 star=None,  # 移除星级筛选
                 save_dir=save_dir,
-                character_id_mapping=self.character_id_mapping
+                character_id_mapping=self.character_id_mapping,
+                refresh=self.refresh_checkbox.isChecked()
             )
             
-            # 连接信号
-            self.download_thread.progress_updated.connect(self.update_progress)
-            self.download_thread.status_updated.connect(self.update_status)
+            # 连接信号，进度和日志由定时器从进度通道取走
             self.download_thread.download_completed.connect(self.on_download_completed)
             
             # 禁用下载按钮，显示停止按钮
@@ -1567,6 +1626,7 @@ class CardDownloadPage(QWidget):
             self.progress_bar.setValue(0)
             self.progress_bar.setVisible(True)
             self.add_log_entry("启动下载线程...")
+            self.progress_timer.start()
             self.download_thread.start()
             
         except Exception as e:
@@ -1576,33 +1636,66 @@ class CardDownloadPage(QWidget):
             self.download_button.setEnabled(True)
             self.stop_button.setVisible(False)
     
-    def update_progress(self, value):
-        """更新进度条"""
-        self.progress_bar.setValue(value)
+    def drain_progress(self):
+        """取走下载线程放入进度通道的全部事件，批量更新进度条、状态和日志"""
+        if not hasattr(self, 'download_thread'):
+            return
+        progress, events = self.download_thread.channel.drain()
+        if progress is not None:
+            self.progress_bar.setValue(progress)
+        
+        entries = []
+        for event in events:
+            if event['kind'] == 'card':
+                entries.append((self.format_card_event(event), False if event['outcome'] == 'failed' else None))
+            else:
+                entries.append((event['text'], event['success']))
+        
+        if entries:
+            self.log_view.add_entries(entries)
+            # 状态标签只显示这一批中的最后一条
+            self.status_label.setText(entries[-1][0])
+    
+    def format_card_event(self, event):
+        """生成一张卡片结果的状态文本"""
+        return (
+            f"[{event['character']}] 当前检查: 卡片ID {event['card_id']} | 已下载: {event['checked']}张 | "
+            f"已跳过: {event['skipped']}张 | 进度: {event['progress']}% | "
+            f"卡片 {event['card_id']} {CARD_OUTCOME_TEXT[event['outcome']]}"
+        )
+    
+    def cleanup(self):
+        """页面被销毁前停止下载并关闭完整日志文件"""
+        if hasattr(self, 'download_thread') and self.download_thread.isRunning():
+            # 页面已不再显示，线程结束时不再更新界面或弹出提示
+            for signal, slot in ((self.download_thread.download_completed, self.on_download_completed),
+                                 (self.download_thread.finished, self.on_download_stopped)):
+                try:
+                    signal.disconnect(slot)
+                except TypeError:
+                    pass
+            self.download_thread.cancel()
+        self.progress_timer.stop()
+        self.log_view.close_spill()
+    
+    def active_threads(self):
+        """页面中仍在运行的后台线程"""
+        if hasattr(self, 'download_thread') and self.download_thread.isRunning():
+            return [self.download_thread]
+        return []
     
-    def update_status(self, text):
-        """更新状态文本"""
-        self.status_label.setText(text)
-        # 同时添加到日志
-        self.add_log_entry(text)
+    def stop_progress_updates(self):
+        """停止定时器，并取走下载线程结束前放入的剩余事件"""
+        self.progress_timer.stop()
+        self.drain_progress()
     
     def add_log_entry(self, text, success=None):
         """添加下载日志条目"""
-        log_entry = QLabel(text)
-        if success is not None:
-            if success:
-                log_entry.setStyleSheet("color: green;")
-            else:
-                log_entry.setStyleSheet("color: red;")
-        
-        # 将新日志添加到顶部
-        self.log_layout.insertWidget(0, log_entry)
-        
-        # 自动滚动到顶部
-        self.log_area.verticalScrollBar().setValue(0)
+        self.log_view.add_entry(text, success)
     
     def on_download_completed(self, result):
         """下载完成处理"""
+        self.stop_progress_updates()
         self.progress_bar.setVisible(False)
         self.download_button.setEnabled(True)
         self.stop_button.setVisible(False)
@@ -1890,26 +1983,12 @@ class CardDownloadPage(QWidget):
     
     def get_filtered_characters(self, band_ids, instrument_ids):
         """获取符合筛选条件的角色列表"""
-        filtered_characters = []
-        
-        # 检查是否使用"全部"选项
-        use_all_bands = -1 in band_ids
-        use_all_instruments = -1 in instrument_ids
-        
-        if not use_all_bands and not use_all_instruments:
-            # 筛选乐队和乐器
-            filtered_characters = [char for char in self.characters if char['band_id'] in band_ids and char['instrument_id'] in instrument_ids]
-        elif not use_all_bands:
-            # 仅筛选乐队
-            filtered_characters = [char for char in self.characters if char['band_id'] in band_ids]
-        elif not use_all_instruments:
-            # 仅筛选乐器
-            filtered_characters = [char for char in self.characters if char['instrument_id'] in instrument_ids]
-        else:
-            # 无筛选条件或全部选择
-            filtered_characters = self.characters.copy()
-                
-        return filtered_characters
+        # "全部"选项表示不按该项筛选，乐队和乐器条件由一次数据库查询完成
+        character_ids = self.db.get_filtered_character_ids(
+            None if -1 in band_ids else band_ids,
+            None if -1 in instrument_ids else instrument_ids
+        )
+        return [self.registry.character(char_id) for char_id in character_ids]
     
     def get_selected_characters(self):
         """获取选中的角色列表"""
@@ -1933,8 +2012,5 @@ class CardDownloadPage(QWidget):
     
     def get_character_by_id(self, character_id):
         """根据ID获取角色"""
-        for char in self.characters:
-            if char['id'] == character_id:
-                return char
-        return None
+        return self.registry.character(character_id)
 
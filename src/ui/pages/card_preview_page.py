@@ -1,136 +1,311 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
-                          QPushButton, QLabel, QComboBox, 
-                          QLineEdit, QScrollArea, QFrame,
-                          QGridLayout, QSpinBox)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QIcon
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
+                          QPushButton, QLabel, QComboBox,
+                          QFrame, QListView, QFileDialog)
+from PyQt6.QtCore import Qt, QSize, QUrl, QThread, QAbstractListModel, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QPixmap, QColor, QDesktopServices
+from collections import OrderedDict
+import logging
+import os
+
+from src.core.config import load_config
+from src.ui.thumbnail_loader import ThumbnailLoader, THUMBNAIL_SIZE
+from src.utils.card_library import scan_cards
+from src.utils.character_registry import get_character_registry
+
+# 内存中最多保留的缩略图数量，超过后丢弃最久未显示的
+PIXMAP_CACHE_SIZE = 400
+
+VARIANT_TEXT = {'normal': '普通', 'trained': '特训'}
+
+class ScanThread(QThread):
+    """在后台扫描下载目录中的卡面文件"""
+    scan_completed = pyqtSignal(int, list)
+
+    def __init__(self, root_dir, generation):
+        super().__init__()
+        self.root_dir = root_dir
+        self.generation = generation
+
+    def run(self):
+        try:
+            cards = scan_cards(self.root_dir)
+        except Exception:
+            logging.exception(f"扫描卡面目录失败: {self.root_dir}")
+            cards = []
+        self.scan_completed.emit(self.generation, cards)
+
+class CardGridModel(QAbstractListModel):
+    """卡面网格的数据模型
+
+    视图只会向可见的行请求 DecorationRole，此时才提交缩略图请求，
+    缩略图在工作线程中生成，完成后更新对应的行。
+    """
+
+    def __init__(self, loader, parent=None):
+        super().__init__(parent)
+        self.loader = loader
+        self.cards = []
+        self.rows = {}  # 文件路径 -> 行号
+        self.pixmaps = OrderedDict()  # 文件路径 -> QPixmap，按最近使用排序
+
+        self.placeholder = QPixmap(THUMBNAIL_SIZE)
+        self.placeholder.fill(QColor('#e0e0e0'))
+
+        loader.thumbnail_loaded.connect(self.on_thumbnail_loaded)
+
+    def set_cards(self, cards):
+        """替换显示的卡面列表"""
+        self.beginResetModel()
+        self.loader.reset()
+        self.cards = cards
+        self.rows = {card['path']: row for row, card in enumerate(cards)}
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.cards)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.cards):
+            return None
+        card = self.cards[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            name = card['character']['name'] if card['character'] else ''
+            return f"{card['card_id']} {name} {VARIANT_TEXT[card['variant']]}"
+        if role == Qt.ItemDataRole.DecorationRole:
+            pixmap = self.pixmaps.get(card['path'])
+            if pixmap is None:
+                self.loader.request(card['path'])
+                return self.placeholder
+            self.pixmaps.move_to_end(card['path'])
+            return pixmap
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return card['path']
+        if role == Qt.ItemDataRole.UserRole:
+            return card
+        return None
+
+    def on_thumbnail_loaded(self, path, image):
+        """缩略图生成完成，在界面线程中转换为 QPixmap 并刷新对应的行"""
+        row = self.rows.get(path)
+        if row is None:
+            return
+        self.pixmaps[path] = QPixmap.fromImage(image)
+        self.pixmaps.move_to_end(path)
+        while len(self.pixmaps) > PIXMAP_CACHE_SIZE:
+            self.pixmaps.popitem(last=False)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
 
 class CardPreviewPage(QWidget):
     def __init__(self):
         super().__init__()
+        self.registry = get_character_registry()
+        self.root_dir = load_config().get("paths", {}).get("downloads") or ""
+        self.all_cards = []
+        # 每次扫描递增，只接受最近一次扫描的结果
+        self.scan_generation = 0
+        self.scan_threads = set()
+        self.loader = ThumbnailLoader(self)
         self.setup_ui()
-        
+        self.load_cards()
+
     def setup_ui(self):
         """设置页面UI"""
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
-        
+
         # 创建筛选栏
         filter_bar = self.create_filter_bar()
         layout.addWidget(filter_bar)
-        
+
         # 创建卡面预览区域
         content = self.create_content()
         layout.addWidget(content)
-        
+
     def create_filter_bar(self):
         """创建筛选栏"""
         filter_frame = QFrame()
         filter_frame.setObjectName("filterFrame")
-        
+
         layout = QHBoxLayout(filter_frame)
         layout.setContentsMargins(10, 0, 10, 10)
-        
-        # 添加角色筛选
-        char_label = QLabel("角色:")
-        layout.addWidget(char_label)
-        
-        char_combo = QComboBox()
-        char_combo.addItems(["全部", "Kasumi", "Tae", "Rimi", "Saaya", "Arisa"])
-        char_combo.setObjectName("filterCombo")
-        layout.addWidget(char_combo)
-        
+
+        # 选择卡面目录
+        dir_btn = QPushButton("选择目录")
+        dir_btn.clicked.connect(self.on_choose_dir_clicked)
+        layout.addWidget(dir_btn)
+
         # 添加乐队筛选
         band_label = QLabel("乐队:")
         layout.addWidget(band_label)
-        
-        band_combo = QComboBox()
-        band_combo.addItems(["全部", "Poppin'Party", "Roselia", "Afterglow", "Pastel*Palettes", "Hello, Happy World!"])
-        band_combo.setObjectName("filterCombo")
-        layout.addWidget(band_combo)
-        
-        # 添加星级筛选
-        star_label = QLabel("星级:")
-        layout.addWidget(star_label)
-        
-        star_combo = QComboBox()
-        star_combo.addItems(["全部", "1★", "2★", "3★", "4★", "5★"])
-        star_combo.setObjectName("filterCombo")
-        layout.addWidget(star_combo)
-        
+
+        self.band_combo = QComboBox()
+        self.band_combo.addItem("全部", None)
+        for band in self.registry.bands:
+            if self.registry.characters_of_band(band['id']):
+                self.band_combo.addItem(band['name'], band['id'])
+        self.band_combo.setObjectName("filterCombo")
+        self.band_combo.currentIndexChanged.connect(self.on_band_changed)
+        layout.addWidget(self.band_combo)
+
+        # 添加角色筛选
+        char_label = QLabel("角色:")
+        layout.addWidget(char_label)
+
+        self.char_combo = QComboBox()
+        self.char_combo.setObjectName("filterCombo")
+        self.char_combo.currentIndexChanged.connect(self.apply_filter)
+        layout.addWidget(self.char_combo)
+        self.update_character_combo()
+
         # 添加乐器筛选
         instrument_label = QLabel("乐器:")
         layout.addWidget(instrument_label)
-        
-        instrument_combo = QComboBox()
-        instrument_combo.addItems(["全部", "吉他", "贝斯", "鼓", "键盘", "主唱"])
-        instrument_combo.setObjectName("filterCombo")
-        layout.addWidget(instrument_combo)
-        
+
+        self.instrument_combo = QComboBox()
+        self.instrument_combo.addItem("全部", None)
+        for instrument in self.registry.instruments:
+            self.instrument_combo.addItem(instrument['name'], instrument['id'])
+        self.instrument_combo.setObjectName("filterCombo")
+        self.instrument_combo.currentIndexChanged.connect(self.apply_filter)
+        layout.addWidget(self.instrument_combo)
+
+        # 添加形态筛选
+        variant_label = QLabel("形态:")
+        layout.addWidget(variant_label)
+
+        self.variant_combo = QComboBox()
+        self.variant_combo.addItem("全部", None)
+        for variant, text in VARIANT_TEXT.items():
+            self.variant_combo.addItem(text, variant)
+        self.variant_combo.setObjectName("filterCombo")
+        self.variant_combo.currentIndexChanged.connect(self.apply_filter)
+        layout.addWidget(self.variant_combo)
+
         layout.addStretch()
-        
+
+        self.count_label = QLabel("")
+        layout.addWidget(self.count_label)
+
         return filter_frame
-        
+
     def create_content(self):
         """创建内容显示区域"""
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setObjectName("cardScroll")
-        
-        content = QWidget()
-        layout = QGridLayout(content)
-        layout.setContentsMargins(10, 10, 10, 10)
-        layout.setSpacing(20)
-        
-        # 创建卡面预览卡片
-        for i in range(12):  # 示例显示12张卡片
-            card_frame = self.create_card_preview()
-            layout.addWidget(card_frame, i // 4, i % 4)
-        
-        scroll.setWidget(content)
-        return scroll
-        
-    def create_card_preview(self):
-        """创建单个卡面预览卡片"""
-        card_frame = QFrame()
-        card_frame.setObjectName("cardPreviewFrame")
-        card_frame.setFixedSize(250, 350)
-        
-        layout = QVBoxLayout(card_frame)
-        layout.setContentsMargins(10, 10, 10, 10)
-        
-        # 卡面预览图
-        preview_label = QLabel()
-        preview_label.setFixedSize(230, 230)
-        preview_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        preview_label.setStyleSheet("background-color: #e0e0e0; border-radius: 5px;")
-        preview_label.setText("预览图")
-        layout.addWidget(preview_label)
-        
-        # 卡面名称
-        name_label = QLabel("卡面名称")
-        name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        name_label.setStyleSheet("font-weight: bold;")
-        layout.addWidget(name_label)
-        
-        # 按钮区域
-        button_layout = QHBoxLayout()
-        
-        # 下载卡面按钮
-        download_btn = QPushButton("下载卡面")
-        download_btn.setObjectName("downloadBtn")
-        button_layout.addWidget(download_btn)
-        
-        # 播放语音按钮
-        play_btn = QPushButton("播放语音")
-        play_btn.setObjectName("playBtn")
-        button_layout.addWidget(play_btn)
-        
-        layout.addLayout(button_layout)
-        
-        return card_frame
+        # 图标模式的列表视图只绘制可见的卡面，缩略图在滚动到可见时才加载
+        self.grid_view = QListView()
+        self.grid_view.setObjectName("cardScroll")
+        self.grid_view.setViewMode(QListView.ViewMode.IconMode)
+        self.grid_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.grid_view.setMovement(QListView.Movement.Static)
+        self.grid_view.setIconSize(THUMBNAIL_SIZE)
+        self.grid_view.setGridSize(QSize(THUMBNAIL_SIZE.width() + 20, THUMBNAIL_SIZE.height() + 40))
+        self.grid_view.setUniformItemSizes(True)
+        self.grid_view.setLayoutMode(QListView.LayoutMode.Batched)
+        self.grid_view.setBatchSize(200)
+        self.grid_view.setSpacing(10)
+        self.grid_view.doubleClicked.connect(self.on_card_double_clicked)
+
+        self.model = CardGridModel(self.loader, self)
+        self.grid_view.setModel(self.model)
+
+        return self.grid_view
+
+    def update_character_combo(self):
+        """按所选乐队更新角色下拉框"""
+        band_id = self.band_combo.currentData()
+        characters = self.registry.characters_of_band(band_id) if band_id else self.registry.characters
+
+        self.char_combo.blockSignals(True)
+        self.char_combo.clear()
+        self.char_combo.addItem("全部", None)
+        for char in characters:
+            self.char_combo.addItem(char['name'], char['id'])
+        self.char_combo.blockSignals(False)
+
+    def on_band_changed(self):
+        """乐队改变时更新角色列表并重新筛选"""
+        self.update_character_combo()
+        self.apply_filter()
+
+    def on_choose_dir_clicked(self):
+        """选择卡面所在的下载目录"""
+        root_dir = QFileDialog.getExistingDirectory(
+            self,
+            "选择卡面目录",
+            self.root_dir or os.path.expanduser("~/Pictures"),
+            QFileDialog.Option.ShowDirsOnly
+        )
+        if root_dir:
+            self.root_dir = root_dir
+            self.load_cards()
+
+    def load_cards(self):
+        """在后台扫描下载目录中的卡面文件，只读取文件信息，不解码图片"""
+        self.scan_generation += 1
+        if not (self.root_dir and os.path.isdir(self.root_dir)):
+            self.all_cards = []
+            self.apply_filter()
+            return
+
+        self.count_label.setText("正在扫描...")
+        thread = ScanThread(self.root_dir, self.scan_generation)
+        thread.scan_completed.connect(self.on_scan_completed)
+        # 线程结束前保留引用，旧的扫描可能仍在运行
+        thread.finished.connect(lambda: self.scan_threads.discard(thread))
+        self.scan_threads.add(thread)
+        thread.start()
+
+    def on_scan_completed(self, generation, cards):
+        """扫描完成后更新网格，忽略已过期的扫描结果"""
+        if generation != self.scan_generation:
+            return
+        self.all_cards = cards
+        self.apply_filter()
+
+    def apply_filter(self):
+        """按筛选条件更新网格"""
+        band_id = self.band_combo.currentData()
+        character_id = self.char_combo.currentData()
+        instrument_id = self.instrument_combo.currentData()
+        variant = self.variant_combo.currentData()
+
+        cards = []
+        for card in self.all_cards:
+            char = card['character']
+            if variant and card['variant'] != variant:
+                continue
+            if (band_id or character_id or instrument_id) and not char:
+                continue
+            if band_id and char['band_id'] != band_id:
+                continue
+            if character_id and char['id'] != character_id:
+                continue
+            if instrument_id and char['instrument_id'] != instrument_id:
+                continue
+            cards.append(card)
+
+        self.model.set_cards(cards)
+        if self.root_dir:
+            self.count_label.setText(f"共 {len(cards)} 张卡面")
+        else:
+            self.count_label.setText("请选择卡面目录")
+
+    def on_card_double_clicked(self, index):
+        """双击时用系统默认程序打开原图"""
+        card = index.data(Qt.ItemDataRole.UserRole)
+        if card and os.path.exists(card['path']):
+            QDesktopServices.openUrl(QUrl.fromLocalFile(card['path']))
 
     def reset(self):
         """重置页面状态"""
-        # 清空所有内容
-        self.setup_ui() 
\ No newline at end of file
+        # 重新扫描目录，缩略图缓存保留
+        self.load_cards()
+
+    def cleanup(self):
+        """页面被销毁前放弃仍在进行的扫描结果和排队中的缩略图"""
+        self.scan_generation += 1
+        self.loader.reset()
+
+    def active_threads(self):
+        """页面中仍在运行的后台线程"""
+        return [thread for thread in self.scan_threads if thread.isRunning()]
@@ -1,74 +1,235 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
-                          QPushButton, QLabel, QComboBox, 
-                          QLineEdit, QScrollArea, QFrame,
-                          QGridLayout, QSpinBox)
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
+                          QPushButton, QLabel, QLineEdit, QFrame,
+                          QTableWidget, QTableWidgetItem, QHeaderView,
+                          QAbstractItemView, QFileDialog)
+from PyQt6.QtCore import Qt, QThread, QUrl, pyqtSignal
+from PyQt6.QtGui import QDesktopServices
+import logging
+import os
+
+from src.core.config import load_config
+from src.utils.card_catalog import get_card_catalog
+
+# 每页显示的结果数
+PAGE_SIZE = 50
+
+class IndexThread(QThread):
+    """在后台增量更新卡面目录索引"""
+    index_progress = pyqtSignal(int, int)
+    index_completed = pyqtSignal(int, str)
+
+    def __init__(self, root_dir):
+        super().__init__()
+        self.root_dir = root_dir
+
+    def run(self):
+        try:
+            roots = [self.root_dir] if self.root_dir else []
+            changed = get_card_catalog().reindex(roots, self.index_progress.emit)
+            self.index_completed.emit(changed, "")
+        except Exception as e:
+            self.index_completed.emit(0, str(e))
 
 class CardSearchPage(QWidget):
     def __init__(self):
         super().__init__()
+        self.root_dir = load_config().get("paths", {}).get("downloads") or ""
+        self.catalog = get_card_catalog()
+        self.index_thread = None
+        self.query = ""
+        self.page = 0
+        self.total = 0
         self.setup_ui()
-        
+        self.start_indexing()
+
     def setup_ui(self):
         """设置页面UI"""
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
-        
+
         # 创建搜索栏
         search_bar = self.create_search_bar()
         layout.addWidget(search_bar)
-        
+
         # 创建搜索结果区域
         content = self.create_content()
         layout.addWidget(content)
-        
+
+        # 创建翻页栏
+        page_bar = self.create_page_bar()
+        layout.addWidget(page_bar)
+
     def create_search_bar(self):
         """创建搜索栏"""
         search_frame = QFrame()
         search_frame.setObjectName("filterFrame")
-        
+
         layout = QHBoxLayout(search_frame)
         layout.setContentsMargins(10, 0, 10, 10)
-        
+
         # 添加搜索框
         search_label = QLabel("搜索:")
         layout.addWidget(search_label)
-        
-        search_box = QLineEdit()
-        search_box.setPlaceholderText("输入卡面名称或ID")
-        search_box.setObjectName("searchBox")
-        layout.addWidget(search_box)
-        
+
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("输入卡牌ID、角色名、昵称、乐队或乐器")
+        self.search_box.setObjectName("searchBox")
+        self.search_box.returnPressed.connect(self.on_search_clicked)
+        layout.addWidget(self.search_box)
+
         # 添加搜索按钮
         search_btn = QPushButton("搜索")
         search_btn.setObjectName("searchBtn")
+        search_btn.clicked.connect(self.on_search_clicked)
         layout.addWidget(search_btn)
-        
+
+        # 选择卡面目录和更新索引
+        dir_btn = QPushButton("选择目录")
+        dir_btn.clicked.connect(self.on_choose_dir_clicked)
+        layout.addWidget(dir_btn)
+
+        self.index_btn = QPushButton("更新索引")
+        self.index_btn.clicked.connect(self.start_indexing)
+        layout.addWidget(self.index_btn)
+
         layout.addStretch()
-        
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
         return search_frame
-        
+
     def create_content(self):
         """创建内容显示区域"""
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setObjectName("cardScroll")
-        
-        content = QWidget()
-        layout = QGridLayout(content)
-        layout.setContentsMargins(10, 10, 10, 10)
-        layout.setSpacing(20)
-        
-        # 这里后续会添加搜索结果列表
-        placeholder = QLabel("搜索结果区域\n(请输入搜索内容)")
-        placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        placeholder.setStyleSheet("color: #666; font-size: 16px;")
-        layout.addWidget(placeholder, 0, 0)
-        
-        scroll.setWidget(content)
-        return scroll
-        
+        self.result_table = QTableWidget(0, 6)
+        self.result_table.setObjectName("cardScroll")
+        self.result_table.setHorizontalHeaderLabels(["卡牌ID", "角色", "乐队", "乐器", "普通", "特训"])
+        self.result_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.result_table.verticalHeader().setVisible(False)
+        self.result_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.result_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.result_table.cellDoubleClicked.connect(self.on_cell_double_clicked)
+        return self.result_table
+
+    def create_page_bar(self):
+        """创建翻页栏"""
+        page_frame = QFrame()
+        layout = QHBoxLayout(page_frame)
+        layout.setContentsMargins(10, 0, 10, 10)
+
+        layout.addStretch()
+
+        self.prev_btn = QPushButton("上一页")
+        self.prev_btn.clicked.connect(lambda: self.show_page(self.page - 1))
+        layout.addWidget(self.prev_btn)
+
+        self.page_label = QLabel("")
+        layout.addWidget(self.page_label)
+
+        self.next_btn = QPushButton("下一页")
+        self.next_btn.clicked.connect(lambda: self.show_page(self.page + 1))
+        layout.addWidget(self.next_btn)
+
+        layout.addStretch()
+
+        return page_frame
+
+    def on_search_clicked(self):
+        """按输入内容搜索，从第一页开始显示"""
+        self.query = self.search_box.text().strip()
+        self.show_page(0)
+
+    def show_page(self, page):
+        """查询并显示一页结果"""
+        if page < 0:
+            return
+        try:
+            self.total, results = self.catalog.search(self.query, page, PAGE_SIZE)
+        except Exception as e:
+            logging.error(f"搜索卡牌失败: {e}")
+            self.total, results = 0, []
+        self.page = page
+
+        registry = self.catalog.registry
+        self.result_table.setRowCount(len(results))
+        for row, card in enumerate(results):
+            char = card['character']
+            band = registry.band(char['band_id']) if char else None
+            instrument = registry.instrument(char['instrument_id']) if char else None
+            values = [
+                str(card['card_id']),
+                char['name'] if char else "",
+                band['name'] if band else "",
+                instrument['name'] if instrument else "",
+                "✓" if card['normal_path'] else "",
+                "✓" if card['trained_path'] else ""
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column == 0:
+                    item.setData(Qt.ItemDataRole.UserRole, card)
+                self.result_table.setItem(row, column, item)
+
+        page_count = max(1, (self.total + PAGE_SIZE - 1) // PAGE_SIZE)
+        self.page_label.setText(f"第 {page + 1} / {page_count} 页，共 {self.total} 张")
+        self.prev_btn.setEnabled(page > 0)
+        self.next_btn.setEnabled(page + 1 < page_count)
+
+    def on_cell_double_clicked(self, row, column):
+        """双击时打开对应形态的卡面，点击其他列时优先打开特训形态"""
+        card = self.result_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        if column == 4:
+            path = card['normal_path']
+        else:
+            path = card['trained_path'] or card['normal_path']
+        if path and os.path.exists(path):
+            QDesktopServices.openUrl(QUrl.fromLocalFile(path))
+
+    def on_choose_dir_clicked(self):
+        """选择卡面所在的下载目录"""
+        root_dir = QFileDialog.getExistingDirectory(
+            self,
+            "选择卡面目录",
+            self.root_dir or os.path.expanduser("~/Pictures"),
+            QFileDialog.Option.ShowDirsOnly
+        )
+        if root_dir:
+            self.root_dir = root_dir
+            self.start_indexing()
+
+    def start_indexing(self):
+        """在后台更新索引，只扫描有变化的目录"""
+        if self.index_thread and self.index_thread.isRunning():
+            return
+        self.index_btn.setEnabled(False)
+        self.status_label.setText("正在更新索引...")
+        self.index_thread = IndexThread(self.root_dir)
+        self.index_thread.index_progress.connect(self.on_index_progress)
+        self.index_thread.index_completed.connect(self.on_index_completed)
+        self.index_thread.start()
+
+    def on_index_progress(self, done, total):
+        """更新索引进度"""
+        self.status_label.setText(f"正在更新索引... {done}/{total}")
+
+    def on_index_completed(self, changed, error):
+        """索引更新完成后刷新当前结果"""
+        self.index_btn.setEnabled(True)
+        if error:
+            self.status_label.setText(f"更新索引失败: {error}")
+        else:
+            self.status_label.setText(f"索引已更新，{changed} 张卡牌有变化")
+        self.show_page(0)
+
+    def active_threads(self):
+        """页面中仍在运行的后台线程"""
+        if self.index_thread and self.index_thread.isRunning():
+            return [self.index_thread]
+        return []
+
     def reset(self):
         """重置页面状态"""
-        # 清空所有内容
-        self.setup_ui() 
\ No newline at end of file
+        # 清空搜索条件，索引保留
+        self.search_box.clear()
+        self.query = ""
+        self.show_page(0)
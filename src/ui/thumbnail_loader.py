@@ -0,0 +1,120 @@
+import hashlib
+import itertools
+import logging
+import os
+import threading
+
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, QSize, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader
+
+# 缩略图缓存保存在项目根目录的 data/thumbnails 中
+THUMBNAIL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'thumbnails')
+
+# 缩略图大小，与 1334x1002 的卡面比例一致
+THUMBNAIL_SIZE = QSize(240, 180)
+
+class ThumbnailCache:
+    """卡面缩略图的磁盘缓存
+
+    每张卡面只完整解码并缩小一次，结果保存为JPEG；缓存文件比原图旧时视为失效并重新生成。
+    只使用 QImage，可在工作线程中调用。
+    """
+
+    def __init__(self, cache_dir=THUMBNAIL_DIR, size=THUMBNAIL_SIZE):
+        self.cache_dir = cache_dir
+        self.size = size
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_path(self, path):
+        """原图对应的缓存文件路径"""
+        key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.jpg")
+
+    def load(self, path):
+        """获取原图的缩略图，缓存有效时直接读取缓存，失败时返回 None"""
+        cache_path = self.cache_path(path)
+        try:
+            source_mtime = os.path.getmtime(path)
+            if os.path.getmtime(cache_path) >= source_mtime:
+                image = QImage(cache_path)
+                if not image.isNull():
+                    return image
+        except OSError:
+            pass
+
+        reader = QImageReader(path)
+        source_size = reader.size()
+        if source_size.isValid():
+            reader.setScaledSize(source_size.scaled(self.size, Qt.AspectRatioMode.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            return None
+
+        # 先写临时文件再替换，避免其他线程读到写了一半的缓存
+        tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+        if image.save(tmp_path, "JPG", 85):
+            try:
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                pass
+        return image
+
+class ThumbnailTask(QRunnable):
+    """在线程池中生成一张缩略图"""
+
+    def __init__(self, loader, path, generation):
+        super().__init__()
+        self.loader = loader
+        self.path = path
+        self.generation = generation
+
+    def run(self):
+        # 排队期间页面已切换目录或筛选条件时直接放弃
+        if self.generation != self.loader.generation:
+            self.loader.discard(self.path)
+            return
+        try:
+            image = self.loader.cache.load(self.path)
+        except Exception:
+            logging.exception(f"生成缩略图失败: {self.path}")
+            image = None
+        self.loader.discard(self.path)
+        if image is not None and self.generation == self.loader.generation:
+            self.loader.thumbnail_loaded.emit(self.path, image)
+
+class ThumbnailLoader(QObject):
+    """在工作线程中解码缩略图，完成后通过 thumbnail_loaded 信号送回界面线程
+
+    同一张图片只会排队一次；后请求的图片优先处理，因此当前可见的卡面最先显示。
+    """
+    thumbnail_loaded = pyqtSignal(str, QImage)
+
+    def __init__(self, parent=None, cache=None):
+        super().__init__(parent)
+        self.cache = cache or ThumbnailCache()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, QThreadPool.globalInstance().maxThreadCount() - 1))
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.generation = 0
+        self.priority = itertools.count()
+
+    def request(self, path):
+        """请求生成缩略图，已在队列中时忽略"""
+        with self.lock:
+            if path in self.pending:
+                return
+            self.pending.add(path)
+        self.pool.start(ThumbnailTask(self, path, self.generation), next(self.priority))
+
+    def discard(self, path):
+        """从排队集合中移除"""
+        with self.lock:
+            self.pending.discard(path)
+
+    def reset(self):
+        """放弃所有排队中的请求"""
+        self.generation += 1
+        self.pool.clear()
+        with self.lock:
+            self.pending.clear()
@@ -0,0 +1,287 @@
+import os
+import re
+import sqlite3
+import threading
+
+from src.utils.card_library import list_card_dirs, scan_card_dir
+from src.utils.character_registry import get_character_registry
+
+# 中日文字符，建立全文索引时在每个字之间插入空格，使名字的任意连续片段都能匹配
+CJK_PATTERN = re.compile(r'([぀-ヿ㐀-鿿豈-﫿])')
+
+def _segment(text):
+    """将中日文字符拆成单字，其余文本保持不变"""
+    return CJK_PATTERN.sub(r' \1 ', text or '').strip()
+
+def build_match_query(query):
+    """将用户输入转换为 FTS5 查询：每个词按前缀匹配，多个词同时满足"""
+    terms = []
+    for word in query.split():
+        word = _segment(word).replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*')
+    return ' AND '.join(terms)
+
+class CardCatalog:
+    """本地卡面目录索引
+
+    保存在 data/cache.db 中，合并下载目录中的卡面文件和卡牌存在性索引（card_index），
+    在 catalog_fts 全文索引中按卡牌ID、角色名、昵称、乐队和乐器搜索。
+    重新索引时只扫描修改时间变化过的目录，以及上次索引之后更新过的存在性记录。
+    可在多个线程间共享。
+    """
+
+    def __init__(self, db_path=None):
+        """初始化数据库连接"""
+        if db_path is None:
+            # 获取项目根目录
+            root_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+            # 确保data目录存在
+            data_dir = os.path.join(root_dir, 'data')
+            os.makedirs(data_dir, exist_ok=True)
+            db_path = os.path.join(data_dir, 'cache.db')
+
+        self.registry = get_character_registry()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.create_tables()
+
+    def create_tables(self):
+        """创建目录索引表"""
+        with self.lock:
+            self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS catalog_dirs (
+                path TEXT PRIMARY KEY,
+                root TEXT NOT NULL,
+                mtime REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS catalog_files (
+                path TEXT PRIMARY KEY,
+                dir TEXT NOT NULL,
+                card_id INTEGER NOT NULL,
+                variant TEXT NOT NULL,
+                member_id INTEGER,
+                mtime REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_catalog_files_dir ON catalog_files(dir);
+            CREATE INDEX IF NOT EXISTS idx_catalog_files_card ON catalog_files(card_id);
+            CREATE TABLE IF NOT EXISTS catalog_cards (
+                card_id INTEGER PRIMARY KEY,
+                member_id INTEGER,
+                server TEXT,
+                normal_path TEXT,
+                trained_path TEXT
+            );
+            CREATE TABLE IF NOT EXISTS catalog_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS catalog_fts USING fts5(
+                card_id, names, nickname, band, instrument
+            );
+            ''')
+            self.conn.commit()
+
+    def reindex(self, roots, progress=None):
+        """增量更新索引
+
+        roots 为下载目录列表，progress(已处理目录数, 目录总数) 用于报告进度。
+        不在这些目录下的记录（如切换下载目录之前索引的卡面）会被删除。
+        返回重新建立索引的卡牌数。
+        """
+        roots = [os.path.abspath(root) for root in roots]
+        changed = set()
+        for root in roots:
+            changed |= self._reindex_root(root, progress)
+        changed |= self._drop_other_roots(roots)
+        changed |= self._sync_existence_index()
+
+        with self.lock:
+            for card_id in changed:
+                self._refresh_card(card_id)
+            self.conn.commit()
+        return len(changed)
+
+    def _reindex_root(self, root, progress):
+        """重新扫描 root 下修改时间变化过的目录，返回受影响的卡牌ID"""
+        with self.lock:
+            known = dict(self.conn.execute(
+                'SELECT path, mtime FROM catalog_dirs WHERE root = ?', (root,)
+            ).fetchall())
+
+        dirs = list_card_dirs(root) if os.path.isdir(root) else []
+        changed = set()
+        for done, dir_path in enumerate(dirs, 1):
+            try:
+                mtime = os.path.getmtime(dir_path)
+            except OSError:
+                continue
+            if known.pop(dir_path, None) != mtime:
+                changed |= self._reindex_dir(root, dir_path, mtime)
+            if progress:
+                progress(done, len(dirs))
+
+        # 已被删除的目录
+        with self.lock:
+            for dir_path in known:
+                changed |= self._drop_dir(dir_path)
+            self.conn.commit()
+        return changed
+
+    def _drop_other_roots(self, roots):
+        """删除不属于 roots 中任何目录的记录，返回受影响的卡牌ID"""
+        changed = set()
+        with self.lock:
+            stale = [path for path, root in self.conn.execute('SELECT path, root FROM catalog_dirs') if root not in roots]
+            for dir_path in stale:
+                changed |= self._drop_dir(dir_path)
+            self.conn.commit()
+        return changed
+
+    def _reindex_dir(self, root, dir_path, mtime):
+        """重新记录一个目录中的卡面文件"""
+        cards = scan_card_dir(dir_path)
+        with self.lock:
+            changed = self._drop_dir(dir_path)
+            self.conn.executemany('''
+            INSERT OR REPLACE INTO catalog_files (path, dir, card_id, variant, member_id, mtime)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', [
+                (card['path'], dir_path, card['card_id'], card['variant'],
+                 card['character']['id'] if card['character'] else None, card['mtime'])
+                for card in cards
+            ])
+            self.conn.execute('''
+            INSERT OR REPLACE INTO catalog_dirs (path, root, mtime) VALUES (?, ?, ?)
+            ''', (dir_path, root, mtime))
+            self.conn.commit()
+        return changed | {card['card_id'] for card in cards}
+
+    def _drop_dir(self, dir_path):
+        """删除一个目录的记录，返回其中的卡牌ID，需在锁内调用"""
+        card_ids = {row[0] for row in self.conn.execute(
+            'SELECT card_id FROM catalog_files WHERE dir = ?', (dir_path,)
+        )}
+        self.conn.execute('DELETE FROM catalog_files WHERE dir = ?', (dir_path,))
+        self.conn.execute('DELETE FROM catalog_dirs WHERE path = ?', (dir_path,))
+        return card_ids
+
+    def _sync_existence_index(self):
+        """读取上次索引之后更新过的存在性记录，返回受影响的卡牌ID"""
+        with self.lock:
+            if not self._has_card_index():
+                return set()
+            row = self.conn.execute("SELECT value FROM catalog_meta WHERE key = 'index_checked_at'").fetchone()
+            last_checked = float(row[0]) if row else 0.0
+            rows = self.conn.execute(
+                'SELECT card_id, checked_at FROM card_index WHERE checked_at > ?', (last_checked,)
+            ).fetchall()
+            if rows:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('index_checked_at', ?)",
+                    (str(max(checked_at for _, checked_at in rows)),)
+                )
+                self.conn.commit()
+        return {card_id for card_id, _ in rows}
+
+    def _refresh_card(self, card_id):
+        """根据文件记录和存在性索引重建一张卡牌的条目，需在锁内调用"""
+        files = self.conn.execute('''
+        SELECT variant, path, member_id FROM catalog_files WHERE card_id = ? ORDER BY mtime
+        ''', (card_id,)).fetchall()
+        row = self.conn.execute(
+            'SELECT server FROM card_index WHERE card_id = ? AND present = 1', (card_id,)
+        ).fetchone() if self._has_card_index() else None
+
+        self.conn.execute('DELETE FROM catalog_cards WHERE card_id = ?', (card_id,))
+        self.conn.execute('DELETE FROM catalog_fts WHERE rowid = ?', (card_id,))
+        if not files and row is None:
+            return
+
+        # 同一形态有多个文件时取最新的
+        paths = {variant: path for variant, path, _ in files}
+        member_id = next((member_id for _, _, member_id in reversed(files) if member_id), None)
+        char = self.registry.character(member_id) if member_id else self.registry.character_of_card(card_id)
+
+        self.conn.execute('''
+        INSERT INTO catalog_cards (card_id, member_id, server, normal_path, trained_path)
+        VALUES (?, ?, ?, ?, ?)
+        ''', (card_id, char['id'] if char else None, row[0] if row else None,
+              paths.get('normal'), paths.get('trained')))
+
+        if char:
+            band = self.registry.band(char['band_id'])
+            instrument = self.registry.instrument(char['instrument_id'])
+            names = _segment(' '.join((char['name'], char['cn_name'], char['en_name'])))
+            band_text = _segment(' '.join(dict.fromkeys((band['name'], band['short_name']))))
+            instrument_text = _segment(instrument['name'] if instrument else '')
+            nickname = char['nickname']
+        else:
+            names = nickname = band_text = instrument_text = ''
+        self.conn.execute('''
+        INSERT INTO catalog_fts (rowid, card_id, names, nickname, band, instrument)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', (card_id, str(card_id), names, nickname, band_text, instrument_text))
+
+    def _has_card_index(self):
+        """存在性索引表是否存在，需在锁内调用"""
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'card_index'"
+        ).fetchone() is not None
+
+    def search(self, query, page=0, page_size=50):
+        """分页搜索卡牌
+
+        query 为空时按卡牌ID列出全部卡牌。返回 (总数, 当前页的结果列表)，
+        每个结果为 {card_id, character, server, normal_path, trained_path}。
+        """
+        match = build_match_query(query or '')
+        with self.lock:
+            if match:
+                total = self.conn.execute(
+                    'SELECT COUNT(*) FROM catalog_fts WHERE catalog_fts MATCH ?', (match,)
+                ).fetchone()[0]
+                rows = self.conn.execute('''
+                SELECT c.card_id, c.member_id, c.server, c.normal_path, c.trained_path
+                FROM catalog_fts f JOIN catalog_cards c ON c.card_id = f.rowid
+                WHERE catalog_fts MATCH ?
+                ORDER BY c.card_id
+                LIMIT ? OFFSET ?
+                ''', (match, page_size, page * page_size)).fetchall()
+            else:
+                total = self.conn.execute('SELECT COUNT(*) FROM catalog_cards').fetchone()[0]
+                rows = self.conn.execute('''
+                SELECT card_id, member_id, server, normal_path, trained_path
+                FROM catalog_cards
+                ORDER BY card_id
+                LIMIT ? OFFSET ?
+                ''', (page_size, page * page_size)).fetchall()
+
+        results = [
+            {
+                'card_id': card_id,
+                'character': self.registry.character(member_id) if member_id else None,
+                'server': server,
+                'normal_path': normal_path,
+                'trained_path': trained_path
+            }
+            for card_id, member_id, server, normal_path, trained_path in rows
+        ]
+        return total, results
+
+    def close(self):
+        """关闭数据库连接"""
+        with self.lock:
+            self.conn.close()
+
+_card_catalog = None
+_card_catalog_lock = threading.Lock()
+
+def get_card_catalog():
+    """获取进程内共享的 CardCatalog 实例"""
+    global _card_catalog
+    with _card_catalog_lock:
+        if _card_catalog is None:
+            _card_catalog = CardCatalog()
+        return _card_catalog
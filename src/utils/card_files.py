@@ -0,0 +1,118 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+class CardFileStore:
+    """已保存卡面的元数据
+
+    保存在 data/cache.db 的 card_files 表中，按文件绝对路径记录来源URL、
+    ETag、Last-Modified、文件大小和SHA-256，用于检查更新时发送条件请求。
+    可在多个线程间共享。
+    """
+
+    def __init__(self, db_path=None):
+        """初始化数据库连接"""
+        if db_path is None:
+            # 获取项目根目录
+            root_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+            # 确保data目录存在
+            data_dir = os.path.join(root_dir, 'data')
+            os.makedirs(data_dir, exist_ok=True)
+            db_path = os.path.join(data_dir, 'cache.db')
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.create_tables()
+
+    def create_tables(self):
+        """创建元数据表"""
+        with self.lock:
+            self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS card_files (
+                path TEXT PRIMARY KEY,
+                url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                saved_at REAL NOT NULL
+            )
+            ''')
+            self.conn.commit()
+
+    def lookup(self, path):
+        """查询文件的元数据，没有记录时返回 None"""
+        with self.lock:
+            row = self.conn.execute('''
+            SELECT url, etag, last_modified, size, sha256, saved_at
+            FROM card_files
+            WHERE path = ?
+            ''', (os.path.abspath(path),)).fetchone()
+
+        if row is None:
+            return None
+
+        url, etag, last_modified, size, sha256, saved_at = row
+        return {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'size': size,
+            'sha256': sha256,
+            'saved_at': saved_at
+        }
+
+    def validators_for(self, path):
+        """获取本地文件可用于条件请求的 ETag/Last-Modified
+
+        文件没有记录、记录中没有校验值，或本地文件与记录的大小、哈希不一致时返回 None，
+        此时应重新完整下载。
+        """
+        entry = self.lookup(path)
+        if entry is None or not (entry['etag'] or entry['last_modified']):
+            return None
+        try:
+            if os.path.getsize(path) != entry['size'] or file_sha256(path) != entry['sha256']:
+                return None
+        except OSError:
+            return None
+        return {'etag': entry['etag'], 'last_modified': entry['last_modified']}
+
+    def record(self, path, url, headers):
+        """下载完成后记录文件的元数据"""
+        path = os.path.abspath(path)
+        size = os.path.getsize(path)
+        sha256 = file_sha256(path)
+        with self.lock:
+            self.conn.execute('''
+            INSERT OR REPLACE INTO card_files (path, url, etag, last_modified, size, sha256, saved_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (path, url, headers.get('ETag'), headers.get('Last-Modified'), size, sha256, time.time()))
+            self.conn.commit()
+
+    def close(self):
+        """关闭数据库连接"""
+        with self.lock:
+            self.conn.close()
+
+def file_sha256(path, chunk_size=64 * 1024):
+    """分块计算文件的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+_card_file_store = None
+_card_file_store_lock = threading.Lock()
+
+def get_card_file_store():
+    """获取进程内共享的 CardFileStore 实例"""
+    global _card_file_store
+    with _card_file_store_lock:
+        if _card_file_store is None:
+            _card_file_store = CardFileStore()
+        return _card_file_store
@@ -0,0 +1,118 @@
+import sqlite3
+import os
+import threading
+import time
+
+from src.core.config import get_download_config
+
+class CardIndex:
+    """卡牌存在性索引
+
+    保存在 data/cache.db 的 card_index 表中，记录每个卡牌ID是否存在、
+    所在服务器、normal/trained 形态是否存在以及最后检查时间。
+    不存在的记录超过有效期后视为未知，以便发现新卡。
+    可在多个线程间共享。
+    """
+
+    def __init__(self, db_path=None, absent_ttl=None):
+        """初始化数据库连接"""
+        if db_path is None:
+            # 获取项目根目录
+            root_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+            # 确保data目录存在
+            data_dir = os.path.join(root_dir, 'data')
+            os.makedirs(data_dir, exist_ok=True)
+            # 运行时缓存与随仓库提供的 bestdori.db 分开存放，重建角色数据库时不受影响
+            db_path = os.path.join(data_dir, 'cache.db')
+
+        # 不存在记录的有效期（秒）
+        if absent_ttl is None:
+            absent_ttl = get_download_config()["absent_ttl_days"] * 24 * 3600
+        self.absent_ttl = absent_ttl
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.create_tables()
+
+    def create_tables(self):
+        """创建索引表"""
+        with self.lock:
+            self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS card_index (
+                card_id INTEGER PRIMARY KEY,
+                present INTEGER NOT NULL,
+                server TEXT,
+                has_normal INTEGER NOT NULL DEFAULT 0,
+                has_trained INTEGER NOT NULL DEFAULT 0,
+                checked_at REAL NOT NULL
+            )
+            ''')
+            self.conn.commit()
+
+    def lookup(self, card_id):
+        """查询卡牌索引，没有记录或不存在记录已过期时返回 None"""
+        with self.lock:
+            row = self.conn.execute('''
+            SELECT present, server, has_normal, has_trained, checked_at
+            FROM card_index
+            WHERE card_id = ?
+            ''', (card_id,)).fetchone()
+
+        if row is None:
+            return None
+
+        present, server, has_normal, has_trained, checked_at = row
+        if not present and time.time() - checked_at > self.absent_ttl:
+            return None
+
+        return {
+            'exists': bool(present),
+            'server': server,
+            'normal': bool(has_normal),
+            'trained': bool(has_trained),
+            'checked_at': checked_at
+        }
+
+    def frontier(self, start_id, end_id):
+        """获取ID范围内已知存在的最大卡牌ID，即该成员已知的最新卡牌，没有时返回 None"""
+        with self.lock:
+            row = self.conn.execute('''
+            SELECT MAX(card_id)
+            FROM card_index
+            WHERE present = 1 AND card_id BETWEEN ? AND ?
+            ''', (start_id, end_id)).fetchone()
+        return row[0]
+
+    def mark_present(self, card_id, server, has_normal, has_trained):
+        """记录卡牌存在"""
+        self._upsert(card_id, 1, server, has_normal, has_trained)
+
+    def mark_absent(self, card_id):
+        """记录卡牌不存在"""
+        self._upsert(card_id, 0, None, False, False)
+
+    def _upsert(self, card_id, present, server, has_normal, has_trained):
+        """写入或更新一条记录"""
+        with self.lock:
+            self.conn.execute('''
+            INSERT OR REPLACE INTO card_index (card_id, present, server, has_normal, has_trained, checked_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', (card_id, present, server, int(bool(has_normal)), int(bool(has_trained)), time.time()))
+            self.conn.commit()
+
+    def close(self):
+        """关闭数据库连接"""
+        with self.lock:
+            self.conn.close()
+
+_card_index = None
+_card_index_lock = threading.Lock()
+
+def get_card_index():
+    """获取进程内共享的 CardIndex 实例"""
+    global _card_index
+    with _card_index_lock:
+        if _card_index is None:
+            _card_index = CardIndex()
+        return _card_index
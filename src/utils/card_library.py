@@ -0,0 +1,52 @@
+import os
+import re
+
+from src.utils.character_registry import get_character_registry
+
+# 下载的卡面文件名：<卡牌ID>_normal.png 或 <卡牌ID>_trained.png
+CARD_FILE_PATTERN = re.compile(r'^(\d+)_(normal|trained)\.png$', re.IGNORECASE)
+
+def list_card_dirs(root):
+    """列出 root 及其下所有子目录，按路径排序"""
+    dirs = []
+    for dir_path, dir_names, _ in os.walk(root):
+        dir_names.sort()
+        dirs.append(dir_path)
+    return dirs
+
+def scan_card_dir(dir_path):
+    """列出目录（不含子目录）中的卡面文件
+
+    返回 [{path, card_id, variant, mtime, size, character}, ...]，按卡牌ID和形态排序。
+    character 由目录名推断（乐队目录/角色目录），无法识别时为 None。
+    """
+    character = get_character_registry().character_for_folder(
+        os.path.basename(os.path.dirname(dir_path)), os.path.basename(dir_path)
+    )
+    cards = []
+    try:
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                match = CARD_FILE_PATTERN.match(entry.name)
+                if not match or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                cards.append({
+                    'path': entry.path,
+                    'card_id': int(match.group(1)),
+                    'variant': match.group(2).lower(),
+                    'mtime': stat.st_mtime,
+                    'size': stat.st_size,
+                    'character': character
+                })
+    except OSError:
+        return []
+    cards.sort(key=lambda card: (card['card_id'], card['variant']))
+    return cards
+
+def scan_cards(root):
+    """扫描下载目录树中的全部卡面文件"""
+    cards = []
+    for dir_path in list_card_dirs(root):
+        cards.extend(scan_card_dir(dir_path))
+    return cards
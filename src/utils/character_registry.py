@@ -0,0 +1,199 @@
+import re
+import threading
+from bisect import bisect_right
+
+# 乐队：(编号, 显示名称, 命令行中的名称, 爬虫保存目录)
+# 图形界面按显示名称建立下载目录，命令行爬虫按保存目录建立下载目录
+BANDS = [
+    (1, "Poppin'Party", "Poppin'Party", "Poppin'Party"),
+    (2, 'Afterglow', 'Afterglow', 'Afterglow'),
+    (3, 'Hello, Happy World!', 'Hello Happy World', 'Hello Happy World'),
+    (4, 'Pastel*Palettes', 'Pastel*Palettes', 'Pastel Palettes'),
+    (5, 'Roselia', 'Roselia', 'Roselia'),
+    (6, 'Morfonica', 'Morfonica', 'Morfonica'),
+    (7, 'RAISE A SUILEN', 'RAISE A SUILEN', 'RAISE_A_SUILEN'),
+    (8, 'MyGO!!!!!', 'MyGO!!!!!', 'MyGO!!!!!'),
+    (9, 'その他', 'その他', None)
+]
+
+# 乐器：(编号, 名称, 英文名称)
+INSTRUMENTS = [
+    (1, '吉他', 'Guitar'),
+    (2, '贝斯', 'Bass'),
+    (3, '鼓', 'Drums'),
+    (4, '键盘', 'Keyboard'),
+    (5, '主唱', 'Vocals'),
+    (6, 'DJ', 'DJ'),
+    (7, '小提琴', 'Violin')
+]
+
+# 角色：(编号, 乐队编号, 乐器编号, 日文名, 中文名, 英文名, 昵称)
+MEMBERS = [
+    (1, 1, 1, '戸山香澄', '户山香澄', 'Kasumi', 'ksm'),
+    (2, 1, 1, '花園たえ', '花园多惠', 'Tae', 'tae'),
+    (3, 1, 2, '牛込りみ', '牛込里美', 'Rimi', 'rimi'),
+    (4, 1, 3, '山吹沙綾', '山吹沙绫', 'Saya', 'saya'),
+    (5, 1, 4, '市ヶ谷有咲', '市谷有咲', 'Arisa', 'arisa'),
+    (6, 2, 1, '美竹蘭', '美竹兰', 'Ran', 'ran'),
+    (7, 2, 1, '青葉モカ', '青叶摩卡', 'Moca', 'moca'),
+    (8, 2, 4, '上原ひまり', '上原绯玛丽', 'Himari', 'himari'),
+    (9, 2, 3, '宇田川巴', '宇田川巴', 'Tomoe', 'tomoe'),
+    (10, 2, 2, '羽沢つぐみ', '羽泽鸫', 'Tsugumi', 'tsugu'),
+    (11, 3, 5, '弦巻こころ', '弦卷心', 'Kokoro', 'kokoro'),
+    (12, 3, 3, '瀬田薫', '濑田薰', 'Kaoru', 'kaoru'),
+    (13, 3, 2, '北沢はぐみ', '北泽育美', 'Hagumi', 'hagumi'),
+    (14, 3, 4, '松原花音', '松原花音', 'Kano', 'kanon'),
+    (15, 3, 6, '奥沢美咲', '奥泽美咲', 'Misaki', 'misaki'),
+    (16, 4, 5, '丸山彩', '丸山彩', 'Aya', 'aya'),
+    (17, 4, 1, '氷川日菜', '冰川日菜', 'Hina', 'hina'),
+    (18, 4, 2, '白鷺千聖', '白鹭千圣', 'Chisato', 'chisato'),
+    (19, 4, 3, '大和麻弥', '大和麻弥', 'Maya', 'maya'),
+    (20, 4, 4, '若宮イヴ', '若宫伊芙', 'Eve', 'eve'),
+    (21, 5, 5, '湊友希那', '湊友希那', 'Yukina', 'yukina'),
+    (22, 5, 1, '氷川紗夜', '氷川纱夜', 'Sayo', 'sayo'),
+    (23, 5, 2, '今井リサ', '今井莉莎', 'Lisa', 'lisa'),
+    (24, 5, 3, '宇田川あこ', '宇田川亚子', 'Ako', 'ako'),
+    (25, 5, 4, '白金燐子', '白金燐子', 'Rinko', 'rinko'),
+    (26, 6, 1, '倉田ましろ', '仓田真白', 'Mashiro', 'mashiro'),
+    (27, 6, 7, '桐ケ谷透子', '桐谷透子', 'Toko', 'touko'),
+    (28, 6, 2, '広町七深', '广町七深', 'Nanami', 'nanami'),
+    (29, 6, 3, '二葉つくし', '二叶筑紫', 'Tsukushi', 'tsukushi'),
+    (30, 6, 5, '八潮瑠唯', '八潮瑠唯', 'Rui', 'rui'),
+    (31, 7, 6, '和奏レイ', 'LAYER', 'Layer', 'layer'),
+    (32, 7, 1, '朝日六花', 'LOCK', 'Lock', 'lock'),
+    (33, 7, 3, '佐藤ますき', 'MASKING', 'Masking', 'masking'),
+    (34, 7, 4, '鳰原令王那', 'PAREO', 'Pareo', 'pareo'),
+    (35, 7, 2, 'チュチュ', 'Chu²', 'Chu2', 'chu2'),
+    (36, 8, 5, '高松燈', '高松灯', 'Tomorin', 'tomorin'),
+    (37, 8, 1, '千早愛音', '千早爱音', 'Ano', 'ano'),
+    (38, 8, 1, '要楽奈', '要乐奈', 'Rana', 'rana'),
+    (39, 8, 2, '長崎そよ', '长崎素世', 'Soyo', 'soyo'),
+    (40, 8, 3, '椎名立希', '椎名立希', 'Riki', 'taki')
+]
+
+# 中日文字符，中文名不含这些字符时（如 LAYER、Chu²）命令行中显示英文名
+CJK_PATTERN = re.compile(r'[぀-ヿ㐀-鿿豈-﫿]')
+
+# 卡面ID从该编号的乐队开始改为从 x001 起，图形界面从这里开始扫描
+BESTDORI_OFFSET_FROM_BAND = 8
+
+class CharacterRegistry:
+    """乐队、乐器和角色的统一数据
+
+    数据只在创建时整理一次，之后按角色编号、卡牌ID、乐队和乐器查询都不再遍历列表。
+    第 i 个角色的卡牌ID范围为 i*1000+1 到 (i+1)*1000，乐队最后一名角色到 i*1000+999 为止。
+    命令行菜单、关于信息和 data/bestdori.db 中的角色表都由这里的数据生成。
+    返回的字典由所有调用方共享，不应修改。可在多个线程间共享。
+    """
+
+    def __init__(self):
+        self.bands = [
+            {'id': band_id, 'name': name, 'short_name': short_name, 'folder': folder}
+            for band_id, name, short_name, folder in BANDS
+        ]
+        self.instruments = [
+            {'id': instrument_id, 'name': name, 'name_en': name_en}
+            for instrument_id, name, name_en in INSTRUMENTS
+        ]
+
+        self.characters = []
+        for index, (member_id, band_id, instrument_id, name, cn_name, en_name, nickname) in enumerate(MEMBERS):
+            is_last = index + 1 == len(MEMBERS) or MEMBERS[index + 1][1] != band_id
+            start = member_id * 1000 + 1
+            end = member_id * 1000 + (999 if is_last else 1000)
+            bestdori_id = member_id * 1000 + (1 if band_id >= BESTDORI_OFFSET_FROM_BAND else 0)
+            self.characters.append({
+                'id': member_id,
+                'name': name,
+                'band_id': band_id,
+                'instrument_id': instrument_id,
+                'nickname': nickname,
+                'cn_name': cn_name,
+                'en_name': en_name,
+                'display_name': cn_name if CJK_PATTERN.search(cn_name) else en_name,
+                'card_range': (start, end),
+                'bestdori_id': bestdori_id
+            })
+
+        self.band_by_id = {band['id']: band for band in self.bands}
+        self.instrument_by_id = {instrument['id']: instrument for instrument in self.instruments}
+        self.character_by_id = {char['id']: char for char in self.characters}
+
+        self.characters_by_band = {band['id']: [] for band in self.bands}
+        self.characters_by_instrument = {instrument['id']: [] for instrument in self.instruments}
+        for char in self.characters:
+            self.characters_by_band[char['band_id']].append(char)
+            self.characters_by_instrument[char['instrument_id']].append(char)
+
+        # 按起始ID排序的卡牌范围，按卡牌ID查找角色时二分
+        self.characters.sort(key=lambda char: char['card_range'][0])
+        self.range_starts = [char['card_range'][0] for char in self.characters]
+
+        self.band_ranges = {}
+        for band_id, members in self.characters_by_band.items():
+            if members:
+                self.band_ranges[band_id] = (members[0]['card_range'][0], members[-1]['card_range'][1])
+
+        # 下载目录名 -> 角色，兼容图形界面（乐队名/昵称）和命令行爬虫（乐队目录/英文名）的目录结构
+        self.folder_index = {}
+        for char in self.characters:
+            band = self.band_by_id[char['band_id']]
+            for band_folder in {band['name'], band['short_name'], band['folder']}:
+                for member_folder in {char['nickname'], char['en_name'], str(char['id'])}:
+                    if band_folder:
+                        self.folder_index[(band_folder.lower(), member_folder.lower())] = char
+
+    def band(self, band_id):
+        """按编号获取乐队，不存在时返回 None"""
+        return self.band_by_id.get(band_id)
+
+    def instrument(self, instrument_id):
+        """按编号获取乐器，不存在时返回 None"""
+        return self.instrument_by_id.get(instrument_id)
+
+    def character(self, member_id):
+        """按编号获取角色，不存在时返回 None"""
+        return self.character_by_id.get(member_id)
+
+    def characters_of_band(self, band_id):
+        """获取乐队的全部角色"""
+        return self.characters_by_band.get(band_id, [])
+
+    def characters_with_instrument(self, instrument_id):
+        """获取使用该乐器的全部角色"""
+        return self.characters_by_instrument.get(instrument_id, [])
+
+    def band_range(self, band_id):
+        """获取乐队的卡牌ID范围 (起始ID, 结束ID)，没有角色时返回 None"""
+        return self.band_ranges.get(band_id)
+
+    def position_of_card(self, card_id):
+        """获取卡牌ID所属角色在 characters 中的下标，不属于任何角色时返回 None"""
+        index = bisect_right(self.range_starts, card_id) - 1
+        if index >= 0 and card_id <= self.characters[index]['card_range'][1]:
+            return index
+        return None
+
+    def character_of_card(self, card_id):
+        """获取卡牌ID所属的角色，不属于任何角色时返回 None"""
+        index = self.position_of_card(card_id)
+        return self.characters[index] if index is not None else None
+
+    def character_for_folder(self, band_folder, member_folder):
+        """根据下载目录的乐队目录名和角色目录名获取角色，无法识别时返回 None"""
+        return self.folder_index.get((band_folder.lower(), member_folder.lower()))
+
+    def bestdori_mapping(self):
+        """角色编号到图形界面开始扫描的卡牌ID的映射"""
+        return {char['id']: char['bestdori_id'] for char in self.characters}
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_character_registry():
+    """获取进程内共享的 CharacterRegistry 实例"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = CharacterRegistry()
+        return _registry
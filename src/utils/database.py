@@ -2,7 +2,85 @@ import sqlite3
 import os
 from typing import List, Dict, Tuple
 
+# 查询语句固定为模块常量，相同的SQL文本会复用连接中已编译的语句
+SELECT_BANDS = 'SELECT id, name FROM bands ORDER BY id'
+
+SELECT_INSTRUMENTS = 'SELECT id, name_en, name_cn FROM instruments ORDER BY name_cn'
+
+SELECT_CHARACTERS_BY_BAND = '''
+SELECT id, name
+FROM characters
+WHERE band_id = ?
+ORDER BY id
+'''
+
+SELECT_CHARACTERS_BY_INSTRUMENT = '''
+SELECT c.id, c.name, c.nickname, b.name as band_name, i.name_cn as instrument_name
+FROM characters c
+JOIN character_instruments ci ON c.id = ci.character_id
+JOIN bands b ON c.band_id = b.id
+JOIN instruments i ON ci.instrument_id = i.id
+WHERE ci.instrument_id = ?
+ORDER BY c.id
+'''
+
+SELECT_CHARACTERS_BY_STAR = '''
+SELECT c.id, c.name, c.nickname, b.name as band_name
+FROM characters c
+JOIN bands b ON c.band_id = b.id
+WHERE c.id BETWEEN ? AND ?
+ORDER BY c.id
+'''
+
+SELECT_CHARACTERS_BY_BAND_AND_INSTRUMENT = '''
+SELECT c.id, c.name
+FROM characters c
+JOIN character_instruments ci ON c.id = ci.character_id
+WHERE c.band_id = ? AND ci.instrument_id = ?
+ORDER BY c.id
+'''
+
+def _filtered_characters_sql(band_count, instrument_count):
+    """生成按乐队和乐器筛选角色的查询语句，数量为 0 表示不按该项筛选"""
+    conditions = []
+    if band_count:
+        conditions.append(f"c.band_id IN ({', '.join('?' * band_count)})")
+    if instrument_count:
+        conditions.append(f"ci.instrument_id IN ({', '.join('?' * instrument_count)})")
+    return f'''
+SELECT DISTINCT c.id
+FROM characters c
+JOIN character_instruments ci ON c.id = ci.character_id
+{'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+ORDER BY c.id
+'''
+
+# 查询结果每一行转换为字典的函数，同时作为查询缓存键的一部分
+def _first_column(row):
+    return row[0]
+
+def _band_row(row):
+    return {'id': row[0], 'name': row[1]}
+
+def _instrument_row(row):
+    return {'id': row[0], 'name_en': row[1], 'name_cn': row[2]}
+
+def _character_row(row):
+    return {'id': row[0], 'name': row[1]}
+
+def _instrument_character_row(row):
+    return {'id': row[0], 'name': row[1], 'nickname': row[2], 'band_name': row[3], 'instrument_name': row[4]}
+
+def _star_character_row(row):
+    return {'id': row[0], 'name': row[1], 'nickname': row[2], 'band_name': row[3]}
+
 class DatabaseManager:
+    """角色数据库
+    
+    查询结果按 (SQL, 参数, 行转换函数) 缓存在进程内，任何写入都会清空缓存。
+    返回的列表和字典由所有调用方共享，不应修改。
+    """
+    
     def __init__(self):
         """初始化数据库连接"""
         # 获取项目根目录
@@ -13,6 +91,8 @@ class DatabaseManager:
         # 创建数据库连接
         db_path = os.path.join(data_dir, 'bestdori.db')
         self.conn = sqlite3.connect(db_path)
+        # 查询结果缓存：(SQL, 参数, 行转换函数) -> 结果列表
+        self.query_cache = {}
         self.create_tables()
     
     def create_tables(self):
@@ -58,7 +138,24 @@ class DatabaseManager:
         )
         ''')
         
+        # 按乐队和乐器筛选角色时使用的索引
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_characters_band_id ON characters (band_id)')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_character_instruments_instrument_id
+        ON character_instruments (instrument_id, character_id)
+        ''')
+        
         self.conn.commit()
+        self.query_cache.clear()
+    
+    def _query(self, sql, params=(), row_factory=tuple):
+        """执行查询并缓存结果，row_factory 将每一行转换为结果列表中的元素"""
+        key = (sql, params, row_factory)
+        result = self.query_cache.get(key)
+        if result is None:
+            result = [row_factory(row) for row in self.conn.execute(sql, params)]
+            self.query_cache[key] = result
+        return result
     
     def add_band(self, band_id, name):
         """添加乐队"""
@@ -66,6 +163,15 @@ class DatabaseManager:
         cursor.execute('INSERT OR REPLACE INTO bands (id, name) VALUES (?, ?)',
                       (band_id, name))
         self.conn.commit()
+        self.query_cache.clear()
+    
+    def add_instrument(self, instrument_id, name_en, name_cn):
+        """添加乐器"""
+        cursor = self.conn.cursor()
+        cursor.execute('INSERT OR REPLACE INTO instruments (id, name_en, name_cn) VALUES (?, ?, ?)',
+                      (instrument_id, name_en, name_cn))
+        self.conn.commit()
+        self.query_cache.clear()
     
     def add_character(self, character_id, name, nickname, band_id, instruments):
         """添加角色及其乐器"""
@@ -105,70 +211,41 @@ class DatabaseManager:
             ''', (character_id, instrument_id))
         
         self.conn.commit()
+        self.query_cache.clear()
     
     def get_all_bands(self):
         """获取所有乐队"""
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT id, name FROM bands ORDER BY id')
-        return [{'id': row[0], 'name': row[1]} for row in cursor.fetchall()]
+        return self._query(SELECT_BANDS, row_factory=_band_row)
     
     def get_all_instruments(self):
         """获取所有乐器"""
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT id, name_en, name_cn FROM instruments ORDER BY name_cn')
-        return [{'id': row[0], 'name_en': row[1], 'name_cn': row[2]} for row in cursor.fetchall()]
+        return self._query(SELECT_INSTRUMENTS, row_factory=_instrument_row)
     
     def get_characters_by_band(self, band_id):
         """获取指定乐队的角色"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-        SELECT id, name
-        FROM characters
-        WHERE band_id = ?
-        ORDER BY id
-        ''', (band_id,))
-        return [{'id': row[0], 'name': row[1]} for row in cursor.fetchall()]
+        return self._query(SELECT_CHARACTERS_BY_BAND, (band_id,), _character_row)
     
     def get_characters_by_instrument(self, instrument_id):
         """获取指定乐器的角色"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-        SELECT c.id, c.name, c.nickname, b.name as band_name, i.name_cn as instrument_name
-        FROM characters c
-        JOIN character_instruments ci ON c.id = ci.character_id
-        JOIN bands b ON c.band_id = b.id
-        JOIN instruments i ON ci.instrument_id = i.id
-        WHERE ci.instrument_id = ?
-        ORDER BY c.id
-        ''', (instrument_id,))
-        return [{'id': row[0], 'name': row[1], 'nickname': row[2], 'band_name': row[3], 'instrument_name': row[4]} 
-                for row in cursor.fetchall()]
+        return self._query(SELECT_CHARACTERS_BY_INSTRUMENT, (instrument_id,), _instrument_character_row)
     
     def get_characters_by_star(self, star):
         """获取指定星级的角色"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-        SELECT c.id, c.name, c.nickname, b.name as band_name
-        FROM characters c
-        JOIN bands b ON c.band_id = b.id
-        WHERE c.id BETWEEN ? AND ?
-        ORDER BY c.id
-        ''', (star * 1000, (star + 1) * 1000 - 1))
-        return [{'id': row[0], 'name': row[1], 'nickname': row[2], 'band_name': row[3]} 
-                for row in cursor.fetchall()]
+        return self._query(SELECT_CHARACTERS_BY_STAR, (star * 1000, (star + 1) * 1000 - 1), _star_character_row)
     
     def get_characters_by_band_and_instrument(self, band_id, instrument_id):
         """获取特定乐队和乐器对应的角色"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-        SELECT c.id, c.name
-        FROM characters c
-        JOIN character_instruments ci ON c.id = ci.character_id
-        WHERE c.band_id = ? AND ci.instrument_id = ?
-        ORDER BY c.id
-        ''', (band_id, instrument_id))
-        return [{'id': row[0], 'name': row[1]} for row in cursor.fetchall()]
+        return self._query(SELECT_CHARACTERS_BY_BAND_AND_INSTRUMENT, (band_id, instrument_id), _character_row)
+    
+    def get_filtered_character_ids(self, band_ids=None, instrument_ids=None):
+        """获取属于任一所选乐队且使用任一所选乐器的角色编号，参数为 None 时不按该项筛选"""
+        if band_ids is not None and not band_ids or instrument_ids is not None and not instrument_ids:
+            return []
+        band_ids = tuple(sorted(band_ids)) if band_ids is not None else ()
+        instrument_ids = tuple(sorted(instrument_ids)) if instrument_ids is not None else ()
+        sql = _filtered_characters_sql(len(band_ids), len(instrument_ids))
+        return self._query(sql, band_ids + instrument_ids, _first_column)
     
     def close(self):
         """关闭数据库连接"""
-        self.conn.close() 
\ No newline at end of file
+        self.conn.close()
\ No newline at end of file
@@ -1,8 +1,15 @@
 import os
-import requests
+import sys
 from PIL import Image
 from io import BytesIO
 
+# 直接运行本脚本时也能导入 src 包
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.core.http_session import get_session
+
 # 图标配置
 ICONS = {
     'bestdori': {
@@ -84,7 +91,8 @@ def convert_svg_to_png(svg_data, size=(24, 24)):
 def download_icon(url, filename, icons_dir):
     """下载并保存图标"""
     try:
-        response = requests.get(url)
+        # 所有图标共用同一个会话，复用已建立的连接
+        response = get_session().get(url, timeout=10)
         response.raise_for_status()
         
         # 保存图标
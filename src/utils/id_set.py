@@ -0,0 +1,79 @@
+class IdSet:
+    """非负整数ID的集合，用位图保存
+
+    4万个ID只占约5KB，添加和判断是否存在都是 O(1)。
+    序列化为连续区间列表，单个ID直接写成整数，如 [[1001, 1050], 1060]，
+    因此读取时也兼容旧版保存的ID列表。
+    """
+
+    def __init__(self, ids=()):
+        self.bits = bytearray()
+        self.count = 0
+        self.update(ids)
+
+    def add(self, card_id):
+        """添加一个ID"""
+        if card_id < 0:
+            raise ValueError(f"ID不能为负数: {card_id}")
+        index, mask = card_id >> 3, 1 << (card_id & 7)
+        if index >= len(self.bits):
+            self.bits.extend(bytes(index + 1 - len(self.bits)))
+        if not self.bits[index] & mask:
+            self.bits[index] |= mask
+            self.count += 1
+
+    def update(self, ids):
+        """添加多个ID"""
+        for card_id in ids:
+            self.add(card_id)
+
+    def add_range(self, start, end):
+        """添加 start 到 end（含）之间的全部ID"""
+        for card_id in range(start, end + 1):
+            self.add(card_id)
+
+    def discard(self, card_id):
+        """移除一个ID，不存在时忽略"""
+        if card_id in self:
+            self.bits[card_id >> 3] &= ~(1 << (card_id & 7)) & 0xFF
+            self.count -= 1
+
+    def __contains__(self, card_id):
+        index = card_id >> 3
+        return card_id >= 0 and index < len(self.bits) and bool(self.bits[index] & (1 << (card_id & 7)))
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """按从小到大的顺序遍历ID"""
+        for index, byte in enumerate(self.bits):
+            if byte:
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        yield index * 8 + bit
+
+    def ranges(self):
+        """合并为连续区间，返回 [(起始ID, 结束ID), ...]"""
+        ranges = []
+        for card_id in self:
+            if ranges and ranges[-1][1] == card_id - 1:
+                ranges[-1] = (ranges[-1][0], card_id)
+            else:
+                ranges.append((card_id, card_id))
+        return ranges
+
+    def to_json(self):
+        """转换为可写入JSON的区间列表"""
+        return [start if start == end else [start, end] for start, end in self.ranges()]
+
+    @classmethod
+    def from_json(cls, data):
+        """从 to_json 的结果或旧版的ID列表读取"""
+        id_set = cls()
+        for item in data or ():
+            if isinstance(item, (list, tuple)):
+                id_set.add_range(item[0], item[1])
+            else:
+                id_set.add(item)
+        return id_set
@@ -1,6 +1,23 @@
-import json
 import os
 from src.utils.database import DatabaseManager
+from src.utils.character_registry import get_character_registry
+
+def populate_database(db):
+    """将共享角色表中的乐队、乐器和角色写入数据库，编号与角色表一致"""
+    registry = get_character_registry()
+    for band in registry.bands:
+        db.add_band(band['id'], band['name'])
+    for instrument in registry.instruments:
+        db.add_instrument(instrument['id'], instrument['name_en'], instrument['name'])
+    for char in registry.characters:
+        instrument = registry.instrument(char['instrument_id'])
+        db.add_character(
+            char['id'],
+            char['name'],
+            char['nickname'],
+            char['band_id'],
+            [(instrument['name_en'], instrument['name'])]
+        )
 
 def init_database():
     """初始化数据库数据"""
@@ -23,30 +40,8 @@ def init_database():
     # 创建新的数据库连接
     db = DatabaseManager()
     
-    # 读取角色列表
-    json_path = os.path.join(root_dir, 'character_list.json')
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # 添加乐队和成员
-    for group in data['groups']:
-        # 将乐队ID从1开始编号
-        new_band_id = group['id'] + 1 if group['id'] == 0 else group['id']
-        print(f"添加乐队: {group['name']} (原始ID: {group['id']}, 新ID: {new_band_id})")
-        db.add_band(new_band_id, group['name'])
-        
-        # 添加成员
-        for member in group['members']:
-            # 只使用英文和中文的乐器名称
-            instruments = [(member['instruments'][0], member['instruments'][2])]  # 英文和中文
-            print(f"添加成员: {member['name']} (ID: {member['id']}, 乐队ID: {new_band_id})")
-            db.add_character(
-                member['id'],
-                member['name'],
-                member['nickname'],
-                new_band_id,  # 使用新的乐队ID
-                instruments
-            )
+    # 添加乐队、乐器和成员
+    populate_database(db)
     
     # 验证数据
     cursor = db.conn.cursor()
@@ -0,0 +1,55 @@
+import os
+import struct
+
+# 卡面图片的标准分辨率
+CARD_SIZE = (1334, 1002)
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# PNG签名(8字节) + IHDR长度和类型(8字节) + 宽高(8字节)
+PNG_HEADER_SIZE = 24
+
+# 长度为0的IEND块，每个完整的PNG文件都以它结尾
+PNG_TRAILER = b'\x00\x00\x00\x00IEND\xaeB`\x82'
+
+def read_png_size(header):
+    """从PNG文件的前24字节中读取宽高，不是有效的PNG头时返回 None"""
+    if len(header) < PNG_HEADER_SIZE or not header.startswith(PNG_SIGNATURE):
+        return None
+    if header[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', header[16:PNG_HEADER_SIZE])
+
+def is_png_complete(tail):
+    """根据文件末尾的字节判断PNG是否完整"""
+    return tail.endswith(PNG_TRAILER)
+
+def check_card_image(path, expected_size=CARD_SIZE, min_bytes=0):
+    """不解码图片，检查本地文件是否为完整且分辨率正确的卡面
+
+    只读取文件头和末尾的IEND块。文件头不是PNG时使用PIL读取尺寸作为后备。
+    """
+    try:
+        file_size = os.path.getsize(path)
+        if file_size < max(min_bytes, PNG_HEADER_SIZE):
+            return False
+
+        with open(path, 'rb') as f:
+            header = f.read(PNG_HEADER_SIZE)
+            size = read_png_size(header)
+            if size is not None:
+                f.seek(-len(PNG_TRAILER), os.SEEK_END)
+                return size == tuple(expected_size) and is_png_complete(f.read())
+
+        return _read_size_with_pil(path) == tuple(expected_size)
+    except OSError:
+        return False
+
+def _read_size_with_pil(path):
+    """使用PIL读取图片尺寸，无法识别时返回 None"""
+    try:
+        from PIL import Image
+        with Image.open(path) as img:
+            return img.size
+    except Exception:
+        return None